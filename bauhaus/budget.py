@@ -0,0 +1,149 @@
+"""Size and time budgets of a compile.
+
+``Encoding.compile(max_clauses=..., max_seconds=...)`` stops as soon as the
+theory is known to exceed its budget and raises CompileBudgetExceeded,
+naming the _ConstraintBuilder that exceeded it.
+
+The clause budget is checked before anything is built: the clauses of the
+builders cached by earlier compiles are added to the size predicted for
+each builder that needs building, see ``Encoding.estimate``, so a theory
+that would blow up is not built at all. Builders whose size is not
+predicted, such as weighted ones, are counted once built, and every
+prediction is then replaced by the actual size. The time budget is checked
+before each group of inputs of a builder is encoded and after each builder.
+A group whose predicted clauses could not be built in the time left even
+at CLAUSES_PER_SECOND, faster than any encoding is built, is refused
+before it is encoded, so a single huge group does not run past the
+deadline; other groups stop the compile at most one group past it. With
+``compile(workers=N)`` both are checked once the builders are built.
+
+Only the clauses of _ConstraintBuilder objects are counted; custom
+constraints are converted after the builders and are not.
+
+"""
+import time
+
+# clauses encoded per second, well above the rate of any encoding, so
+# that a group is only refused when it cannot be built in time
+CLAUSES_PER_SECOND = 10 ** 7
+
+
+class CompileBudgetExceeded(ValueError):
+    """Raised by compile when the theory exceeds max_clauses or
+    max_seconds.
+
+    Attributes
+    ----------
+    constraint : _ConstraintBuilder
+        The builder that exceeded the budget.
+    report : dict
+        key: _ConstraintBuilder, value: its number of clauses, in the
+        order they were counted up to and including constraint. Sizes
+        not yet built are predicted ones.
+    clauses : int
+        Total of report.
+    seconds : float
+        Time spent by the compile.
+
+    """
+
+    def __init__(self, constraint, reason, report, seconds):
+        self.constraint = constraint
+        self.report = dict(report)
+        self.clauses = sum(report.values())
+        self.seconds = seconds
+        super().__init__(f"The {constraint} exceeds the compile budget: {reason}"
+                         f" ({self.clauses} clauses over {len(report)}"
+                         f" constraints after {seconds:.3f} seconds).")
+
+
+class Budget:
+    """Checks the size and time of one compile.
+
+    Attributes
+    ----------
+    max_clauses : int
+        Optional; the most clauses of the builders.
+    max_seconds : float
+        Optional; the most seconds spent building them.
+
+    """
+
+    def __init__(self, max_clauses=None, max_seconds=None):
+        if max_clauses is not None:
+            if not isinstance(max_clauses, int):
+                raise TypeError(f"max_clauses={max_clauses!r} is not an integer.")
+            if max_clauses < 0:
+                raise ValueError(f"max_clauses={max_clauses} is negative.")
+        if max_seconds is not None and not max_seconds > 0:
+            raise ValueError(f"max_seconds={max_seconds!r} is not positive.")
+        self.max_clauses = max_clauses
+        self.max_seconds = max_seconds
+        self._start = time.perf_counter()
+        self._clauses = dict()
+        self._total = 0
+        self._late = False
+        # why the deadline is missed, once it is
+        self._reason = None
+
+    def seconds(self) -> float:
+        return time.perf_counter() - self._start
+
+    def predict(self, cached, estimates):
+        """Counts the builders before any is built.
+
+        Arguments
+        ---------
+        cached : dict
+            key: _ConstraintBuilder, value: its number of clauses,
+            for the builders reused from earlier compiles.
+        estimates : dict
+            key: _ConstraintBuilder, value: its Encoding.estimate,
+            for the builders to build.
+
+        """
+        for constraint, clauses in cached.items():
+            self._count(constraint, clauses, "its")
+        for constraint, estimate in estimates.items():
+            if estimate["clauses"] is not None:
+                self._count(constraint, estimate["clauses"], "its predicted")
+
+    def select(self):
+        """Returns a select function for build_parts that builds no
+        more groups once the deadline passed, or is sure to pass."""
+        def select(key, predicted=None):
+            if self._late or self.max_seconds is None:
+                return not self._late
+            left = self.max_seconds - self.seconds()
+            if left < 0:
+                self._late = True
+            elif predicted is not None and predicted > left * CLAUSES_PER_SECOND:
+                self._late = True
+                self._reason = (f"a group of its inputs is predicted to have"
+                                f" {predicted} clauses, which cannot be built"
+                                f" within max_seconds={self.max_seconds}")
+            return not self._late
+        return select
+
+    def built(self, constraint, parts):
+        """Counts a builder once built, raising CompileBudgetExceeded
+        if it exceeds the budget."""
+        if self._late or (self.max_seconds is not None
+                          and self.seconds() > self.max_seconds):
+            self._fail(constraint, self._reason
+                       or f"building it took the compile past"
+                          f" max_seconds={self.max_seconds}")
+        self._count(constraint, sum(len(clauses) for clauses, _, _ in parts.values()),
+                    "its")
+
+    def _count(self, constraint, clauses, which):
+        # a builder counted again moves to the end of the report
+        self._total += clauses - self._clauses.pop(constraint, 0)
+        self._clauses[constraint] = clauses
+        if self.max_clauses is not None and self._total > self.max_clauses:
+            self._fail(constraint, f"{which} {clauses} clauses bring the"
+                                   f" theory to {self._total} clauses, over"
+                                   f" max_clauses={self.max_clauses}")
+
+    def _fail(self, constraint, reason):
+        raise CompileBudgetExceeded(constraint, reason, self._clauses, self.seconds())
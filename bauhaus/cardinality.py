@@ -0,0 +1,782 @@
+"""Cardinality encodings for bauhaus constraints.
+
+Encodings are written over DIMACS-style integer literals: a positive
+integer ``v`` is a variable and ``-v`` its negation. Each function returns
+a list of clauses (lists of integer literals) and requests auxiliary
+variables through a ``new_var`` callable that returns a fresh positive
+integer on each call.
+
+Keeping the encodings independent of ``nnf`` lets the
+``_ConstraintBuilder`` translate the clauses back into NNF objects.
+
+References
+----------
+Klieber & Kwon, Efficient CNF Encoding for Selecting 1 from N Objects (2007)
+Sinz, Towards an Optimal CNF Encoding of Boolean Cardinality Constraints (2005)
+Chen, A New SAT Encoding of the At-Most-One Constraint (2010)
+Hölldobler & Nguyen, An Efficient Encoding of the At-Most-One Constraint (2013)
+Bailleux & Boufkhad, Efficient CNF Encoding of Boolean Cardinality Constraints (2003)
+Ogawa et al., Modulo Based CNF Encoding of Cardinality Constraints (2013)
+Eén & Sörensson, Translating Pseudo-Boolean Constraints into SAT (2006)
+
+"""
+from itertools import combinations
+from math import ceil, sqrt, log2, comb
+
+
+AMO_ENCODINGS = (
+    "auto",
+    "pairwise",
+    "sequential",
+    "ladder",
+    "commander",
+    "product",
+    "bimander",
+)
+
+AMK_ENCODINGS = (
+    "auto",
+    "naive",
+    "sequential",
+    "totalizer",
+    "modulo_totalizer",
+    "sorting_network",
+)
+
+# "auto" switches from the totalizer to the modulo totalizer above this k,
+# where the quadratic node merges start to dominate.
+TOTALIZER_LIMIT = 64
+
+# Groups of at most this size are encoded pairwise by "auto" and used as
+# the base case of the recursive encodings. Up to this size the pairwise
+# encoding is no larger than the sequential counter and needs no
+# auxiliary variables.
+PAIRWISE_LIMIT = 5
+
+
+def validate_encoding(encoding_type, choices, default="auto"):
+    """Raises a ValueError if encoding_type is not one of choices.
+
+    Arguments
+    ---------
+    encoding_type : str or None
+        User-given encoding name. None selects default.
+    choices : tuple
+        Supported encoding names.
+    default : str
+        The encoding selected by None.
+
+    Returns
+    -------
+    encoding_type : str
+
+    """
+    if encoding_type is None:
+        return default
+    if encoding_type not in choices:
+        raise ValueError(f"The provided encoding_type={encoding_type!r}"
+                         f" is not one of {', '.join(choices)}.")
+    return encoding_type
+
+
+def at_most_one(lits, new_var, encoding_type=None) -> list:
+    """At most one of the literals are true.
+
+    Arguments
+    ---------
+    lits : list[int]
+    new_var : function
+        Returns a fresh positive integer variable.
+    encoding_type : str
+        One of AMO_ENCODINGS. Default is None, the pairwise encoding,
+        which adds no auxiliary variables, so the models of the
+        clauses are those of the literals. "auto" uses the pairwise
+        encoding for small groups and the product encoding otherwise.
+
+    Returns
+    -------
+    clauses : list[list[int]]
+
+    """
+    encoding_type = validate_encoding(encoding_type, AMO_ENCODINGS, "pairwise")
+    lits = list(lits)
+    if len(lits) <= 1:
+        return []
+    if encoding_type == "auto":
+        encoding_type = ("pairwise" if len(lits) <= PAIRWISE_LIMIT
+                         else "product")
+    return _AMO[encoding_type](lits, new_var)
+
+
+def exactly_one(lits, new_var, encoding_type=None) -> list:
+    """Exactly one of the literals is true.
+
+    An at most one encoding plus a single at least one clause.
+
+    """
+    clauses = at_most_one(lits, new_var, encoding_type)
+    clauses.append(list(lits))
+    return clauses
+
+
+def at_most_k(lits, new_var, k, encoding_type=None) -> list:
+    """At most k of the literals are true.
+
+    Arguments
+    ---------
+    lits : list[int]
+    new_var : function
+        Returns a fresh positive integer variable.
+    k : int
+    encoding_type : str
+        One of AMK_ENCODINGS. See ``between``.
+
+    Returns
+    -------
+    clauses : list[list[int]]
+
+    """
+    lits = list(lits)
+    return between(lits, new_var, 0, k, encoding_type)
+
+
+def at_least_k(lits, new_var, k, encoding_type=None) -> list:
+    """At least k of the literals are true."""
+    lits = list(lits)
+    return between(lits, new_var, k, len(lits), encoding_type)
+
+
+def exactly_k(lits, new_var, k, encoding_type=None) -> list:
+    """Exactly k of the literals are true."""
+    return between(lits, new_var, k, k, encoding_type)
+
+
+def between(lits, new_var, lo, hi, encoding_type=None) -> list:
+    """Between lo and hi (inclusive) of the literals are true.
+
+    Both bounds are enforced on the outputs of a single counter, so
+    they share its auxiliary variables.
+
+    Arguments
+    ---------
+    lits : list[int]
+    new_var : function
+        Returns a fresh positive integer variable.
+    lo : int
+    hi : int
+    encoding_type : str
+        One of AMK_ENCODINGS. Default is None, the naive encoding,
+        which adds no auxiliary variables. "auto" uses the at most
+        one encodings when hi = 1, the naive encoding when it is no
+        larger than the inputs times the bound, the totalizer for
+        bounds up to TOTALIZER_LIMIT and the modulo totalizer above
+        it.
+
+    Returns
+    -------
+    clauses : list[list[int]]
+        Contains the empty clause if lo > hi or lo > len(lits).
+
+    """
+    encoding_type = validate_encoding(encoding_type, AMK_ENCODINGS, "naive")
+    lits = list(lits)
+    upper = hi < len(lits)
+    lower = lo > 0
+    if lo > hi or lo > len(lits):
+        return [[]]
+    if not (upper or lower):
+        return []
+    if upper and hi == 0:
+        return [[-x] for x in lits]
+    # the counter must reach hi + 1 to forbid it, or lo to require it
+    bound = hi + 1 if upper else lo
+    if encoding_type == "auto":
+        if upper and hi == 1:
+            if lower:
+                return exactly_one(lits, new_var, "auto")
+            return at_most_one(lits, new_var, "auto")
+        if not upper and lo == 1:
+            return [lits]
+        encoding_type = _auto_counter(len(lits), lo, hi)
+
+    if encoding_type == "naive":
+        clauses = []
+        if upper:
+            clauses.extend([-x for x in combo]
+                           for combo in combinations(lits, hi + 1))
+        if lower:
+            clauses.extend(list(combo) for combo in
+                           combinations(lits, len(lits) - lo + 1))
+        return clauses
+
+    clauses = []
+    if encoding_type == "modulo_totalizer":
+        digits = _modulo_totalizer(lits, bound, new_var, clauses)
+        if upper:
+            clauses.extend(digits.at_most(hi))
+        if lower:
+            clauses.extend(digits.at_least(lo))
+        return clauses
+
+    outputs = _COUNTERS[encoding_type](lits, bound, new_var, clauses,
+                                       upper=upper, lower=lower)
+    if upper:
+        clauses.append([-outputs[hi]])
+    if lower:
+        clauses.append([outputs[lo - 1]])
+    return clauses
+
+
+def counter(lits, new_var) -> tuple:
+    """Counts the true literals in unary, for bounds given later.
+
+    A totalizer over every literal with only the clauses that push
+    its outputs up, so any bound on the count is one unit clause,
+    or assumption, on an output: at most k of the literals are
+    true when outputs[k] is false.
+
+    Arguments
+    ---------
+    lits : list[int]
+    new_var : function
+        Returns a fresh positive integer variable.
+
+    Returns
+    -------
+    (clauses, outputs) : tuple
+        outputs[j] is true when more than j of the literals are.
+
+    """
+    lits = list(lits)
+    clauses = []
+    outputs = _totalizer(lits, len(lits), new_var, clauses)
+    return clauses, outputs
+
+
+def _auto_counter(n, lo, hi) -> str:
+    """The encoding chosen by "auto" for between lo and hi of n
+    literals, other than the at most one encodings."""
+    upper = hi < n
+    lower = lo > 0
+    bound = hi + 1 if upper else lo
+    naive = 0
+    if upper:
+        naive += comb(n, hi + 1)
+    if lower:
+        naive += comb(n, n - lo + 1)
+    if naive <= n * bound:
+        return "naive"
+    if bound <= TOTALIZER_LIMIT:
+        return "totalizer"
+    return "modulo_totalizer"
+
+
+def size(n, lo, hi, encoding_type=None) -> tuple:
+    """Returns the size of ``between`` over n literals.
+
+    The sizes of the naive, pairwise, totalizer and sequential
+    counter encodings are computed from the number of literals,
+    which takes time at most linear in it. Those of the other at
+    most one encodings have closed forms too. The sorting network
+    and the modulo totalizer have none: they are encoded over
+    placeholder literals into a sink that only counts the clauses,
+    which takes time linear in their size but keeps no clauses.
+
+    Arguments
+    ---------
+    n : int
+        Number of literals.
+    lo : int
+    hi : int
+    encoding_type : str
+        One of AMK_ENCODINGS.
+
+    Returns
+    -------
+    (clauses, auxiliary) : tuple[int, int]
+
+    """
+    encoding_type = validate_encoding(encoding_type, AMK_ENCODINGS, "naive")
+    upper = hi < n
+    lower = lo > 0
+    if lo > hi or lo > n:
+        return 1, 0
+    if not (upper or lower):
+        return 0, 0
+    if upper and hi == 0:
+        return n, 0
+    bound = hi + 1 if upper else lo
+    if encoding_type == "auto":
+        if upper and hi == 1:
+            clauses, auxiliary = at_most_one_size(n, "auto")
+            return clauses + (1 if lower else 0), auxiliary
+        if not upper and lo == 1:
+            return 1, 0
+        encoding_type = _auto_counter(n, lo, hi)
+
+    if encoding_type == "naive":
+        clauses = 0
+        if upper:
+            clauses += comb(n, hi + 1)
+        if lower:
+            clauses += comb(n, n - lo + 1)
+        return clauses, 0
+    if encoding_type in ("sorting_network", "modulo_totalizer"):
+        auxiliary = [n]
+
+        def new_var():
+            auxiliary[0] += 1
+            return auxiliary[0]
+
+        lits = list(range(1, n + 1))
+        tally = _Tally()
+        if encoding_type == "sorting_network":
+            _sorting_network(lits, bound, new_var, tally, upper=upper, lower=lower)
+            return tally.count + upper + lower, auxiliary[0] - n
+        digits = _modulo_totalizer(lits, bound, new_var, tally)
+        if upper:
+            tally.extend(digits.at_most(hi))
+        if lower:
+            tally.extend(digits.at_least(lo))
+        return tally.count, auxiliary[0] - n
+
+    if encoding_type == "totalizer":
+        clauses, auxiliary = _totalizer_size(n, bound, upper, lower, dict())
+    else:
+        clauses, auxiliary = _sequential_counter_size(n, bound, upper, lower)
+    return clauses + upper + lower, auxiliary
+
+
+def at_most_one_size(n, encoding_type=None) -> tuple:
+    """Returns the (clauses, auxiliary) size of ``at_most_one`` over n
+    literals without encoding it."""
+    encoding_type = validate_encoding(encoding_type, AMO_ENCODINGS, "pairwise")
+    if n <= 1:
+        return 0, 0
+    if encoding_type == "auto":
+        encoding_type = "pairwise" if n <= PAIRWISE_LIMIT else "product"
+    if encoding_type == "pairwise":
+        return comb(n, 2), 0
+    if encoding_type in ("sequential", "ladder"):
+        return 3 * n - 4, n - 1
+    if encoding_type == "commander":
+        if n <= PAIRWISE_LIMIT:
+            return comb(n, 2), 0
+        groups = [min(3, n - i) for i in range(0, n, 3)]
+        clauses, auxiliary = at_most_one_size(len(groups), "commander")
+        return (clauses + sum(comb(g, 2) + g for g in groups),
+                auxiliary + len(groups))
+    if encoding_type == "product":
+        if n <= PAIRWISE_LIMIT:
+            return comb(n, 2), 0
+        p = ceil(sqrt(n))
+        q = ceil(n / p)
+        rows = at_most_one_size(p, "product")
+        cols = at_most_one_size(q, "product")
+        return 2 * n + rows[0] + cols[0], p + q + rows[1] + cols[1]
+    # bimander
+    group_size = max(2, ceil(sqrt(n)))
+    groups = [min(group_size, n - i) for i in range(0, n, group_size)]
+    bits = max(1, ceil(log2(len(groups))))
+    return sum(comb(g, 2) for g in groups) + n * bits, bits
+
+
+class _Tally:
+    """Stands for the list of clauses of an encoding, counting the
+    clauses added to it without keeping them."""
+
+    def __init__(self):
+        self.count = 0
+
+    def append(self, clause):
+        self.count += 1
+
+    def extend(self, clauses):
+        self.count += sum(1 for _ in clauses)
+
+
+def counter_size(n) -> tuple:
+    """Returns the (clauses, auxiliary) size of ``counter`` over n
+    literals without encoding it."""
+    return _totalizer_size(n, n, True, False, dict())
+
+
+def _totalizer_size(n, cap, upper, lower, sizes) -> tuple:
+    """(clauses, auxiliary) of _totalizer over n literals, remembering
+    the size of each subtree in sizes."""
+    if n == 1:
+        return 0, 0
+    if n in sizes:
+        return sizes[n]
+    mid = n // 2
+    left = _totalizer_size(mid, cap, upper, lower, sizes)
+    right = _totalizer_size(n - mid, cap, upper, lower, sizes)
+    a, b, outputs = min(mid, cap), min(n - mid, cap), min(n, cap)
+    clauses = left[0] + right[0]
+    for i in range(a + 1):
+        # values of j with 0 < i + j <= outputs, and with i + j < outputs
+        if upper:
+            clauses += max(0, min(b, outputs - i) - max(0, 1 - i) + 1)
+        if lower:
+            clauses += max(0, min(b, outputs - i - 1) + 1)
+    sizes[n] = clauses, left[1] + right[1] + outputs
+    return sizes[n]
+
+
+def _sequential_counter_size(n, cap, upper, lower) -> tuple:
+    """(clauses, auxiliary) of _sequential_counter over n literals."""
+    clauses = auxiliary = 0
+    previous = 0
+    for i in range(n):
+        width = min(previous + 1, cap)
+        auxiliary += width
+        if upper:
+            clauses += 1 + previous + min(previous, width - 1)
+        if lower:
+            clauses += 2 * width - 1
+        previous = width
+    return clauses, auxiliary
+
+
+def _pairwise(lits, new_var) -> list:
+    """Naive encoding, one binary clause per unordered pair."""
+    return [[-a, -b] for a, b in combinations(lits, 2)]
+
+
+def _sequential(lits, new_var) -> list:
+    """Sequential counter; s_i is true if one of x_1..x_i is true."""
+    n = len(lits)
+    s = [new_var() for _ in range(n - 1)]
+    clauses = [[-lits[0], s[0]]]
+    for i in range(1, n - 1):
+        clauses.append([-lits[i], s[i]])
+        clauses.append([-s[i - 1], s[i]])
+        clauses.append([-lits[i], -s[i - 1]])
+    clauses.append([-lits[-1], -s[-1]])
+    return clauses
+
+
+def _ladder(lits, new_var) -> list:
+    """Ladder encoding; x_i forces the ladder to step at position i."""
+    n = len(lits)
+    y = [new_var() for _ in range(n - 1)]
+    # ladder validity, y_{i+1} -> y_i
+    clauses = [[-y[i + 1], y[i]] for i in range(n - 2)]
+    clauses.append([-lits[0], -y[0]])
+    for i in range(1, n - 1):
+        clauses.append([-lits[i], y[i - 1]])
+        clauses.append([-lits[i], -y[i]])
+    clauses.append([-lits[-1], y[-1]])
+    return clauses
+
+
+def _commander(lits, new_var, group_size=3) -> list:
+    """Commander encoding; each group's commander is implied by its members."""
+    if len(lits) <= PAIRWISE_LIMIT:
+        return _pairwise(lits, new_var)
+    clauses = []
+    commanders = []
+    for i in range(0, len(lits), group_size):
+        group = lits[i:i + group_size]
+        c = new_var()
+        commanders.append(c)
+        clauses.extend(_pairwise(group, new_var))
+        clauses.extend([-x, c] for x in group)
+    clauses.extend(_commander(commanders, new_var, group_size))
+    return clauses
+
+
+def _product(lits, new_var) -> list:
+    """Product encoding; each literal is placed in a p x q grid."""
+    if len(lits) <= PAIRWISE_LIMIT:
+        return _pairwise(lits, new_var)
+    p = ceil(sqrt(len(lits)))
+    q = ceil(len(lits) / p)
+    rows = [new_var() for _ in range(p)]
+    cols = [new_var() for _ in range(q)]
+    clauses = []
+    for i, x in enumerate(lits):
+        clauses.append([-x, rows[i // q]])
+        clauses.append([-x, cols[i % q]])
+    clauses.extend(_product(rows, new_var))
+    clauses.extend(_product(cols, new_var))
+    return clauses
+
+
+def _bimander(lits, new_var) -> list:
+    """Bimander encoding; groups are identified by a binary code."""
+    group_size = max(2, ceil(sqrt(len(lits))))
+    groups = [lits[i:i + group_size]
+              for i in range(0, len(lits), group_size)]
+    bits = [new_var() for _ in range(max(1, ceil(log2(len(groups)))))]
+    clauses = []
+    for index, group in enumerate(groups):
+        clauses.extend(_pairwise(group, new_var))
+        for j, b in enumerate(bits):
+            bit = b if (index >> j) & 1 else -b
+            clauses.extend([-x, bit] for x in group)
+    return clauses
+
+
+_AMO = {
+    "pairwise": _pairwise,
+    "sequential": _sequential,
+    "ladder": _ladder,
+    "commander": _commander,
+    "product": _product,
+    "bimander": _bimander,
+}
+
+
+""" Counters
+
+Each counter takes the inputs, a cap and a list to extend with its
+clauses, and returns unary outputs where outputs[i] stands for "at least
+i + 1 inputs are true". Clauses in the upper direction force an output
+true when enough inputs are true, which is what an upper bound needs.
+Clauses in the lower direction force an output false when too few inputs
+are true, which is what a lower bound needs. Only the first cap outputs
+are built.
+
+"""
+
+
+def _sequential_counter(lits, cap, new_var, clauses,
+                        upper=True, lower=False) -> list:
+    """Sequential counter; register r_i[j] counts x_1..x_i."""
+    register = []
+    for x in lits:
+        width = min(len(register) + 1, cap)
+        row = [new_var() for _ in range(width)]
+        if upper:
+            clauses.append([-x, row[0]])
+            for j, r in enumerate(register):
+                clauses.append([-r, row[j]])
+                if j + 1 < width:
+                    clauses.append([-x, -r, row[j + 1]])
+        if lower:
+            for j, out in enumerate(row):
+                clause = [-out, x]
+                if j < len(register):
+                    clause.append(register[j])
+                clauses.append(clause)
+                if j:
+                    clauses.append([-out, register[j - 1]])
+        register = row
+    return register
+
+
+def _totalizer(lits, cap, new_var, clauses,
+               upper=True, lower=False) -> list:
+    """Totalizer; a binary tree of unary adders."""
+    if len(lits) == 1:
+        return list(lits)
+    mid = len(lits) // 2
+    left = _totalizer(lits[:mid], cap, new_var, clauses, upper, lower)
+    right = _totalizer(lits[mid:], cap, new_var, clauses, upper, lower)
+    outputs = [new_var() for _ in range(min(len(lits), cap))]
+    for i in range(len(left) + 1):
+        for j in range(len(right) + 1):
+            if upper and 0 < i + j <= len(outputs):
+                clause = [outputs[i + j - 1]]
+                if i:
+                    clause.append(-left[i - 1])
+                if j:
+                    clause.append(-right[j - 1])
+                clauses.append(clause)
+            # at most i on the left and j on the right
+            if lower and i + j < len(outputs):
+                clause = [-outputs[i + j]]
+                if i < len(left):
+                    clause.append(left[i])
+                if j < len(right):
+                    clause.append(right[j])
+                clauses.append(clause)
+    return outputs
+
+
+def _sorting_network(lits, cap, new_var, clauses,
+                     upper=True, lower=False) -> list:
+    """Odd-even merge sorting network, truncated to the top outputs.
+
+    Inputs are padded with None, a constant false, up to a power of
+    two so that comparators against the padding are free.
+
+    """
+    def comparator(a, b):
+        if a is None:
+            return b, None
+        if b is None:
+            return a, None
+        high, low = new_var(), new_var()
+        if upper:
+            clauses.extend([[-a, high], [-b, high], [-a, -b, low]])
+        if lower:
+            clauses.extend([[-high, a, b], [-low, a], [-low, b]])
+        return high, low
+
+    def merge(a, b):
+        if len(a) == 1:
+            return list(comparator(a[0], b[0]))
+        evens = merge(a[0::2], b[0::2])
+        odds = merge(a[1::2], b[1::2])
+        merged = [evens[0]]
+        for i in range(len(odds) - 1):
+            merged.extend(comparator(odds[i], evens[i + 1]))
+        merged.append(odds[-1])
+        return merged
+
+    width = 1
+    while width < cap:
+        width *= 2
+
+    def sort(values):
+        if len(values) == 1:
+            return values
+        half = len(values) // 2
+        merged = merge(sort(values[:half]), sort(values[half:]))
+        return merged[:width]
+
+    size = 1
+    while size < len(lits):
+        size *= 2
+    outputs = sort(list(lits) + [None] * (size - len(lits)))[:cap]
+    # a None output can never be true, pin it with a fresh false variable
+    for i, out in enumerate(outputs):
+        if out is None:
+            outputs[i] = new_var()
+            clauses.append([-outputs[i]])
+    return outputs
+
+
+class _Digits:
+    """Mixed radix outputs of the modulo totalizer.
+
+    The count is modulo * q + r where upper[e - 1] is true iff q >= e and
+    lower[i - 1] is true iff r >= i.
+
+    """
+
+    def __init__(self, modulo, upper, lower):
+        self.modulo = modulo
+        self.upper = upper
+        self.lower = lower
+
+    def at_most(self, k) -> list:
+        q, r = divmod(k, self.modulo)
+        clauses = []
+        if q < len(self.upper):
+            clauses.append([-self.upper[q]])
+        if r < len(self.lower) and q <= len(self.upper):
+            clause = [-self.lower[r]]
+            if q:
+                clause.append(-self.upper[q - 1])
+            clauses.append(clause)
+        return clauses
+
+    def at_least(self, k) -> list:
+        q, r = divmod(k, self.modulo)
+        clauses = []
+        if q:
+            clauses.append([_at_least(self.upper, q)] if q <= len(self.upper)
+                           else [])
+        if r:
+            clause = []
+            if q < len(self.upper):
+                clause.append(self.upper[q])
+            if r <= len(self.lower):
+                clause.append(self.lower[r - 1])
+            clauses.append(clause)
+        return clauses
+
+
+def _at_least(digits, i):
+    """Literal for "digit >= i"; None if trivially true, False if false."""
+    if i == 0:
+        return None
+    return digits[i - 1] if i <= len(digits) else False
+
+
+def _negate(lit):
+    if lit is None:
+        return False
+    if lit is False:
+        return None
+    return -lit
+
+
+def _implies(premises, conclusion, clauses):
+    """Adds premises -> conclusion, skipping it when it is vacuous."""
+    if conclusion is None or any(p is False for p in premises):
+        return
+    clause = [-p for p in premises if p is not None]
+    if conclusion is not False:
+        clause.append(conclusion)
+    clauses.append(clause)
+
+
+def _modulo_totalizer(lits, bound, new_var, clauses) -> '_Digits':
+    """Modulo totalizer; a totalizer over (quotient, remainder) digits.
+
+    Every node is encoded in both directions so the digits are exact,
+    which the carry between the digits requires.
+
+    """
+    modulo = max(2, ceil(sqrt(bound)))
+    cap = bound // modulo + 1
+
+    def build(lits):
+        if len(lits) == 1:
+            return [], list(lits)
+        mid = len(lits) // 2
+        up_a, low_a = build(lits[:mid])
+        up_b, low_b = build(lits[mid:])
+        upper = [new_var() for _ in range(min(len(lits) // modulo, cap))]
+        lower = [new_var() for _ in range(min(len(lits), modulo - 1))]
+        carry = new_var()
+
+        for i in range(len(low_a) + 1):
+            for j in range(len(low_b) + 1):
+                a, b = _at_least(low_a, i), _at_least(low_b, j)
+                # a <= i and b <= j
+                na = _negate(_at_least(low_a, i + 1))
+                nb = _negate(_at_least(low_b, j + 1))
+                if i + j >= modulo:
+                    _implies([a, b], carry, clauses)
+                    _implies([a, b, carry],
+                             _at_least(lower, i + j - modulo), clauses)
+                    _implies([na, nb, carry],
+                             _negate(_at_least(lower, i + j - modulo + 1)),
+                             clauses)
+                else:
+                    _implies([a, b, -carry], _at_least(lower, i + j), clauses)
+                    _implies([na, nb], -carry, clauses)
+                    _implies([na, nb, -carry],
+                             _negate(_at_least(lower, i + j + 1)), clauses)
+
+        for e in range(len(up_a) + 1):
+            for f in range(len(up_b) + 1):
+                a, b = _at_least(up_a, e), _at_least(up_b, f)
+                na = _negate(_at_least(up_a, e + 1))
+                nb = _negate(_at_least(up_b, f + 1))
+                _implies([a, b],
+                         _at_least(upper, min(e + f, len(upper))), clauses)
+                _implies([a, b, carry],
+                         _at_least(upper, min(e + f + 1, len(upper))), clauses)
+                if e + f + 1 <= len(upper):
+                    _implies([na, nb, -carry],
+                             _negate(upper[e + f]), clauses)
+                if e + f + 2 <= len(upper):
+                    _implies([na, nb, carry],
+                             _negate(upper[e + f + 1]), clauses)
+        return upper, lower
+
+    upper, lower = build(list(lits))
+    return _Digits(modulo, upper, lower)
+
+
+_COUNTERS = {
+    "sequential": _sequential_counter,
+    "totalizer": _totalizer,
+    "sorting_network": _sorting_network,
+}
@@ -0,0 +1,184 @@
+"""Compact storage of integer clauses.
+
+A ClauseStore keeps the literals of all its clauses in one contiguous
+array of 32-bit integers, and the position at which each clause starts in
+a second array (compressed sparse rows). A clause then costs four bytes
+per literal and eight for its offset, instead of a Python list of ints.
+
+Both arrays support the buffer protocol, so they can be handed to other
+libraries without copying; both are needed to tell the clauses apart, e.g.
+``numpy.frombuffer(store.literals, dtype=numpy.int32)`` and
+``numpy.frombuffer(store.offsets, dtype=numpy.int64)``, where clause i is
+``literals[offsets[i]:offsets[i + 1]]``. Named ranges of clauses, such as
+the clauses of each constraint of a compiled theory, are kept in
+``sections``. A ClauseChain reads several stores as one sequence of
+clauses without copying them.
+
+"""
+from array import array
+from bisect import bisect_right
+
+import nnf
+
+
+class ClauseStore:
+    """Clauses of integer literals in compressed sparse rows.
+
+    Iterating over a store, or indexing it with an int, gives each
+    clause as a list of ints; indexing it with a slice gives a new
+    store with those clauses.
+
+    Attributes
+    ----------
+    literals : array.array
+        Literals of every clause, in order, of typecode "i".
+    offsets : array.array
+        Clause i is literals[offsets[i]:offsets[i + 1]].
+        Typecode "q", starts with 0.
+    sections : dict
+        key -> (start, stop), ranges of clauses added with
+        add_section.
+
+    """
+
+    def __init__(self, clauses=()):
+        self.literals = array("i")
+        self.offsets = array("q", [0])
+        self.sections = dict()
+        self.extend(clauses)
+
+    def __repr__(self) -> str:
+        return (f"ClauseStore({len(self)} clauses,"
+                f" {len(self.literals)} literals)")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        literals, offsets = self.literals, self.offsets
+        for i in range(len(offsets) - 1):
+            yield literals[offsets[i]:offsets[i + 1]].tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError(f"Cannot slice a ClauseStore with step {step}.")
+            stop = max(start, stop)
+            store = ClauseStore()
+            begin, end = self.offsets[start], self.offsets[stop]
+            store.literals = self.literals[begin:end]
+            store.offsets = array("q", [offset - begin for offset
+                                        in self.offsets[start:stop + 1]])
+            return store
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ClauseStore index out of range")
+        return self.literals[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ClauseStore):
+            return (self.offsets == other.offsets
+                    and self.literals == other.literals)
+        return NotImplemented
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the literals and offsets, in bytes."""
+        return (len(self.literals) * self.literals.itemsize
+                + len(self.offsets) * self.offsets.itemsize)
+
+    def append(self, clause):
+        """Adds a clause, given as an iterable of int."""
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+
+    def extend(self, clauses):
+        """Adds clauses, given as a ClauseStore, a ClauseChain or an
+        iterable of iterables of int."""
+        literals, offsets = self.literals, self.offsets
+        if isinstance(clauses, ClauseChain):
+            for store in clauses.stores:
+                self.extend(store)
+            return
+        if isinstance(clauses, ClauseStore):
+            end = offsets[-1]
+            literals.extend(clauses.literals)
+            offsets.extend(array("q", [offset + end for offset
+                                       in clauses.offsets[1:]]))
+            return
+        for clause in clauses:
+            literals.extend(clause)
+            offsets.append(len(literals))
+
+    def add_section(self, key, clauses):
+        """Adds clauses and records their range under key."""
+        start = len(self)
+        self.extend(clauses)
+        self.sections[key] = (start, len(self))
+
+    def section(self, key) -> "ClauseStore":
+        """Returns the clauses added under key, as a new store."""
+        start, stop = self.sections[key]
+        return self[start:stop]
+
+    def to_nnf(self, table) -> nnf.And:
+        """Returns the clauses as an NNF theory.
+
+        Arguments
+        ---------
+        table : bauhaus.variables.VariableTable
+            Numbers the variables of the clauses.
+
+        """
+        return nnf.And([nnf.Or(map(table.var, clause)) for clause in self])
+
+
+class ClauseChain:
+    """Clauses of several ClauseStores, read in order as one sequence.
+
+    Iterating over a chain, or indexing it with an int, gives each
+    clause as a list of ints, as for a ClauseStore; the stores are not
+    copied.
+
+    Attributes
+    ----------
+    stores : list[ClauseStore]
+        The stores, in order.
+    starts : list[int]
+        Index in the chain of the first clause of each store.
+
+    """
+
+    def __init__(self, stores=()):
+        self.stores = list(stores)
+        self.starts = []
+        total = 0
+        for store in self.stores:
+            self.starts.append(total)
+            total += len(store)
+        self._len = total
+
+    def __repr__(self) -> str:
+        return f"ClauseChain({len(self.stores)} stores, {len(self)} clauses)"
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        for store in self.stores:
+            yield from store
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ClauseChain index out of range")
+        i = bisect_right(self.starts, index) - 1
+        return self.stores[i][index - self.starts[i]]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the arrays of every store, in bytes."""
+        return sum(store.nbytes for store in self.stores)
@@ -1,7 +1,9 @@
-from nnf import NNF, And, Or
-from itertools import product, combinations
-from .utils import ismethod, classname, flatten
-from .utils import unpack_variables as unpack
+from nnf import And, Or, Var
+from itertools import product
+from .utils import ismethod, flatten, groupby_key, partition
+from .utils import unpack_variables as unpack, Resolver
+from . import cardinality, pseudo_boolean
+from .variables import VariableTable
 import warnings
 from collections import defaultdict
 
@@ -18,9 +20,16 @@ class _ConstraintBuilder:
     - at least one
     - at most one
     - at most k
+    - at least k
+    - exactly k
+    - between lo and hi
+    - weighted at most
     - implies all
     - exactly one
 
+    The cardinality constraints support several encodings selected
+    with the encoding_type attribute.
+
     """
 
     def __init__(self,
@@ -30,7 +39,10 @@ class _ConstraintBuilder:
                  k=None,
                  left=None,
                  right=None,
-                 groupby=None):
+                 groupby=None,
+                 encoding_type=None,
+                 weights=None,
+                 pairs=None):
         """
         Attributes
         ----------
@@ -41,19 +53,33 @@ class _ConstraintBuilder:
             User-given arguments from a function invocation.
         func : function
             Decorated class or bound method. Default = None.
-        k : int
-            Integer for constraint "At most K". Default = None.
+        k : int or tuple
+            Integer for constraints "At most K", "At least K" and
+            "Exactly K", the (lo, hi) tuple for "Between" or the
+            bound for "Weighted at most". Default = None.
         left : tuple
             Used for constraint "implies all". Default = None.
             User-given arguments for the left side.
         right : tuple
             Used for constraint "implies all". Default = None.
             User-given arguments for the right side.
-        groupby : str or func
+        groupby : str, tuple of str or func
             Used to partition instances of a class for the application of the constraint
+        encoding_type : str
+            Name of the CNF encoding used for the constraint, see
+            bauhaus/cardinality.py. Default = None, an encoding
+            without auxiliary variables.
+        weights : str, func or tuple
+            Used for constraint "Weighted at most". Default = None.
+            An attribute name or function giving the weight of each
+            instance of a decorated class, or (argument, weight) pairs.
+        pairs : bauhaus.pairs.Pairs
+            Used for constraints "At most one" and "Implies all" over
+            each (left, right) pair separately. Default = None.
         instance_constraints : defaultdict(list)
             Stores per-instance constraints to be viewed by the
-            user for debugging purposes.
+            user for debugging purposes, filled on demand by
+            Encoding.instance_constraints.
 
         """
         self._constraint = constraint
@@ -63,6 +89,9 @@ class _ConstraintBuilder:
         self._left = left
         self._right = right
         self._groupby = groupby
+        self._encoding_type = encoding_type
+        self._weights = weights
+        self._pairs = pairs
         self.instance_constraints = defaultdict(list)
 
     def __hash__(self):
@@ -72,7 +101,10 @@ class _ConstraintBuilder:
                      self._k,
                      self._left,
                      self._right,
-                     self._groupby))
+                     self._groupby,
+                     self._encoding_type,
+                     self._weights,
+                     self._pairs))
 
     def __eq__(self, other) -> bool:
         if isinstance(other, _ConstraintBuilder):
@@ -82,7 +114,12 @@ class _ConstraintBuilder:
     def __repr__(self) -> str:
         k = f"k = {self._k}"
         variables = f" variables = {self._vars}"
+        if self._pairs is not None:
+            variables = f" pairs = {len(self._pairs)}"
         constraint_type = f"constraint.{self._constraint.__name__}:"
+        if self._encoding_type:
+            constraint_type = (f"constraint.{self._constraint.__name__}"
+                               f"[{self._encoding_type}]:")
         left = f" left implication = {self._left}"
         right = f" right implication = {self._right}"
 
@@ -105,33 +142,83 @@ class _ConstraintBuilder:
         else:
             if self._k:
                 return (f"{constraint_type}  {groupby}  {k}  {variables}")
-            if self._constraint is _ConstraintBuilder.implies_all:
+            if (self._constraint is _ConstraintBuilder.implies_all
+                    and self._pairs is None):
                 return (f"{constraint_type}  {groupby}  {left}  {right}")
             return (f"{constraint_type}  {groupby}  {variables}")
 
-    def partition(self, inputs):
+    def partition(self, inputs, resolver=None):
         """ Helper function to partition propositional variables by an
-            attribute or function.
+            attribute, a tuple of attributes or a function.
+
+            The inputs of a decorated class are grouped once per
+            compile for all the constraints with the same groupby,
+            see bauhaus.utils.Resolver.groups.
         """
         if not self._groupby:
             return [inputs]
-        elif isinstance(self._groupby, str):
-            partitions = {}
-            for var in inputs:
-                val = getattr(var.name, self._groupby)
-                if val not in partitions:
-                    partitions[val] = []
-                partitions[val].append(var)
-            return partitions.values()
-        else:
+        if (resolver is not None and self._func is not None
+                and not isinstance(inputs, dict)):
+            name, method = resolver.resolve(self._func)
+            if name is not None and not method:
+                return resolver.groups(name, self._groupby, inputs)
+        key = groupby_key(self._groupby)
+        if key is None:
             return self._groupby(inputs)
+        return partition(inputs, key)
 
     def build(self, propositions) -> 'NNF':
         """Builds a SAT constraint from a ConstraintBuilder instance.
 
+        The constraint is built as integer clauses by build_clauses
+        and then translated to NNF.
+
+        Arguments
+        ---------
+        propositions : defaultdict(weakref.WeakValueDictionary)
+            Stores instances in the form [classname] -> [instance_id: object]
+
+        Returns
+        -------
+        constraint : nnf.NNF
+            A built NNF constraint
+
+        """
+        table = VariableTable()
+        return And(self.translate(self.build_clauses(propositions, table), table))
+
+    def build_clauses(self, propositions, table) -> list:
+        """Builds the clauses of a SAT constraint from a ConstraintBuilder
+        instance, without creating any NNF objects.
+
+        Arguments
+        ---------
+        propositions : defaultdict(weakref.WeakValueDictionary)
+            Stores instances in the form [classname] -> [instance_id: object]
+        table : bauhaus.variables.VariableTable
+            Numbers the variables of the clauses.
+
+        Returns
+        -------
+        clauses : list[list[int]]
+            Clauses over the integer literals of table.
+
+        """
+        return [clause
+                for clauses, _, _ in self.build_parts(propositions, table).values()
+                for clause in clauses]
+
+    def build_parts(self, propositions, table, previous=None, select=None,
+                    resolver=None) -> dict:
+        """Builds the clauses of a SAT constraint from a ConstraintBuilder
+        instance for each group of its inputs.
+
         To handle a user using the groupby feature, the partition helper
         function is used to partition a constraint's inputs.
         We then apply the SAT constraint over each partitioned set of inputs.
+        A group with the same inputs and bounds as one in previous reuses
+        its clauses, so only the groups that changed since a previous
+        build are encoded again.
 
         Note
         ----
@@ -156,21 +243,77 @@ class _ConstraintBuilder:
         ---------
         propositions : defaultdict(weakref.WeakValueDictionary)
             Stores instances in the form [classname] -> [instance_id: object]
+        table : bauhaus.variables.VariableTable
+            Numbers the variables of the clauses.
+        previous : dict
+            Optional; the result of an earlier build_parts with the
+            same table.
+        select : function
+            Optional; called with the key of each group and the
+            number of clauses predicted for it, or None if it is
+            reused or not predicted. Only the groups it returns True
+            for are built, so that the groups can be built separately.
+        resolver : bauhaus.utils.Resolver
+            Optional; shares the instances of classes and the results
+            of methods with the other constraints built by a compile.
 
         Returns
         -------
-        constraint : nnf.NNF
-            A built NNF constraint
+        parts : dict
+            Maps a key of each group to its part, see build_group.
+
+        """
+        if previous is None:
+            previous = dict()
+        parts = dict()
+        for key, (args, kwargs) in self.groups(propositions, table, resolver).items():
+            if select is not None:
+                predicted = None if key in previous else self._predict(args)
+                if not select(key, predicted):
+                    continue
+            if key in previous:
+                parts[key] = previous[key]
+            else:
+                parts[key] = self.build_group(table, args, kwargs)
+        return parts
+
+    def groups(self, propositions, table, resolver=None) -> dict:
+        """Gathers and groups the inputs of the constraint as
+        build_parts does, without encoding them.
+
+        Every input is numbered in table by the key of its group, so
+        the groups can be encoded elsewhere with a copy of table.
+
+        Arguments
+        ---------
+        propositions : defaultdict(weakref.WeakValueDictionary)
+        table : bauhaus.variables.VariableTable
+        resolver : bauhaus.utils.Resolver
+            Optional; see build_parts.
+
+        Returns
+        -------
+        groups : dict
+            Maps the key of each group to the (args, kwargs) that
+            build_group encodes it with.
 
         """
+        if resolver is None:
+            resolver = Resolver(propositions)
+        groups = dict()
+
+        if self._pairs is not None:
+            groups[("pairs",)] = ((self._pairs,), {})
+            return groups
+
         if self._constraint is _ConstraintBuilder.implies_all:
-            left_vars = unpack(self._left, propositions) if self._left else []
-            right_vars = unpack(self._right, propositions) if self._right else []
+            left_vars = unpack(self._left, propositions, resolver) if self._left else []
+            right_vars = unpack(self._right, propositions, resolver) if self._right else []
             if not self._func:
                 inputs = []
             else:
                 # retrieve dictionary of inputs
-                inputs = self.get_implication_inputs(propositions)
+                inputs = self.get_implication_inputs(propositions, resolver)
                 if not any(inputs.values()) and not right_vars:
                     raise ValueError(f"The '{self}' cannot be built"
                                      " as it is decorating a class and"
@@ -181,29 +324,203 @@ class _ConstraintBuilder:
                                      " Check your decorator signature and set"
                                      " the 'right' keyword argument to such a value.")
 
-            constraints = []
-            for input_set in self.partition(inputs):
-                constraints.append(self._constraint(self,
-                                                    input_set,
-                                                    left_vars,
-                                                    right_vars))
-            return And(constraints)
-
-        inputs = self.get_inputs(propositions)
+            right_key = self._key(right_vars, table)
+            left_key = self._key(left_vars, table)
+            for input_set in self.partition(inputs, resolver):
+                key = (self._key(input_set, table), left_key, right_key)
+                groups.setdefault(key, ((input_set, left_vars, right_vars), {}))
+            return groups
+
+        if self._constraint is _ConstraintBuilder.weighted_at_most:
+            weights = self.get_weights(propositions, resolver)
+            for input_set in self.partition(list(weights), resolver):
+                key = (frozenset((table.literal(var), weights[var])
+                                 for var in input_set), self._k)
+                groups.setdefault(key, ((input_set, [weights[var] for var in input_set]),
+                                        {"bound": self._k}))
+            return groups
+
+        inputs = self.get_inputs(propositions, resolver)
         if not inputs:
             raise ValueError(inputs)
 
-        constraints = []
-        for input_set in self.partition(inputs):
-            if self._constraint is _ConstraintBuilder.at_most_k:
-                constraints.append(self._constraint(self,
-                                                    input_set,
-                                                    k=self._k))
+        for input_set in self.partition(inputs, resolver):
+            key = (self._key(input_set, table), self._k)
+            if self._constraint in (_ConstraintBuilder.at_most_k,
+                                    _ConstraintBuilder.at_least_k,
+                                    _ConstraintBuilder.exactly_k):
+                kwargs = {"k": self._k}
+            elif self._constraint is _ConstraintBuilder.between:
+                lo, hi = self._k
+                kwargs = {"lo": lo, "hi": hi}
+            else:
+                kwargs = {}
+            groups.setdefault(key, ((input_set,), kwargs))
+        return groups
+
+    def build_group(self, table, args, kwargs) -> tuple:
+        """Encodes one group given by groups.
+
+        Returns
+        -------
+        (clauses, allocated, outputs) : tuple
+            The clauses of the group over the integer literals of
+            table, the auxiliary variables they use, and for a
+            counter the literals of its outputs, else None.
+
+        """
+        outputs = None
+        allocated = table.allocated = []
+        try:
+            if self._pairs is not None:
+                clauses = self.pairwise(*args, table, **kwargs)
+            elif self._constraint is _ConstraintBuilder.counter:
+                clauses, outputs = self.counter(*args, table=table, **kwargs)
             else:
-                constraints.append(self._constraint(self, input_set))
-        return And(constraints)
+                clauses = self._constraint(self, *args, table=table, **kwargs)
+        finally:
+            table.allocated = None
+        return clauses, allocated, outputs
+
+    @staticmethod
+    def _key(inputs, table):
+        """Hashable key of a group of inputs, independent of their order."""
+        if isinstance(inputs, dict):
+            return frozenset((table.literal(var), _ConstraintBuilder._key(value, table))
+                             for var, value in inputs.items())
+        return frozenset(map(table.literal, inputs))
+
+    def estimate(self, propositions, resolver=None) -> dict:
+        """Predicts the size of the clauses of build_parts without
+        building them.
+
+        The inputs are gathered and grouped as by build_parts, and
+        the size of each group is computed from the number of its
+        inputs, see bauhaus.cardinality.size. The size of a
+        weighted at most constraint depends on its weights and is
+        not predicted.
+
+        Arguments
+        ---------
+        propositions : defaultdict(weakref.WeakValueDictionary)
+        resolver : bauhaus.utils.Resolver
+            Optional; see build_parts.
+
+        Returns
+        -------
+        estimate : dict
+            "clauses" and "auxiliary", the numbers of clauses and of
+            auxiliary variables, or None when not predicted, and
+            "partitions", the number of inputs of each group.
+
+        """
+        if resolver is None:
+            resolver = Resolver(propositions)
+        estimate = {"clauses": 0, "auxiliary": 0, "partitions": []}
+
+        if self._pairs is not None:
+            estimate["clauses"] = len(self._pairs)
+            return estimate
+
+        if self._constraint is _ConstraintBuilder.implies_all:
+            left = len(unpack(self._left, propositions, resolver)) if self._left else 0
+            right = len(unpack(self._right, propositions, resolver)) if self._right else 0
+            if not self._func:
+                # a single group without inputs, as in build_parts
+                estimate["partitions"].append(0)
+                estimate["clauses"] = left * right
+                return estimate
+            inputs = self.get_implication_inputs(propositions, resolver)
+            for input_set in self.partition(inputs, resolver):
+                if not isinstance(input_set, dict):
+                    input_set = dict.fromkeys(input_set, ())
+                estimate["partitions"].append(len(input_set))
+                estimate["clauses"] += sum((left + 1) * (right + len(value))
+                                           for value in input_set.values())
+            return estimate
+
+        if self._constraint is _ConstraintBuilder.weighted_at_most:
+            weights = self.get_weights(propositions, resolver)
+            estimate["partitions"] = [len(input_set) for input_set
+                                      in self.partition(list(weights), resolver)]
+            estimate["clauses"] = estimate["auxiliary"] = None
+            return estimate
+
+        for input_set in self.partition(self.get_inputs(propositions, resolver),
+                                        resolver):
+            estimate["partitions"].append(len(input_set))
+            clauses, auxiliary = self._estimate_group(len(input_set))
+            estimate["clauses"] += clauses
+            estimate["auxiliary"] += auxiliary
+        return estimate
+
+    def _predict(self, args):
+        """Number of clauses of a group given by groups, or None when
+        it is not predicted, as in estimate."""
+        if (self._pairs is not None
+                or self._constraint in (_ConstraintBuilder.implies_all,
+                                        _ConstraintBuilder.weighted_at_most)):
+            return None
+        return self._estimate_group(len(args[0]))[0]
+
+    def _estimate_group(self, n) -> tuple:
+        """(clauses, auxiliary) of the constraint over n inputs."""
+        constraint = self._constraint
+        if constraint is _ConstraintBuilder.at_least_one:
+            return 1, 0
+        if constraint is _ConstraintBuilder.none_of:
+            return n, 0
+        if constraint is _ConstraintBuilder.at_most_one:
+            return cardinality.at_most_one_size(n, self._encoding_type)
+        if constraint is _ConstraintBuilder.exactly_one:
+            clauses, auxiliary = cardinality.at_most_one_size(n, self._encoding_type)
+            return clauses + 1, auxiliary
+        if constraint is _ConstraintBuilder.counter:
+            return cardinality.counter_size(n)
+        if constraint is _ConstraintBuilder.at_most_k:
+            lo, hi = 0, min(self._k, n - 1)
+        elif constraint is _ConstraintBuilder.at_least_k:
+            lo, hi = self._k, n
+        elif constraint is _ConstraintBuilder.exactly_k:
+            lo, hi = self._k, self._k
+        else:
+            lo, hi = self._k
+        return cardinality.size(n, lo, hi, self._encoding_type)
+
+    def dependencies(self) -> set:
+        """Returns the names of the proposition classes whose instances
+        the constraint is built from, or None if it may depend on any.
+
+        Constraints over methods depend on any class, since a method
+        can return instances of other classes.
+        """
+        values = [self._func] if self._func else []
+        values.extend(flatten([self._vars, self._left, self._right]))
+        if isinstance(self._weights, tuple):
+            values.extend(flatten([arg for arg, _ in self._weights]))
+        names = set()
+        for value in values:
+            if hasattr(value, '__qualname__'):
+                try:
+                    if ismethod(value):
+                        return None
+                except (TypeError, ValueError):
+                    return None
+                names.add(value.__qualname__)
+        return names
+
+    def volatile(self) -> bool:
+        """Whether the constraint depends on more than which instances
+        of its classes exist: on the attributes or functions of a
+        groupby, on weights read from instances, or on the values
+        returned by decorated methods. These can change without
+        creating or deleting instances.
+        """
+        return (bool(self._groupby)
+                or isinstance(self._weights, str) or callable(self._weights)
+                or self.dependencies() is None)
 
-    def get_inputs(self, propositions) -> list:
+    def get_inputs(self, propositions, resolver=None) -> list:
         """Returns a list of inputs to be used for building the constraint.
 
         If the ConstraintBuilder was created for a decorated class or method,
@@ -218,6 +535,8 @@ class _ConstraintBuilder:
         ---------
         propositions : defaultdict(weakref.WeakValueDictionary)
         self : ConstraintBuilder
+        resolver : bauhaus.utils.Resolver
+            Optional; see build_parts.
 
         Returns
         -------
@@ -227,15 +546,53 @@ class _ConstraintBuilder:
 
         # Constraint from function
         if not self._func:
-            return unpack(self._vars, propositions)
+            return unpack(self._vars, propositions, resolver)
         # Constraint from decorator
         else:
-            ret = unpack([self._func], propositions)
+            ret = unpack([self._func], propositions, resolver)
             if not ret:
                 raise ValueError(f"The {self} resulted in an empty {ret}")
             return ret
 
-    def get_implication_inputs(self, propositions) -> dict:
+    def get_weights(self, propositions, resolver=None) -> dict:
+        """ Returns a dictionary of weights for a weighted constraint.
+
+        For a decorated class, the weight of each instance is read
+        from the attribute or function in self._weights. Otherwise
+        self._weights holds (argument, weight) pairs, where each
+        argument is unpacked and its variables given the weight.
+        Weights of a variable given more than once are summed.
+
+        Arguments
+        ---------
+        self : _ConstraintBuilder object
+        propositions : defaultdict(WeakValueDictionary)
+        resolver : bauhaus.utils.Resolver
+            Optional; see build_parts.
+
+        Returns
+        -------
+        weights : dict
+            key: nnf.Var, value: int
+
+        """
+        weights = defaultdict(int)
+        if self._func:
+            if isinstance(self._weights, str):
+                weight = lambda obj: getattr(obj, self._weights)
+            else:
+                weight = self._weights
+            for var in self.get_inputs(propositions, resolver):
+                weights[var] += weight(var.name)
+        else:
+            for arg, w in self._weights:
+                for var in unpack([arg], propositions, resolver):
+                    weights[var] += w
+        if not weights:
+            raise ValueError(f"The {self} resulted in no weighted variables.")
+        return weights
+
+    def get_implication_inputs(self, propositions, resolver=None) -> dict:
         """ Returns a dictionary of values for an implication
         created with a decorator over a class or method.
 
@@ -243,6 +600,8 @@ class _ConstraintBuilder:
         ---------
         self : _ConstraintBuilder object
         propositions : defaultdict(WeakValueDictionary)
+        resolver : bauhaus.utils.Resolver
+            Optional; see build_parts.
 
         Returns
         -------
@@ -250,26 +609,16 @@ class _ConstraintBuilder:
             key: left, value: right
 
         """
-        inputs = dict()
-
-        if hasattr(self._func, '__qualname__'):
-            if self._func.__qualname__ in propositions:
-                cls = self._func.__qualname__
-                for instance_id in propositions[cls]:
-                    obj = propositions[cls][instance_id]
-                    inputs[obj._var] = []
-
-            elif classname(self._func) in propositions:
-                cls = classname(self._func)
-                for instance_id in propositions[cls]:
-                    obj = propositions[cls][instance_id]
-                    # return value of method applied to instance
-                    ret = list(flatten([self._func(obj)]))
-                    # validate values in ret
-                    res = unpack(ret, propositions)
-                    inputs[obj._var] = res
-
-        return inputs
+        if resolver is None:
+            resolver = Resolver(propositions)
+        name, method = resolver.resolve(self._func)
+        if name is None:
+            return dict()
+        if not method:
+            return {obj._var: [] for obj in resolver.instances(name)}
+        # values returned by the method for each instance
+        return {obj._var: list(variables)
+                for obj, variables in resolver.results(self._func)}
 
     def add_to_instance_constraints(self, instance, constraint):
         """Maps instances to their constraints for introspection
@@ -300,15 +649,56 @@ class _ConstraintBuilder:
         except Exception as e:
             raise(e)
 
+    def translate(self, clauses: list, table) -> list:
+        """Translates integer clauses into NNF.
+
+        Introspection is recorded separately, by the Encoding, see
+        Encoding.instance_constraints.
+
+        Arguments
+        ---------
+        clauses : list[list[int]]
+        table : bauhaus.variables.VariableTable
+            Numbers the variables of the clauses.
+
+        Returns
+        -------
+        clauses : list[nnf.Or]
+
+        """
+        return [Or(map(table.var, lits)) for lits in clauses]
+
+    def _encode(self, encoder, inputs: list, table, *args) -> list:
+        """Runs an integer encoder from bauhaus/cardinality.py over
+        the inputs.
+
+        Arguments
+        ---------
+        encoder : function
+            Accepts (literals, new_var, *args) and returns clauses.
+        inputs : list[nnf.Var]
+        table : bauhaus.variables.VariableTable
+            Numbers the inputs and allocates auxiliary variables.
+
+        Returns
+        -------
+        clauses : list[list[int]]
+
+        """
+        lits = [table.literal(var) for var in inputs]
+        return encoder(lits, table.new_var, *args)
+
     """ Constraint methods
 
-    Implementations of Naive SAT encodings.
+    Implementations of SAT encodings. Every method returns clauses
+    over the integer literals of a VariableTable; cardinality
+    constraints are encoded in bauhaus/cardinality.py.
 
     Reference:
 
     """
 
-    def at_least_one(self, inputs: list) -> NNF:
+    def at_least_one(self, inputs: list, table) -> list:
         """At least one of the inputs are true.
 
         This is equivalent to a disjunction across all variables
@@ -316,54 +706,62 @@ class _ConstraintBuilder:
         Arguments
         ---------
         inputs : list[nnf.Var]
+        table : VariableTable
 
         Returns
         -------
-        nnf.NNF: Or(inputs)
-            Disjunction across all variables.
+        clauses : list[list[int]]
+            A single clause, the disjunction across all variables.
 
         """
         if not inputs:
             raise ValueError(f"Inputs are empty for {self}")
 
-        return Or(inputs)
+        return [[table.literal(var) for var in inputs]]
 
-    def at_most_one(self, inputs: list) -> NNF:
+    def at_most_one(self, inputs: list, table) -> list:
         """At most one of the inputs are true.
 
+        The clauses come from the encoding selected by the builder's
+        encoding_type, see bauhaus/cardinality.py.
+
         Arguments
         ---------
         inputs : list[nnf.Var]
+        table : VariableTable
 
         Returns
         -------
-        theory : nnf.NNF
-            And(Or(~a, ~b)) for all a,b in input
+        clauses : list[list[int]]
+            With the pairwise encoding, [-a, -b] for all
+            pairs a,b in input.
 
         """
         if not inputs:
             raise ValueError(f"Inputs are empty for {self}")
 
-        clauses = []
-        for var in inputs:
-            # negate variables that aren't the current var
-            excludes_var = [~x for x in inputs if x != var]
-            clause = list(map(lambda c: Or(c), product([~var], excludes_var)))
-            clauses.extend(clause)
-            self.add_to_instance_constraints(str(var), clause)
-        return And(clauses)
-
-    def at_most_k(self, inputs: list, k: int) -> NNF:
+        return self._encode(cardinality.at_most_one,
+                            inputs,
+                            table,
+                            self._encoding_type)
+
+    def at_most_k(self, inputs: list, k: int, table) -> list:
         """ At most k variables can be true.
 
+        The clauses come from the encoding selected by the builder's
+        encoding_type, see bauhaus/cardinality.py. The totalizer,
+        modulo totalizer, sorting network and sequential counter
+        encodings are polynomial in the number of inputs and k.
+
         Arguments
         ---------
         inputs : list[nnf.Var]
+        table : VariableTable
         k : int
 
         Returns
         -------
-        nnf.NNF
+        clauses : list[list[int]]
 
         """
         if not 1 <= k <= len(inputs):
@@ -371,8 +769,6 @@ class _ConstraintBuilder:
                              " than the number of propositional"
                             f" variables (i.e. {len(inputs)} variables)"
                             f" for {self}.")
-        elif k == 1:
-            return _ConstraintBuilder.at_most_one(inputs)
         if k >= len(inputs):
             warnings.warn(f"The provided k={k} for building the at most K"
                            " constraint is greater than or equal to"
@@ -380,40 +776,153 @@ class _ConstraintBuilder:
                           f" We're setting k = {len(inputs) - 1} as a result.")
             k = len(inputs) - 1
 
-        clauses = set() # avoid adding duplicate clauses
-        inputs = list(map(lambda var: ~var, inputs))
-        # combinations from choosing k from n inputs for 1 <= k <n
-        chosen = list(combinations(inputs, k))
-        for combo in chosen:
-            combo = list(combo)
-            excludes_combo = [x for x in inputs if x not in combo]
-            for x in excludes_combo:
-                clause = Or(combo + [x])
-                clauses.add(clause)
-                self.add_to_instance_constraints(tuple(combo), clause)
-        return And(clauses)
-
-    def exactly_one(self, inputs: list) -> NNF:
+        return self._encode(cardinality.at_most_k,
+                            inputs,
+                            table,
+                            k,
+                            self._encoding_type)
+
+    def counter(self, inputs: list, table) -> tuple:
+        """ Counts the true inputs, for the bound of an IncrementalBound.
+
+        The clauses of cardinality.counter, which bound nothing by
+        themselves; the bound is a unit clause on the outputs of the
+        counter added by the Encoding, so that it can change without
+        building the counter again.
+
+        Arguments
+        ---------
+        inputs : list[nnf.Var]
+        table : VariableTable
+
+        Returns
+        -------
+        (clauses, outputs) : tuple
+            As returned by cardinality.counter.
+
+        """
+        if not inputs:
+            raise ValueError(f"Inputs are empty for {self}")
+        return self._encode(cardinality.counter, inputs, table)
+
+    def at_least_k(self, inputs: list, k: int, table) -> list:
+        """ At least k variables must be true.
+
+        Arguments
+        ---------
+        inputs : list[nnf.Var]
+        table : VariableTable
+        k : int
+
+        Returns
+        -------
+        clauses : list[list[int]]
+
+        """
+        return self.between(inputs, k, len(inputs), table)
+
+    def exactly_k(self, inputs: list, k: int, table) -> list:
+        """ Exactly k variables must be true.
+
+        Arguments
+        ---------
+        inputs : list[nnf.Var]
+        table : VariableTable
+        k : int
+
+        Returns
+        -------
+        clauses : list[list[int]]
+
+        """
+        return self.between(inputs, k, k, table)
+
+    def between(self, inputs: list, lo: int, hi: int, table) -> list:
+        """ Between lo and hi (inclusive) variables must be true.
+
+        Both bounds are placed on the outputs of one counter over
+        the inputs, so they share its auxiliary variables.
+
+        Arguments
+        ---------
+        inputs : list[nnf.Var]
+        table : VariableTable
+        lo : int
+        hi : int
+
+        Returns
+        -------
+        clauses : list[list[int]]
+
+        """
+        if not inputs:
+            raise ValueError(f"Inputs are empty for {self}")
+        if lo > len(inputs):
+            raise ValueError(f"The provided lower bound {lo} is greater"
+                             " than the number of propositional"
+                            f" variables (i.e. {len(inputs)} variables)"
+                            f" for {self}.")
+
+        return self._encode(cardinality.between,
+                            inputs,
+                            table,
+                            lo,
+                            hi,
+                            self._encoding_type)
+
+    def weighted_at_most(self, inputs: list, weights: list, bound: int, table) -> list:
+        """ The weights of the true variables sum to at most bound.
+
+        The clauses come from the encoding selected by the builder's
+        encoding_type, see bauhaus/pseudo_boolean.py.
+
+        Arguments
+        ---------
+        inputs : list[nnf.Var]
+        table : VariableTable
+        weights : list[int]
+            Weight of each input.
+        bound : int
+
+        Returns
+        -------
+        clauses : list[list[int]]
+
+        """
+        if not inputs:
+            raise ValueError(f"Inputs are empty for {self}")
+
+        return self._encode(pseudo_boolean.weighted_at_most,
+                            inputs,
+                            table,
+                            weights,
+                            bound,
+                            self._encoding_type)
+
+    def exactly_one(self, inputs: list, table) -> list:
         """
         Exactly one variable can be true of the input
 
         Arguments
         ---------
         inputs : list[nnf.Var]
+        table : VariableTable
 
         Returns
         -------
-        nnf.NNF: And(at_most_one, at_least_one)
+        clauses : list[list[int]]
+            The clauses of at_most_one and at_least_one.
 
         """
-        at_most_one = _ConstraintBuilder.at_most_one(self, inputs)
-        at_least_one = _ConstraintBuilder.at_least_one(self, inputs)
+        if not inputs:
+            raise ValueError(f"Inputs are empty for {self}")
 
-        if not(at_most_one and at_least_one):
-            raise ValueError
-        return And({at_most_one, at_least_one})
+        return self._encode(cardinality.exactly_one,
+                            inputs,
+                            table,
+                            self._encoding_type)
 
-    def implies_all(self, inputs: dict, left: list, right: list) -> NNF:
+    def implies_all(self, inputs: dict, left: list, right: list, table) -> list:
         """All left variables imply all right variables.
 
         Arguments
@@ -421,50 +930,76 @@ class _ConstraintBuilder:
         inputs: dict
         left : list[nnf.Var]
         right: list[nnf.Var]
+        table : VariableTable
 
         Returns
         -------
-        nnf.NNF: And(Or(~left_i, right_j))
+        clauses : list[list[int]]
+            [-left_i, right_j] for all pairs left_i, right_j.
 
         """
         clauses = []
+        left = [table.literal(var) for var in left]
+        right = [table.literal(var) for var in right]
 
         # constraint created by function
         if not inputs:
             if left and right:
-                left_vars = list(map(lambda var: ~var, left))
-                clauses = list(map(lambda clause: Or(clause),
-                               product(left_vars, right)))
-                return And(clauses)
+                return [[-l, r] for l, r in product(left, right)]
 
         assert isinstance(inputs, dict)
 
         # constraint from decorator
         for key, value in inputs.items():
-            left_vars = left + [key]
-            right_vars = right + value
-            negated_left = list(map(lambda var: ~var, left_vars))
-            res = list(map(lambda clause: Or(clause),
-                            product(negated_left, right_vars)))
-            clauses.extend(res)
-            self.add_to_instance_constraints(tuple(left_vars), res)
-        return And(clauses)
+            left_vars = left + [table.literal(key)]
+            right_vars = right + [table.literal(var) for var in value]
+            clauses.extend([-l, r] for l, r in product(left_vars, right_vars))
+        return clauses
+
+
+    def pairwise(self, pairs, table) -> list:
+        """At most one of each pair is true, or the left of each pair
+        implies its right, as given by the constraint.
+
+        Arguments
+        ---------
+        pairs : bauhaus.pairs.Pairs
+            Pairs of propositions, nnf.Var or names of variables.
+        table : VariableTable
+
+        Returns
+        -------
+        clauses : list[list[int]]
+            [-left, -right] for at most one and [-left, right] for
+            implies all, for each pair.
+
+        """
+        sign = -1 if self._constraint is _ConstraintBuilder.at_most_one else 1
+
+        def literal(value):
+            if hasattr(value, '_var'):
+                return table.literal(value._var)
+            if isinstance(value, Var):
+                return table.literal(value)
+            return table.literal(Var(value))
 
+        return [[-literal(left), sign * literal(right)] for left, right in pairs]
 
-    def none_of(self, inputs: list) -> NNF:
+    def none_of(self, inputs: list, table) -> list:
         """None of the inputs are true.
 
         Arguments
         ---------
         inputs : list[nnf.Var]
+        table : VariableTable
 
         Returns
         -------
-        theory : nnf.NNF
-            And(~a, ~b) for all a,b in input
+        clauses : list[list[int]]
+            [-a] for all a in input
 
         """
         if not inputs:
             raise ValueError(f"Inputs are empty for {self}")
 
-        return Or(inputs).negate()
+        return [[-table.literal(var)] for var in inputs]
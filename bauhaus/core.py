@@ -1,5 +1,10 @@
 from typing import Optional
+import gc
+import os
+import sys
+import time
 import weakref
+from array import array
 from collections.abc import Iterable
 
 # add try import
@@ -8,7 +13,14 @@ from functools import wraps
 from collections import defaultdict
 import warnings
 from .constraint_builder import _ConstraintBuilder as cbuilder
-from .utils import flatten, ismethod, classname
+from .utils import flatten, ismethod, classname, find_global, Resolver
+from .utils import groupby_key, unpack_variables
+from .variables import VariableTable
+from .clause_store import ClauseChain, ClauseStore
+from .pairs import Pairs
+from . import cardinality, pseudo_boolean, tseitin as _tseitin
+from . import dimacs as _dimacs, parallel as _parallel, solver as _solver
+from . import maxsat as _maxsat, profiling as _profiling, budget as _budget
 
 
 class Encoding:
@@ -28,11 +40,17 @@ class Encoding:
 
     """
 
-    def __init__(self):
+    def __init__(self, provenance=False):
         """
         Creates an Encoding object. This will store propositions
         and constraints that you can compile into a theory.
 
+        Arguments
+        ---------
+        provenance : bool
+            Default is False. If True, compile records where each
+            clause of the theory came from, for introspect.
+
         Attributes
         ----------
         propositions : defaultdict(weakref.WeakValueDictionary)
@@ -47,15 +65,46 @@ class Encoding:
             They are added to the Encoding object whenever the
             constraint decorator is used or when it is called
             as a function.
+        soft_constraints : dict
+            Maps _ConstraintBuilder objects, custom constraints and
+            the nnf.Var of propositions to the weight paid when they
+            are violated, see add_soft.
+            They are left out of compile and used by optimize.
         debug_constraints : dictionary
             Maps ConstraintBuilder objects to their compiled
-            constraints for debugging purposes.
+            constraints for debugging purposes. Filled by compile
+            when provenance is True.
+        provenance : bool
+            Whether compile records provenance for introspect.
+        last_compile_stats : dict
+            Statistics of each constraint of the last compile with
+            stats=True, see bauhaus/profiling.py. None before.
+        on_builder_start : function
+            Optional; called with each _ConstraintBuilder before it
+            is built.
+        on_builder_finish : function
+            Optional; called with each _ConstraintBuilder and its
+            statistics once built.
+        variables : VariableTable
+            Numbers the variables of the theory, see
+            bauhaus/variables.py. Propositions are numbered when
+            they are created and constraints are built as
+            clauses over these integer literals.
 
         """
         self.propositions = defaultdict(weakref.WeakValueDictionary)
         self.constraints = set()
+        self.soft_constraints = dict()
         self.debug_constraints = dict()
+        self.provenance = provenance
+        self.last_compile_stats = None
+        self.on_builder_start = None
+        self.on_builder_finish = None
+        self.variables = VariableTable()
         self._custom_constraints = set()
+        # creations per class and constraints built by compile
+        self._versions = defaultdict(int)
+        self._clear_builds()
 
     def __repr__(self) -> str:
         return (
@@ -65,12 +114,72 @@ class Encoding:
         )
 
     def purge_propositions(self):
-        """Purges the propositional variables of an Encoding object"""
+        """Purges the propositional variables of an Encoding object,
+        along with their numbering."""
         self.propositions = defaultdict(weakref.WeakValueDictionary)
+        self.variables = VariableTable()
+        self._clear_builds()
+
+    def refresh_propositions(self, *objects):
+        """Recomputes the cached names and hashes of propositions.
+
+        Call this after changing an attribute that the _prop_name
+        of a proposition depends on, since names are computed when
+        propositions are created. A refreshed proposition keeps its variable number unless
+        its new name equals that of another proposition, whose
+        number it then shares.
+
+        Arguments
+        ---------
+        *objects : instances of decorated classes
+            Propositions to refresh. Default = every proposition
+            of the encoding.
+
+        """
+        if not objects:
+            objects = [obj for instances in self.propositions.values()
+                       for obj in instances.values()]
+        for obj in objects:
+            self.variables.rename(obj, lambda: _cache_name(obj))
+        self._clear_builds()
+
+    def create_many(self, cls, arguments) -> "Propositions":
+        """Creates many propositions of a decorated class at once.
+
+        The instances are registered together and new, distinct
+        propositions get contiguous variable numbers. Equivalent
+        to ``cls.bulk(arguments)``.
+
+        Arguments
+        ---------
+        cls : function
+            A class decorated with ``@proposition(self)``.
+        arguments : iterable
+            Constructor arguments of each instance. Tuples are
+            unpacked as positional arguments, any other value is
+            passed as the only argument.
+
+        Returns
+        -------
+        propositions : Propositions
+            Tuple of the new instances, with their variable numbers
+            in its ids attribute.
+
+        Examples
+        --------
+
+        ``e.create_many(Cell, product(rows, cols, values))``
+
+        """
+        if getattr(cls, "_encoding", None) is not self:
+            raise ValueError(f"{cls} is not decorated with"
+                             f" @proposition for {self}.")
+        return cls.bulk(arguments)
 
     def clear_constraints(self):
         """Clears the constraints of an Encoding object"""
         self.constraints = set()
+        self.soft_constraints = dict()
 
     def clear_debug_constraints(self):
         """Clear debug_constraints attribute in Encoding"""
@@ -89,11 +198,55 @@ class Encoding:
         ), "Error: You can't add custom_constraints when objects have overloaded one of the boolean operators."
         self._custom_constraints.add(constraint)
 
+    def add_soft(self, constraint, weight: int):
+        """Add a soft constraint to the encoding.
+
+        A soft constraint may be violated at the cost of its weight.
+        compile and solver leave it out of the theory, and optimize
+        finds a solution minimizing the weight of the soft
+        constraints it violates. Adding a constraint again adds to
+        its weight.
+
+        Arguments
+        ---------
+        constraint : CustomNNF or proposition
+            A constraint as given to add_constraint, or a proposition
+            that should be true. The constraint functions add soft
+            constraints when given a weight, such as
+            ``constraint.add_at_most_one(e, *args, weight=5)``.
+        weight : int
+            Positive cost of violating the constraint.
+
+        Example
+        -------
+        ``e.add_soft(~Overtime("mon") | Bonus("mon"), 3)``
+
+        """
+        if not isinstance(weight, int):
+            raise TypeError(f"The provided weight={weight} is not an integer.")
+        if weight < 1:
+            raise ValueError(f"The provided weight={weight} is less than 1.")
+        if hasattr(constraint, "_var"):
+            # keyed by its variable, so that adding a proposition again
+            # adds to the weight of the same soft constraint
+            constraint = constraint._var
+        self.soft_constraints[constraint] = (
+            self.soft_constraints.get(constraint, 0) + weight)
+
+    def _add_builder(self, constraint, weight=None):
+        """Adds a _ConstraintBuilder, as a soft constraint if
+        given a weight."""
+        if weight is None:
+            self.constraints.add(constraint)
+        else:
+            self.add_soft(constraint, weight)
+
     def disable_custom_constraints(self):
         """Disable the functionality for using custom_constraints"""
         self._custom_constraints = None
 
-    def compile(self, CNF=True) -> "nnf.NNF":
+    def compile(self, CNF=True, tseitin=False, format="nnf", workers=None, stats=False,
+                max_clauses=None, max_seconds=None):
         """Convert constraints into a theory in
         conjunctive normal form, or if specified,
         the simpler negation-normal form.
@@ -101,57 +254,563 @@ class Encoding:
         Arguments
         ---------
         CNF : bool
-            Default is True. Converts a theory to CNF.
+            Default is True. Converts a theory to CNF. Custom
+            constraints are left as compiled, without auxiliary
+            variables, unless tseitin is True.
+        tseitin : bool
+            Default is False. If True, every constraint is converted
+            to CNF with the polarity-aware definitional encoding in
+            bauhaus/tseitin.py, where nested connectives are named by
+            gate variables shared within each constraint. The theory
+            is then linear in the size of its constraints.
+            Implies CNF.
+        format : str
+            Default is "nnf". If "ints", the theory is returned as
+            clauses of integer literals numbered by the variables
+            attribute, without creating any NNF objects for the
+            builder constraints. Custom constraints are converted
+            with the encoding of tseitin=True. Implies CNF, and
+            debug_constraints is left empty. If "store", the same
+            clauses are returned in a ClauseStore, see
+            bauhaus/clause_store.py, with the clauses of each
+            constraint in its sections.
+        workers : int
+            Default is None. If greater than one, the constraints
+            that need building, and the groups of a constraint with
+            a groupby, are built in that many processes. The theory
+            is the same as when built in one process, up to the
+            numbering of auxiliary variables.
+        stats : bool
+            Default is False. If True, the time, size and peak
+            memory of building each constraint are measured and
+            left in last_compile_stats, see bauhaus/profiling.py.
+        max_clauses : int
+            Default is None. If given, the compile stops with a
+            bauhaus.budget.CompileBudgetExceeded error, naming the
+            offending constraint, as soon as the clauses of the
+            builder constraints are predicted or found to exceed it,
+            see estimate.
+        max_seconds : float
+            Default is None. If given, the compile stops with the
+            same error once building the constraints takes longer.
 
         Returns
         -------
-        theory : NNF
-            Conjunctive or Negation normal form of constraints.
+        theory : NNF, list[list[int]] or ClauseStore
+            Conjunctive or Negation normal form of constraints,
+            or the integer clauses of the theory.
 
         """
-        if not self.constraints and not self._custom_constraints:
-            raise ValueError(
-                f"Constraints in {self} are empty."
-                " This can happen if no objects from"
-                " decorated classes are instantiated,"
-                " if no classes/methods are decorated"
-                " with @constraint or no function"
-                " calls of the form constraint.add_method"
-            )
-        if not self.propositions.values():
-            raise ValueError(
-                f"Constraints in {self} are empty."
-                " This can happen if no objects from"
-                " decorated classes are instantiated."
-            )
+        budget = None
+        if max_clauses is not None or max_seconds is not None:
+            budget = _budget.Budget(max_clauses, max_seconds)
+        if not stats:
+            return self._compile(CNF, tseitin, format, workers, budget=budget)
+        profiler = _profiling.Profiler(self)
+        try:
+            return self._compile(CNF, tseitin, format, workers, profiler, budget)
+        finally:
+            self.last_compile_stats = profiler.close()
+
+    def _compile(self, CNF, tseitin, format, workers, profiler=None, budget=None):
+        """Compiles the theory, see compile, measuring the constraints
+        with the given bauhaus.profiling.Profiler and checking them
+        against the given bauhaus.budget.Budget."""
+        if format not in ("nnf", "ints", "store"):
+            raise ValueError(f"Unknown format '{format}', expected"
+                             " 'nnf', 'ints' or 'store'.")
+        self._check_constraints()
 
         theory = []
         self.clear_debug_constraints()
+        self._update_builds(workers, profiler, budget)
+
+        if format != "nnf":
+            mode = "ints"
+        elif tseitin:
+            mode = "tseitin"
+        elif CNF:
+            mode = "CNF"
+        else:
+            mode = "NNF"
+        if profiler is not None:
+            for constraint in self._custom_constraints:
+                start = time.perf_counter()
+                clauses = self._custom_build(constraint, mode)
+                profiler.converted(constraint, time.perf_counter() - start,
+                                   clauses if mode == "ints" else None)
+
+        if format == "ints":
+            for constraint in self._custom_constraints:
+                theory.extend(self._custom_build(constraint, "ints"))
+            for constraint in self.constraints:
+                theory.extend(self._builds[constraint].clauses)
+            theory.extend([lit] for lit in self._bounds())
+            return theory
+
+        if format == "store":
+            store = ClauseStore()
+            for constraint in self._custom_constraints:
+                store.add_section(constraint,
+                                  self._custom_build(constraint, "ints"))
+            for constraint in self.constraints:
+                store.add_section(constraint, self._builds[constraint].clauses)
+            bounds = self._bounds()
+            if bounds:
+                store.add_section(IncrementalBound, [[lit] for lit in bounds])
+            return store
 
         # custom constraints
         for constraint in self._custom_constraints:
-            clause = constraint.compile()
+            clause = self._custom_build(constraint, mode)
             theory.append(clause)
-            self.debug_constraints[constraint] = clause
+            if self.provenance:
+                self.debug_constraints[constraint] = clause
 
-        # builder constraints
+        # builder constraints are already in CNF
         for constraint in self.constraints:
-            clause = constraint.build(self.propositions)
-            if CNF:
-                clause = clause.to_CNF()
+            build = self._builds[constraint]
+            start = time.perf_counter()
+            clause = build.theory
+            if clause is None:
+                clause = build.theory = nnf.And(constraint.translate(build.clauses,
+                                                                     self.variables))
+            if profiler is not None:
+                profiler.converted(constraint, time.perf_counter() - start)
             if clause:
                 theory.append(clause)
-                try:
+                if self.provenance:
+                    build.record_ranges(self.variables)
                     self.debug_constraints[constraint] = clause
-                except Exception as e:
-                    raise (e)
             else:
                 warnings.warn(
                     f"The {constraint} was not built and"
                     "will not be added to the theory."
                 )
+        theory.extend(nnf.Or([self.variables.var(lit)]) for lit in self._bounds())
         return nnf.And(theory)
 
+    def write_dimacs(self, path_or_file, compress=None, names=None) -> tuple:
+        """Write the theory as DIMACS CNF, one constraint at a time.
+
+        The clauses are those of compile(format="ints"), numbered by
+        the variables attribute. Constraints built by an earlier
+        compile are written from its cache, and the others are built
+        for the file and discarded once written, so memory is bounded
+        by the largest constraint rather than the whole theory.
+
+        Arguments
+        ---------
+        path_or_file : str, os.PathLike or binary file object
+        compress : str
+            Default is None. "gzip" or "xz" to compress the output.
+            Inferred from a ".gz" or ".xz" extension when writing
+            to a path.
+        names : str, os.PathLike or text file object
+            Where to write the name of each numbered proposition, as
+            lines of "number<TAB>name". Default is the path with
+            ".names" appended when writing to a path, otherwise no
+            names are written.
+
+        Returns
+        -------
+        (variables, clauses) : tuple[int, int]
+            The counts given in the header.
+
+        """
+        self._check_constraints()
+        if isinstance(path_or_file, (str, os.PathLike)):
+            path = os.fspath(path_or_file)
+            if compress is None:
+                compress = _dimacs.compression(path)
+            if names is None:
+                names = path + ".names"
+            with open(path, "wb") as out:
+                counts = self.write_dimacs(out, compress, names)
+            return counts
+
+        released = []
+        counts = _dimacs.write(self._iter_clauses(released),
+                               self.variables,
+                               path_or_file,
+                               compress)
+        self.variables.release(released)
+        if isinstance(names, (str, os.PathLike)):
+            with open(names, "w") as out:
+                _dimacs.write_names(self.variables, out)
+        elif names is not None:
+            _dimacs.write_names(self.variables, names)
+        return counts
+
+    def solver(self, backend="cadical") -> "_solver.Session":
+        """Returns a SAT solver session loaded with the theory.
+
+        The session keeps its solver between solves and loads the
+        constraints and propositions added to the encoding since
+        its last solve, see bauhaus/solver.py.
+
+        Arguments
+        ---------
+        backend : str
+            Default is "cadical". A solver of the pysat extra, by
+            its pysat name or one of "cadical", "glucose", "minisat",
+            "lingeling" and "maplesat", or "builtin" to use nnf's
+            native solver without pysat.
+
+        Returns
+        -------
+        session : bauhaus.solver.Session
+
+        Examples
+        --------
+
+        ``with e.solver() as s:``
+        ``    if s.solve(assumptions=[x, ~y]):``
+        ``        print(s.model())``
+
+        """
+        return _solver.Session(self, backend)
+
+    def iter_models(self, project=None, limit=None, backend="cadical"):
+        """Yields the solutions of the theory, projected onto some
+        propositions, one at a time.
+
+        Solutions are found by a solver session, see ``solver``,
+        which blocks each solution once found, so every projected
+        solution is yielded once, whatever the values of the other
+        variables. Only the blocking clauses are kept between
+        solutions.
+
+        Arguments
+        ---------
+        project : iterable
+            Optional; decorated classes or methods, propositions or
+            nnf.Var to project onto. Default is every proposition.
+        limit : int
+            Optional; the most solutions to yield.
+        backend : str
+            See ``solver``. Default is "cadical".
+
+        Yields
+        ------
+        solution : dict
+            key: projected proposition, value: bool
+
+        Examples
+        --------
+
+        ``for solution in e.iter_models(project=[Shift], limit=100):``
+
+        """
+        if project is None:
+            variables = [obj._var for instances in self.propositions.values()
+                         for obj in instances.values()]
+        else:
+            variables = unpack_variables(project, self.propositions)
+        with self.solver(backend) as session:
+            yield from session.models(variables, limit)
+
+    def optimize(self, backend="rc2") -> tuple:
+        """Finds a solution that minimizes the total weight of the
+        soft constraints it violates, see bauhaus/maxsat.py.
+
+        Arguments
+        ---------
+        backend : str
+            Default is "rc2", the MaxSAT solver of the pysat extra.
+            "builtin" searches without pysat, for small encodings.
+
+        Returns
+        -------
+        (solution, cost) : tuple
+            solution : dict
+                key: proposition or variable name, value: bool
+            cost : int
+                Total weight of the violated soft constraints.
+            (None, None) if the hard constraints are unsatisfiable.
+
+        Example
+        -------
+        ``solution, cost = e.optimize()``
+
+        """
+        return _maxsat.optimize(self, backend)
+
+    def _iter_clauses(self, released):
+        """Yields the clauses of each constraint, building those that
+        changed since the last compile without caching them.
+
+        The auxiliary variables of these builds are added to released,
+        to be released once every clause is written.
+
+        """
+        for constraint in self._custom_constraints:
+            yield self._custom_build(constraint, "ints")
+        resolver = Resolver(self.propositions, self._partitions)
+        for constraint in self.constraints:
+            build = self._builds.get(constraint)
+            signature = self._signature(constraint)
+            if (build is not None and signature is not None
+                    and build.signature == signature):
+                parts = build.parts
+                yield build.clauses
+            else:
+                previous = build.parts if build is not None else dict()
+                parts = constraint.build_parts(self.propositions,
+                                               self.variables,
+                                               previous,
+                                               resolver=resolver)
+                for key, (clauses, allocated, _) in parts.items():
+                    if previous.get(key) is not parts[key]:
+                        released.extend(allocated)
+                    yield clauses
+            if constraint._constraint is cbuilder.counter:
+                lit = constraint._k._literal(parts)
+                if lit is not None:
+                    yield [[lit]]
+
+    def _bounds(self) -> list:
+        """Returns the literal of each IncrementalBound of the
+        constraints, built by _update_builds."""
+        bounds = []
+        for constraint in self.constraints:
+            if constraint._constraint is cbuilder.counter:
+                lit = constraint._k._literal(self._builds[constraint].parts)
+                if lit is not None:
+                    bounds.append(lit)
+        return bounds
+
+    def _check_constraints(self):
+        """Raises a ValueError if there is nothing to compile."""
+        if (not self.constraints and not self._custom_constraints
+                and not self.soft_constraints):
+            raise ValueError(
+                f"Constraints in {self} are empty."
+                " This can happen if no objects from"
+                " decorated classes are instantiated,"
+                " if no classes/methods are decorated"
+                " with @constraint or no function"
+                " calls of the form constraint.add_method"
+            )
+        if not self.propositions.values():
+            raise ValueError(
+                f"Constraints in {self} are empty."
+                " This can happen if no objects from"
+                " decorated classes are instantiated."
+            )
+
+    def _signature(self, constraint) -> tuple:
+        """Returns the number and version of the instances of each
+        class the constraint depends on, or None if it must be built
+        on every compile, see _ConstraintBuilder.volatile."""
+        if constraint.volatile():
+            return None
+        names = constraint.dependencies()
+        if names is None:
+            names = sorted(self.propositions, key=str)
+        return tuple((name,
+                      self._versions[name],
+                      len(self.propositions.get(name, ())))
+                     for name in names)
+
+    def _update_builds(self, workers=None, profiler=None, budget=None):
+        """Builds the constraints that changed since the last compile.
+
+        The clauses of each _ConstraintBuilder are cached with the
+        number and version of the instances of each class it depends
+        on. A builder is built again only when one of these changed,
+        or on every compile when it depends on attributes or methods
+        of the instances, see _ConstraintBuilder.volatile, and then
+        only the groups of its inputs that changed are encoded again.
+        The builders share a bauhaus.utils.Resolver, so each decorated
+        method is called once per instance. With more than one worker,
+        they are built in a pool of processes, see bauhaus/parallel.py.
+
+        The builds are measured by profiler, a bauhaus.profiling.Profiler,
+        and one is made to call on_builder_start and on_builder_finish
+        when they are set. The sizes and times of the builds are
+        checked against budget, a bauhaus.budget.Budget; when one
+        exceeds it, the builds of this call are dropped and the
+        cached ones kept.
+
+        """
+        if profiler is None and (self.on_builder_start is not None
+                                 or self.on_builder_finish is not None):
+            profiler = _profiling.Profiler(self, memory=False)
+        table = self.variables
+        active = self.constraints | {constraint for constraint in self.soft_constraints
+                                     if isinstance(constraint, cbuilder)}
+        for constraint in list(self._builds):
+            if constraint not in active:
+                build = self._builds.pop(constraint)
+                for _, allocated, _ in build.parts.values():
+                    table.release(allocated)
+
+        dirty = []
+        for constraint in active:
+            signature = self._signature(constraint)
+            build = self._builds.get(constraint)
+            if build is None or signature is None or build.signature != signature:
+                previous = build.parts if build is not None else dict()
+                dirty.append((constraint, signature, previous))
+            elif profiler is not None:
+                profiler.record(constraint, build.parts)
+
+        resolver = Resolver(self.propositions, self._partitions)
+        if budget is not None and budget.max_clauses is not None:
+            budget.predict({constraint: len(build.clauses)
+                            for constraint, build in self._builds.items()
+                            if constraint in active},
+                           {constraint: constraint.estimate(self.propositions, resolver)
+                            for constraint, _, _ in dirty})
+
+        built = None
+        if workers and workers > 1 and dirty:
+            if profiler is not None:
+                for constraint, _, _ in dirty:
+                    profiler.start(constraint, timed=False)
+            built = _parallel.build([constraint for constraint, _, _ in dirty],
+                                    [previous for _, _, previous in dirty],
+                                    self.propositions,
+                                    table,
+                                    workers,
+                                    resolver)
+            if built is not None and profiler is not None:
+                for (constraint, _, previous), parts in zip(dirty, built):
+                    profiler.finish(constraint, parts, previous)
+            if built is not None and budget is not None:
+                for (constraint, _, _), parts in zip(dirty, built):
+                    self._check_budget(budget, constraint, parts, dirty, built)
+        if built is None:
+            select = None if budget is None else budget.select()
+            built = []
+            for constraint, _, previous in dirty:
+                if profiler is not None:
+                    profiler.start(constraint)
+                built.append(constraint.build_parts(self.propositions, table, previous,
+                                                    select=select,
+                                                    resolver=resolver))
+                if profiler is not None:
+                    profiler.finish(constraint, built[-1], previous)
+                if budget is not None:
+                    self._check_budget(budget, constraint, built[-1], dirty, built)
+
+        for (constraint, signature, previous), parts in zip(dirty, built):
+            if (previous and parts.keys() == previous.keys()
+                    and all(parts[key] is previous[key] for key in parts)):
+                # nothing changed, so the clauses and their translation
+                # are kept, and solver sessions keep them loaded
+                self._builds[constraint].signature = signature
+                continue
+            for key, (_, allocated, _) in previous.items():
+                if key not in parts:
+                    table.release(allocated)
+            for key, (clauses, allocated, outputs) in parts.items():
+                if previous.get(key) is not parts[key]:
+                    parts[key] = (ClauseStore(clauses), allocated, outputs)
+            self._builds[constraint] = _Build(signature, parts)
+
+    def _check_budget(self, budget, constraint, parts, dirty, built):
+        """Checks a built constraint against budget, releasing the
+        auxiliary variables of the groups built so far if it exceeds
+        the budget."""
+        try:
+            budget.built(constraint, parts)
+        except _budget.CompileBudgetExceeded:
+            for (_, _, previous), new in zip(dirty, built):
+                for key, part in new.items():
+                    if previous.get(key) is not part:
+                        self.variables.release(part[1])
+            raise
+
+    def estimate(self) -> dict:
+        """Predicts the size of each builder constraint without
+        building it.
+
+        The inputs of each _ConstraintBuilder, including soft ones,
+        are gathered and grouped, and the sizes of the encodings of
+        the groups computed from their numbers of inputs. Custom
+        constraints are left out, and the size of weighted at most
+        constraints, which depends on their weights, is None. Use
+        compile(max_clauses=...) to stop a compile that would
+        exceed a size.
+
+        Returns
+        -------
+        estimates : dict
+            key: _ConstraintBuilder, value: dict of "clauses" and
+            "auxiliary", the numbers of clauses and of auxiliary
+            variables, and "partitions", the number of inputs of
+            each group of its groupby.
+
+        """
+        resolver = Resolver(self.propositions, self._partitions)
+        active = self.constraints | {constraint for constraint in self.soft_constraints
+                                     if isinstance(constraint, cbuilder)}
+        return {constraint: constraint.estimate(self.propositions, resolver)
+                for constraint in active}
+
+    def _custom_build(self, constraint, mode):
+        """Returns a custom constraint converted for the given mode,
+        caching the result."""
+        builds = self._custom_builds.setdefault(constraint, dict())
+        if mode not in builds:
+            if mode == "ints":
+                # gates are not shared with other constraints, so the
+                # clauses hold whichever constraints are kept
+                builds[mode] = _tseitin.to_clauses(constraint.compile(),
+                                                   self.variables)
+            elif mode == "tseitin":
+                clauses = self._custom_build(constraint, "ints")
+                builds[mode] = nnf.And([nnf.Or(map(self.variables.var, clause))
+                                        for clause in clauses])
+            else:
+                builds[mode] = constraint.compile()
+        return builds[mode]
+
+    def _clear_builds(self):
+        """Forgets the constraints built by previous compiles."""
+        self._builds = dict()
+        self._custom_builds = dict()
+        # groups of instances by (class name, groupby), see
+        # bauhaus.utils.PartitionIndex
+        self._partitions = dict()
+        self.variables.reset_auxiliary()
+
+    def instance_constraints(self, constraint) -> dict:
+        """Returns the clauses of a compiled _ConstraintBuilder that
+        mention each proposition.
+
+        The clauses are translated to NNF from the ranges of clause
+        indices recorded by compile, so this needs provenance. They
+        are also kept in the instance_constraints of the builder.
+
+        Arguments
+        ---------
+        constraint : _ConstraintBuilder
+
+        Returns
+        -------
+        instance_constraints : defaultdict(list)
+            key: str of the proposition's variable, value: list of
+            nnf.Or clauses.
+
+        """
+        if not self.provenance:
+            raise ValueError(f"{self} does not record provenance;"
+                             " create it with Encoding(provenance=True).")
+        build = self._builds.get(constraint)
+        constraint.instance_constraints.clear()
+        if build is None or build.ranges is None:
+            return constraint.instance_constraints
+        table = self.variables
+        for number, spans in build.ranges.items():
+            clauses = [nnf.Or(map(table.var, build.clauses[index]))
+                       for start, stop in zip(spans[::2], spans[1::2])
+                       for index in range(start, stop)]
+            constraint.add_to_instance_constraints(str(table.var(number)), clauses)
+        return constraint.instance_constraints
+
     def introspect(self, solution: Optional[dict] = None, var_level=False):
         """Observing the origin of a theory from each
         propositional object to the final constraint.
@@ -167,7 +826,8 @@ class Encoding:
             value -> Clause built in Encoding.compile()
 
         Each ConstraintBuilder object has the attribute
-        instance_constraints : defaultdict with,
+        instance_constraints, filled from the provenance recorded
+        by compile, see Encoding.instance_constraints : defaultdict with,
 
             key -> Object (from annotated class or method)
 
@@ -186,6 +846,13 @@ class Encoding:
             Defaults to False; If True, output coloring will be based on the
             variable instead of the literal.
         """
+        if not self.provenance:
+            warnings.warn(
+                "Provenance is not recorded for this encoding,"
+                " so it cannot be introspected. Create it with"
+                " Encoding(provenance=True) and compile it."
+            )
+            return self.debug_constraints
         if not self.debug_constraints:
             warnings.warn(
                 "Your theory has not been compiled yet,"
@@ -200,8 +867,9 @@ class Encoding:
             print(f"{constraint}: \n")
             # Check based on original constraint type
             if "instance_constraints" in dir(constraint):
-                if constraint.instance_constraints:
-                    for instance, values in constraint.instance_constraints.items():
+                instance_constraints = self.instance_constraints(constraint)
+                if instance_constraints:
+                    for instance, values in instance_constraints.items():
                         print(f"{instance} =>")
                         for v in values:
                             self.pprint(v, solution)
@@ -266,6 +934,130 @@ class Encoding:
         print(_process(formula))
 
 
+class _Build:
+    """Clauses of a _ConstraintBuilder kept between compiles, as a
+    ClauseStore for each group of its inputs, read together through a
+    ClauseChain so that each clause is stored once."""
+
+    def __init__(self, signature, parts):
+        self.signature = signature
+        self.parts = parts
+        self.clauses = ClauseChain(clauses for clauses, _, _ in parts.values())
+        # weak reference to the NNF translation, made on demand; it is
+        # kept while a theory holds it, so that the cache does not keep
+        # the propositions of the clauses alive
+        self._theory = None
+        # variable number -> indices of the clauses mentioning it, as
+        # start, stop pairs, recorded when provenance is on
+        self.ranges = None
+
+    @property
+    def theory(self):
+        return None if self._theory is None else self._theory()
+
+    @theory.setter
+    def theory(self, theory):
+        self._theory = None if theory is None else weakref.ref(theory)
+
+    def record_ranges(self, table):
+        """Records the ranges of the clauses that mention each
+        variable other than auxiliary ones, once."""
+        if self.ranges is not None:
+            return
+        ranges = dict()
+        for index, clause in enumerate(self.clauses):
+            for lit in clause:
+                if table.is_auxiliary(lit):
+                    continue
+                spans = ranges.get(abs(lit))
+                if spans is None:
+                    ranges[abs(lit)] = array("i", (index, index + 1))
+                elif spans[-1] == index:
+                    spans[-1] = index + 1
+                elif spans[-1] < index:
+                    spans.extend((index, index + 1))
+        self.ranges = ranges
+
+
+class IncrementalBound:
+    """An at most k constraint whose bound can be tightened without
+    building it again.
+
+    Returned by ``constraint.add_at_most_k(..., incremental=True)``.
+    The true inputs are counted in unary by a totalizer over all of
+    them, see cardinality.counter, which is built and cached like
+    any other constraint. The bound is a single unit clause on one
+    output of the counter: compile adds it to the theory and solver
+    sessions assume it, so tightening the bound changes one literal
+    and neither the counter nor the clauses loaded in a session.
+
+    Attributes
+    ----------
+    k : int
+        The bound.
+    builder : _ConstraintBuilder
+        Builds the counter; it is in the constraints of the encoding.
+
+    Example
+    -------
+    ``bound = constraint.add_at_most_k(e, 10, Shift, incremental=True)``
+
+    ``while session.solve():``
+    ``    bound.tighten(bound.k - 1)``
+
+    """
+
+    def __init__(self, encoding: "Encoding", k: int, args: tuple):
+        self.encoding = encoding
+        self.k = k
+        self.builder = cbuilder(cbuilder.counter, args=args, k=self)
+        encoding.constraints.add(self.builder)
+
+    def __repr__(self) -> str:
+        return f"IncrementalBound(k={self.k})"
+
+    def __getstate__(self) -> dict:
+        # builders are pickled to be built in other processes, which
+        # need no encoding to build the counter
+        state = self.__dict__.copy()
+        state["encoding"] = None
+        return state
+
+    def tighten(self, k: int):
+        """Lowers the bound to k, effective from the next compile
+        or solve."""
+        if not isinstance(k, int):
+            raise TypeError(f"The provided k={k} is not an integer.")
+        if not 0 <= k <= self.k:
+            raise ValueError(f"The provided k={k} is not between 0 and"
+                             f" the current bound {self.k}.")
+        self.k = k
+
+    def outputs(self) -> list:
+        """Returns the integer literals of the outputs of the counter,
+        once built by a compile or solve, else None. outputs[j] is
+        true when more than j inputs are true."""
+        build = self.encoding._builds.get(self.builder)
+        return None if build is None else self._outputs(build.parts)
+
+    def literal(self):
+        """Returns the integer literal of the bound, false when more
+        than k inputs are true, or None if the bound holds anyway or
+        the counter is not built."""
+        build = self.encoding._builds.get(self.builder)
+        return None if build is None else self._literal(build.parts)
+
+    @staticmethod
+    def _outputs(parts) -> list:
+        # the builder has no groupby, so one part
+        (_, _, outputs), = parts.values()
+        return outputs
+
+    def _literal(self, parts):
+        outputs = self._outputs(parts)
+        return -outputs[self.k] if self.k < len(outputs) else None
+
+
 class CustomNNF:
     """
     CustomNNF is a thin wrapper around the python-nnf class hierarchy
@@ -347,6 +1139,73 @@ def Or(*args):
     return _flatten_and_build_andor(args, "or")
 
 
+def _cache_name(obj):
+    """Caches the interned name of a proposition and its hash."""
+    name = sys.intern(obj._prop_name())
+    obj._var_name = name
+    obj._var_hash = hash(name)
+
+
+class Propositions(tuple):
+    """A tuple of propositions created together by
+    ``Encoding.create_many``.
+
+    Attributes
+    ----------
+    ids : range or array.array
+        Variable number of each proposition, see
+        ``VariableTable.extend``.
+
+    """
+
+    def __new__(cls, objects, ids):
+        self = super().__new__(cls, objects)
+        self.ids = ids
+        return self
+
+
+def _new_proposition(module, qualname):
+    """Creates an empty instance of a decorated class when unpickling."""
+    cls = find_global(module, qualname)
+    while not isinstance(cls, type):
+        cls = cls.__wrapped__
+    return cls.__new__(cls)
+
+
+def _set_proposition_state(obj, state):
+    obj.__dict__.update(state)
+    if "_var_name" in state:
+        # equality compares the interned names
+        obj._var_name = sys.intern(obj._var_name)
+
+
+def _create_many(encoding, cls, arguments) -> Propositions:
+    """Creates and registers instances of a decorated class in one pass."""
+    objects = []
+    append = objects.append
+    intern, Var = sys.intern, nnf.Var
+    # the batch only allocates objects that stay alive, so the cyclic
+    # garbage collector would repeatedly scan them for nothing
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for args in arguments:
+            obj = cls(*args) if isinstance(args, tuple) else cls(args)
+            name = intern(obj._prop_name())
+            obj._var_name = name
+            obj._var_hash = hash(name)
+            obj._var = Var(obj)
+            append(obj)
+        ids = encoding.variables.extend([obj._var for obj in objects])
+        encoding.propositions[cls.__qualname__].update(
+            (id(obj), obj) for obj in objects)
+        encoding._versions[cls.__qualname__] += 1
+    finally:
+        if enabled:
+            gc.enable()
+    return Propositions(objects, ids)
+
+
 def proposition(encoding: Encoding):
     """Create a propositional variable from the decorated
     class or function.
@@ -376,6 +1235,16 @@ def proposition(encoding: Encoding):
             pass
         >> e.propositions = {'A': {id: object}}
 
+    Many instances can be created at once with
+    ``A.bulk(iterable_of_args)``, see ``Encoding.create_many``.
+
+    Note
+    ----
+    The name of an instance, given by _prop_name, and its hash are
+    computed once when it is created. If an attribute the name
+    depends on changes afterwards, call
+    ``Encoding.refresh_propositions`` on the instance.
+
     """
 
     def wrapper(cls):
@@ -383,7 +1252,10 @@ def proposition(encoding: Encoding):
         assert "_prop_name" in dir(cls), "Error: _prop_name must be defined in order for bauhaus to construct __repr__, __hash__, and __eq__"
 
         def _repr(self):
-            return self._prop_name()
+            try:
+                return self._var_name
+            except AttributeError:
+                return self._prop_name()
         
         cls.__repr__ = _repr
 
@@ -431,22 +1303,58 @@ def proposition(encoding: Encoding):
             cls.compile = compile
         
         def _hash(self):
-            return hash(self.__repr__())
+            try:
+                return self._var_hash
+            except AttributeError:
+                return hash(self.__repr__())
 
         def _eq(self, __value: object) -> bool:
-            return hash(self) == hash(__value)
+            if self is __value:
+                return True
+            try:
+                # names are interned, so equal names are the same object
+                return self._var_name is __value._var_name
+            except AttributeError:
+                if isinstance(__value, str):
+                    return self.__repr__() == __value
+                return NotImplemented
         
         cls.__hash__ = _hash
         cls.__eq__ = _eq
 
+        # the name of the class refers to its wrapper, so instances
+        # are pickled with the name and unwrapped when unpickled
+        if (cls.__reduce__ is object.__reduce__
+                and cls.__reduce_ex__ is object.__reduce_ex__
+                and getattr(cls, "__getstate__", None)
+                is getattr(object, "__getstate__", None)):
+            def _reduce(self):
+                return (_new_proposition,
+                        (cls.__module__, cls.__qualname__),
+                        self.__dict__,
+                        None,
+                        None,
+                        _set_proposition_state)
+
+            cls.__reduce__ = _reduce
+
         @wraps(cls)
         def wrapped(*args, **kwargs):
             ret = cls(*args, **kwargs)
+            _cache_name(ret)
             ret._var = nnf.Var(ret)
+            encoding.variables.literal(ret._var)
             class_name = ret.__class__.__qualname__
             encoding.propositions[class_name][id(ret)] = ret
+            encoding._versions[class_name] += 1
             return ret
 
+        def bulk(arguments):
+            return _create_many(encoding, cls, arguments)
+
+        wrapped.bulk = bulk
+        wrapped._encoding = encoding
+
         return wrapped
 
     return wrapper
@@ -471,6 +1379,10 @@ class constraint:
         - At most one
         - Exactly one
         - At most K
+        - At least K
+        - Exactly K
+        - Between lo and hi
+        - Weighted at most
         - Implies all
 
     Examples
@@ -520,16 +1432,42 @@ class constraint:
                 f" Try using groupby on the {class_name}"
                 " class instead."
             )
-        if not (isinstance(parameter, str) or callable(parameter)):
+        if not (groupby_key(parameter) or callable(parameter)):
             value_type = type(parameter).__name__
             raise ValueError(
                 f"The provided groupby value, {parameter},"
                 f" is of type {value_type}. To use groupby,"
-                f" a function or object attribute (string) must be provided"
-                f" to partition the {class_name} objects."
+                f" a function, object attribute (string) or tuple of"
+                f" attributes must be provided to partition the"
+                f" {class_name} objects."
             )
         return True
 
+    def _is_valid_bound(value, name="k", minimum=1):
+        """Validates a bound for a cardinality constraint.
+
+        Arguments
+        ---------
+        value : int
+            User-given bound.
+        name : str
+            Name of the bound in error messages.
+        minimum : int
+            Smallest accepted value.
+
+        Raises
+        ------
+        TypeError
+            If the bound is not an integer.
+        ValueError
+            If the bound is less than minimum.
+
+        """
+        if not isinstance(value, int):
+            raise TypeError(f"The provided {name}={value} is not an integer.")
+        if value < minimum:
+            raise ValueError(f"The provided {name}={value} is less than {minimum}.")
+
     @classmethod
     def _constraint_by_function(
         cls,
@@ -539,6 +1477,11 @@ class constraint:
         k=None,
         left=None,
         right=None,
+        encoding_type=None,
+        groupby=None,
+        weights=None,
+        pairs=None,
+        weight=None,
     ):
 
         """
@@ -554,28 +1497,60 @@ class constraint:
             constraint in ``_ConstraintBuilder``
         args : tuple
             Tuple of user-given arguments.
-        k : int
-            Used for constraint "At most K".
+        k : int or tuple
+            Used for constraints "At most K", "At least K",
+            "Exactly K" and "Between".
         left : tuple
             Used for constraint "implies all".
             User-given arguments for the left implication.
         right : tuple
             Used for constraint "implies all".
             User-given arguments for the right implication.
+        encoding_type : str
+            Used for cardinality constraints. Name of the
+            CNF encoding in bauhaus/cardinality.py.
+        groupby : str, tuple of str or func
+            Used to group the arguments for the constraint.
+        weights : tuple
+            Used for constraint "Weighted at most".
+            Tuple of (argument, weight) pairs.
+        pairs : iterable
+            Used for constraints "At most one" and "Implies all",
+            applied to each (left, right) pair.
+        weight : int
+            Makes the constraint soft with this weight when given.
 
         Returns
         -------
         None
 
         """
+        if pairs is not None:
+            constraint = cbuilder(constraint_type, pairs=Pairs(pairs))
+            encoding._add_builder(constraint, weight)
+            return
+        if groupby and not (groupby_key(groupby) or callable(groupby)):
+            raise ValueError(
+                f"The provided groupby value, {groupby},"
+                f" is of type {type(groupby).__name__}. To use groupby,"
+                " a function, object attribute (string) or tuple of"
+                " attributes must be provided to partition the arguments."
+            )
         if constraint_type is cbuilder.implies_all:
             constraint = cbuilder(constraint_type, left=left, right=right)
-            encoding.constraints.add(constraint)
+            encoding._add_builder(constraint, weight)
             return
         elif args:
             args = tuple(flatten(args))
-            constraint = cbuilder(constraint_type, args=args, k=k)
-            encoding.constraints.add(constraint)
+            constraint = cbuilder(
+                constraint_type,
+                args=args,
+                k=k,
+                groupby=groupby,
+                encoding_type=encoding_type,
+                weights=weights,
+            )
+            encoding._add_builder(constraint, weight)
             return
         else:
             raise ValueError(
@@ -596,6 +1571,9 @@ class constraint:
         left=None,
         right=None,
         groupby=None,
+        encoding_type=None,
+        weights=None,
+        weight=None,
     ):
         """
         `Private Method`:
@@ -609,16 +1587,25 @@ class constraint:
             constraint in _ConstraintBuilder
         func : function
             Decorated class or bound method. Default = None.
-        k : int
-            Used for constraint "At most K".
+        k : int or tuple
+            Used for constraints "At most K", "At least K",
+            "Exactly K" and "Between".
         left : tuple
             Used for constraint "implies all".
             User-given arguments for the left implication.
         right : tuple
             Used for constraint "implies all".
             User-given arguments for the right implication.
-        groupby : str or func
+        groupby : str, tuple of str or func
             Used to group instances of a class for the constraints.
+        encoding_type : str
+            Used for cardinality constraints. Name of the
+            CNF encoding in bauhaus/cardinality.py.
+        weights : str or func
+            Used for constraint "Weighted at most".
+            Attribute or function giving the weight of an instance.
+        weight : int
+            Makes the constraint soft with this weight when given.
 
         Returns
         -------
@@ -632,9 +1619,16 @@ class constraint:
                 assert cls._is_valid_grouby(func, groupby)
 
             constraint = cbuilder(
-                constraint_type, func=func, k=k, left=left, right=right, groupby=groupby
+                constraint_type,
+                func=func,
+                k=k,
+                left=left,
+                right=right,
+                groupby=groupby,
+                encoding_type=encoding_type,
+                weights=weights,
             )
-            encoding.constraints.add(constraint)
+            encoding._add_builder(constraint, weight)
 
             @wraps(func)
             def wrapped(*args, **kwargs):
@@ -662,7 +1656,7 @@ class constraint:
         """
         return constraint._decorate(encoding, cbuilder.at_least_one, **kwargs)
 
-    def at_most_one(encoding: Encoding, **kwargs):
+    def at_most_one(encoding: Encoding, encoding_type=None, **kwargs):
         """At most one of the propositional variables are True.
 
         Constraint is added with the @constraint decorator.
@@ -671,16 +1665,27 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        encoding_type : str
+            Optional; one of "auto", "pairwise", "sequential",
+            "ladder", "commander", "product" or "bimander".
+            Defaults to "pairwise", which adds no auxiliary
+            variables to the theory. "auto" picks an encoding
+            by the size of each group.
 
         Example
         -------
 
         ``@constraint.at_most_one(encoding)``
 
+        ``@constraint.at_most_one(encoding, encoding_type="sequential")``
+
         """
-        return constraint._decorate(encoding, cbuilder.at_most_one, **kwargs)
+        cardinality.validate_encoding(encoding_type, cardinality.AMO_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.at_most_one, encoding_type=encoding_type, **kwargs
+        )
 
-    def exactly_one(encoding: Encoding, **kwargs):
+    def exactly_one(encoding: Encoding, encoding_type=None, **kwargs):
         """Exactly one of the propositional variables are True.
 
         Constraint is added with the @constraint decorator.
@@ -689,6 +1694,9 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        encoding_type : str
+            Optional; encoding of the "at most one" half of the
+            constraint. See ``constraint.at_most_one``.
 
         Example
         -------
@@ -696,9 +1704,12 @@ class constraint:
         ``@constraint.exactly_one(encoding)``
 
         """
-        return constraint._decorate(encoding, cbuilder.exactly_one, **kwargs)
+        cardinality.validate_encoding(encoding_type, cardinality.AMO_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.exactly_one, encoding_type=encoding_type, **kwargs
+        )
 
-    def at_most_k(encoding: Encoding, k: int, **kwargs):
+    def at_most_k(encoding: Encoding, k: int, encoding_type=None, **kwargs):
         """At most K of the propositional variables are True
 
         Constraint is added with the @constraint decorator.
@@ -711,6 +1722,12 @@ class constraint:
             The number of variables that are true at one time.
             Must be less than the number of total variables for
             the constraint.
+        encoding_type : str
+            Optional; one of "auto", "naive", "sequential",
+            "totalizer", "modulo_totalizer" or "sorting_network".
+            Defaults to "naive", which adds no auxiliary
+            variables to the theory. "auto" picks an encoding by
+            the size of each group and k.
 
         Example
         -------
@@ -718,17 +1735,146 @@ class constraint:
         ``@constraint.at_most_k(encoding, k)``
 
         """
-        if not isinstance(k, int):
-            raise TypeError(f"The provided k={k} is not an integer.")
-        if k < 1:
-            raise ValueError(f"The provided k={k} is less than 1.")
+        constraint._is_valid_bound(k)
         if k == 1:
             warnings.warn(
                 f"Warning: The provided k={k} will"
                 " result in an 'at most one' constraint,"
                 " but we'll proceed anyway."
             )
-        return constraint._decorate(encoding, cbuilder.at_most_k, k=k, **kwargs)
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.at_most_k, k=k, encoding_type=encoding_type, **kwargs
+        )
+
+    def at_least_k(encoding: Encoding, k: int, encoding_type=None, **kwargs):
+        """At least K of the propositional variables are True
+
+        Constraint is added with the @constraint decorator.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        k : int
+            The minimum number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+
+        Example
+        -------
+
+        ``@constraint.at_least_k(encoding, k)``
+
+        """
+        constraint._is_valid_bound(k)
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.at_least_k, k=k, encoding_type=encoding_type, **kwargs
+        )
+
+    def exactly_k(encoding: Encoding, k: int, encoding_type=None, **kwargs):
+        """Exactly K of the propositional variables are True
+
+        Constraint is added with the @constraint decorator. Both
+        bounds share one counter over the variables.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        k : int
+            The number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+
+        Example
+        -------
+
+        ``@constraint.exactly_k(encoding, k, groupby='row')``
+
+        """
+        constraint._is_valid_bound(k)
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.exactly_k, k=k, encoding_type=encoding_type, **kwargs
+        )
+
+    def between(encoding: Encoding, lo: int, hi: int, encoding_type=None, **kwargs):
+        """Between lo and hi (inclusive) of the propositional
+        variables are True
+
+        Constraint is added with the @constraint decorator. Both
+        bounds share one counter over the variables.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        lo : int
+            The minimum number of variables that are true.
+        hi : int
+            The maximum number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+
+        Example
+        -------
+
+        ``@constraint.between(encoding, 2, 4)``
+
+        """
+        constraint._is_valid_bound(lo, "lo", 0)
+        constraint._is_valid_bound(hi, "hi", max(lo, 1))
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._decorate(
+            encoding, cbuilder.between, k=(lo, hi), encoding_type=encoding_type, **kwargs
+        )
+
+    def weighted_at_most(encoding: Encoding, weight, bound: int, encoding_type=None, **kwargs):
+        """The weights of the True propositional variables
+        sum to at most bound
+
+        Constraint is added with the @constraint decorator
+        above a class.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        weight : str or func
+            An attribute of each instance holding its integer
+            weight, or a function of the instance returning it.
+        bound : int
+            The maximum total weight.
+        encoding_type : str
+            Optional; one of "auto", "bdd", "adder" or
+            "generalized_totalizer". Defaults to "auto", which
+            uses an at most k encoding when all weights are
+            equal and a BDD otherwise.
+
+        Example
+        -------
+
+        ``@constraint.weighted_at_most(encoding, 'cost', budget)``
+
+        """
+        if not (isinstance(weight, str) or callable(weight)):
+            raise ValueError(
+                f"The provided weight, {weight}, must be an"
+                " attribute name (string) or a function of an instance."
+            )
+        if not isinstance(bound, int):
+            raise TypeError(f"The provided bound={bound} is not an integer.")
+        cardinality.validate_encoding(encoding_type, pseudo_boolean.PB_ENCODINGS)
+        return constraint._decorate(
+            encoding,
+            cbuilder.weighted_at_most,
+            k=bound,
+            encoding_type=encoding_type,
+            weights=weight,
+            **kwargs,
+        )
 
     def implies_all(encoding: Encoding, left=None, right=None, **kwargs):
         """Left proposition(s) implies right proposition(s)
@@ -801,7 +1947,7 @@ class constraint:
     # Constraint creation for these are directed to
     # constraint._constraint_by_function.
 
-    def add_at_least_one(encoding: Encoding, *args):
+    def add_at_least_one(encoding: Encoding, *args, weight=None):
         """At least one of the propositional variables are True
 
         Constraint is added directly with this function.
@@ -810,6 +1956,9 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
 
         Example
         -------
@@ -817,10 +1966,10 @@ class constraint:
 
         """
         return constraint._constraint_by_function(
-            encoding, cbuilder.at_least_one, args=args
+            encoding, cbuilder.at_least_one, args=args, weight=weight
         )
 
-    def add_at_most_one(encoding: Encoding, *args):
+    def add_at_most_one(encoding: Encoding, *args, encoding_type=None, pairs=None, weight=None):
         """At most one of the propositional variables are True
 
         Constraint is added directly with this function.
@@ -829,17 +1978,33 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        encoding_type : str
+            Optional; see ``constraint.at_most_one``.
+        pairs : iterable
+            Optional; instead of args, (left, right) pairs of
+            propositions of which at most one is True, such as
+            those found by the functions of bauhaus/pairs.py.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
 
         Example
         -------
         ``@constraint.add_at_most_one(encoding, [Obj, Class, Class.method])``
 
+        ``constraint.add_at_most_one(encoding, pairs=pairs.equal(queens, "row"))``
+
         """
+        cardinality.validate_encoding(encoding_type, cardinality.AMO_ENCODINGS)
+        if pairs is not None and args:
+            raise ValueError("Provide either the arguments or the pairs"
+                             " of an at most one constraint, not both.")
         return constraint._constraint_by_function(
-            encoding, cbuilder.at_most_one, args=args
+            encoding, cbuilder.at_most_one, args=args, encoding_type=encoding_type,
+            pairs=pairs, weight=weight
         )
 
-    def add_exactly_one(encoding: Encoding, *args):
+    def add_exactly_one(encoding: Encoding, *args, encoding_type=None, weight=None):
         """Exactly one of the propositional variables are True
 
         Constraint is added directly with this function.
@@ -848,17 +2013,24 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        encoding_type : str
+            Optional; see ``constraint.at_most_one``.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
 
         Example
         -------
         ``@constraint.add_exactly_one(encoding, [Obj, Class, Class.method])``
 
         """
+        cardinality.validate_encoding(encoding_type, cardinality.AMO_ENCODINGS)
         return constraint._constraint_by_function(
-            encoding, cbuilder.exactly_one, args=args
+            encoding, cbuilder.exactly_one, args=args, encoding_type=encoding_type, weight=weight
         )
 
-    def add_at_most_k(encoding: Encoding, k: int, *args):
+    def add_at_most_k(encoding: Encoding, k: int, *args, encoding_type=None, weight=None,
+                      incremental=False):
         """At most K of the propositional variables are True
 
         Constraint is added directly with this function.
@@ -871,27 +2043,213 @@ class constraint:
             The number of variables that are true at one time.
             Must be less than the number of total variables for
             the constraint.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
+        incremental : bool
+            Default is False. If True, returns an IncrementalBound
+            whose bound can be tightened without building the
+            constraint again.
+
+        Returns
+        -------
+        bound : IncrementalBound
+            If incremental, else None.
 
         Example
         -------
         ``@constraint.add_at_most_k(encoding, k, [Obj, Class, Class.method])``
 
         """
-        if not isinstance(k, int):
-            raise TypeError(f"The provided k={k} is not an integer.")
-        if k < 1:
-            raise ValueError(f"The provided k={k} is less than 1.")
+        constraint._is_valid_bound(k)
         if k == 1:
             warnings.warn(
                 f"Warning: The provided k={k} will"
                 " result in an 'at most one' constraint,"
                 " but we'll proceed anyway."
             )
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        if incremental:
+            if weight is not None or encoding_type not in (None, "totalizer"):
+                raise ValueError("An incremental at most K constraint is"
+                                 " hard and encoded by a totalizer, so it"
+                                 " takes no weight or other encoding_type.")
+            if not args:
+                raise ValueError("The incremental at most K constraint"
+                                 " was given no arguments.")
+            return IncrementalBound(encoding, k, tuple(flatten(args)))
+        return constraint._constraint_by_function(
+            encoding, cbuilder.at_most_k, args=args, k=k, encoding_type=encoding_type, weight=weight
+        )
+
+    def add_at_least_k(encoding: Encoding, k: int, *args, encoding_type=None, groupby=None, weight=None):
+        """At least K of the propositional variables are True
+
+        Constraint is added directly with this function.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        k : int
+            The minimum number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+        groupby : str, tuple of str or func
+            Optional; applies the constraint to each group of
+            the arguments separately.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
+
+        Example
+        -------
+        ``constraint.add_at_least_k(encoding, k, [Obj, Class, Class.method])``
+
+        """
+        constraint._is_valid_bound(k)
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._constraint_by_function(
+            encoding,
+            cbuilder.at_least_k,
+            args=args,
+            k=k,
+            encoding_type=encoding_type,
+            groupby=groupby,
+            weight=weight,
+        )
+
+    def add_exactly_k(encoding: Encoding, k: int, *args, encoding_type=None, groupby=None, weight=None):
+        """Exactly K of the propositional variables are True
+
+        Constraint is added directly with this function.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        k : int
+            The number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+        groupby : str, tuple of str or func
+            Optional; applies the constraint to each group of
+            the arguments separately.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
+
+        Example
+        -------
+        ``constraint.add_exactly_k(encoding, k, [Obj, Class, Class.method])``
+
+        """
+        constraint._is_valid_bound(k)
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._constraint_by_function(
+            encoding,
+            cbuilder.exactly_k,
+            args=args,
+            k=k,
+            encoding_type=encoding_type,
+            groupby=groupby,
+            weight=weight,
+        )
+
+    def add_between(encoding: Encoding, lo: int, hi: int, *args, encoding_type=None, groupby=None, weight=None):
+        """Between lo and hi (inclusive) of the propositional
+        variables are True
+
+        Constraint is added directly with this function.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        lo : int
+            The minimum number of variables that are true.
+        hi : int
+            The maximum number of variables that are true.
+        encoding_type : str
+            Optional; see ``constraint.at_most_k``.
+        groupby : str, tuple of str or func
+            Optional; applies the constraint to each group of
+            the arguments separately.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
+
+        Example
+        -------
+        ``constraint.add_between(encoding, 2, 4, [Obj, Class, Class.method])``
+
+        """
+        constraint._is_valid_bound(lo, "lo", 0)
+        constraint._is_valid_bound(hi, "hi", max(lo, 1))
+        cardinality.validate_encoding(encoding_type, cardinality.AMK_ENCODINGS)
+        return constraint._constraint_by_function(
+            encoding,
+            cbuilder.between,
+            args=args,
+            k=(lo, hi),
+            encoding_type=encoding_type,
+            groupby=groupby,
+            weight=weight,
+        )
+
+    def add_weighted_at_most(encoding: Encoding, weights, bound: int, encoding_type=None, groupby=None, weight=None):
+        """The weights of the True propositional variables
+        sum to at most bound
+
+        Constraint is added directly with this function.
+
+        Arguments
+        ---------
+        encoding : Encoding
+            Given encoding.
+        weights : dict or list
+            Maps propositions, classes, methods or variables to
+            integer weights, either as a dictionary or as a list
+            of (argument, weight) pairs.
+        bound : int
+            The maximum total weight.
+        encoding_type : str
+            Optional; see ``constraint.weighted_at_most``.
+        groupby : str, tuple of str or func
+            Optional; applies the constraint to each group of
+            the arguments separately.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
+
+        Example
+        -------
+        ``constraint.add_weighted_at_most(encoding, {x: 3, y: 2, z: 4}, 5)``
+
+        """
+        if isinstance(weights, dict):
+            weights = weights.items()
+        weights = tuple((arg, w) for arg, w in weights)
+        for _, w in weights:
+            if not isinstance(w, int):
+                raise TypeError(f"The provided weight={w} is not an integer.")
+        if not isinstance(bound, int):
+            raise TypeError(f"The provided bound={bound} is not an integer.")
+        cardinality.validate_encoding(encoding_type, pseudo_boolean.PB_ENCODINGS)
         return constraint._constraint_by_function(
-            encoding, cbuilder.at_most_k, args=args, k=k
+            encoding,
+            cbuilder.weighted_at_most,
+            args=tuple(arg for arg, _ in weights),
+            k=bound,
+            encoding_type=encoding_type,
+            groupby=groupby,
+            weights=weights,
+            weight=weight,
         )
 
-    def add_implies_all(encoding: Encoding, left, right):
+    def add_implies_all(encoding: Encoding, left=None, right=None, pairs=None, weight=None):
         """Left proposition(s) implies right proposition(s)
 
         Constraint is added directly by calling this function.
@@ -906,12 +2264,29 @@ class constraint:
         right : list
             Propositional variables for the right side of an
             implication.
+        pairs : iterable
+            Optional; instead of left and right, (left, right) pairs
+            of propositions where each left implies its right, such
+            as those found by the functions of bauhaus/pairs.py.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
 
         Example
         -------
         ``constraint.add_implies_all(encoding, left=[Obj, 'hello'], right=['goodbye'])``
 
+        ``constraint.add_implies_all(encoding, pairs=pairs.edges(nodes, graph, "id"))``
+
         """
+        if pairs is not None:
+            if left or right:
+                raise ValueError("Provide either the left and right sides"
+                                 " or the pairs of an implies all"
+                                 " constraint, not both.")
+            return constraint._constraint_by_function(
+                encoding, cbuilder.implies_all, pairs=pairs, weight=weight
+            )
         if not (left and right):
             raise ValueError(
                 f"You are trying to create an implies all"
@@ -922,10 +2297,10 @@ class constraint:
         left = tuple(flatten([left]))
         right = tuple(flatten([right]))
         return constraint._constraint_by_function(
-            encoding, cbuilder.implies_all, left=left, right=right
+            encoding, cbuilder.implies_all, left=left, right=right, weight=weight
         )
 
-    def add_none_of(encoding: Encoding, *args):
+    def add_none_of(encoding: Encoding, *args, weight=None):
         """None of the propositional variables are True
 
         Constraint is added directly with this function.
@@ -934,13 +2309,16 @@ class constraint:
         ---------
         encoding : Encoding
             Given encoding.
+        weight : int
+            Optional; makes the constraint soft, violated at this
+            cost, see ``Encoding.add_soft``.
 
         Example
         -------
         ``@constraint.add_none_of(encoding, [Obj, Class, Class.method])``
 
         """
-        return constraint._constraint_by_function(encoding, cbuilder.none_of, args=args)
+        return constraint._constraint_by_function(encoding, cbuilder.none_of, args=args, weight=weight)
 
 
 def print_theory(theory: Optional[dict], format: str = "truth"):
@@ -0,0 +1,389 @@
+"""Model counting over a theory compiled once.
+
+count_solutions and likelihood in bauhaus/utils.py compile their theory
+to a smooth d-DNNF with dsharp. A CompiledTheory keeps that d-DNNF, so the
+number of models under any literals is counted by conditioning it rather
+than compiling the theory again: the leaves that contradict the literals
+count zero models and the others one, and the counts are summed at Or
+nodes and multiplied at And nodes in one pass from the leaves up.
+
+A second pass, from the root down, gives the derivative of the count with
+respect to each leaf, which in a smooth d-DNNF is the number of models in
+which the leaf is true. This gives the marginals of every variable at once,
+see CompiledTheory.marginals.
+
+When dsharp is not installed, a ModelCounter counts models without it
+(backend="builtin"): a search that propagates unit clauses, splits the
+clauses left into connected components, counts each component separately
+and remembers the count of each component for later calls.
+
+Models are counted over the variables of the theory, not its auxiliary
+variables (nnf.Aux), which the encodings of cardinality constraints add
+and which can take more than one value in a model. A ModelCounter projects
+them away: it splits on the other variables first, and a component left
+with only auxiliary variables counts one model if it is satisfiable. A
+d-DNNF cannot be projected that way, so a CompiledTheory refuses theories
+with auxiliary variables, and compile_theory counts them with a
+ModelCounter instead. Tseitin gates, which are determined by their inputs,
+are projected away like any other auxiliary variable without changing the
+count.
+
+Theories are compiled by compile_theory, which keeps the compilation of
+each theory for as long as the theory itself is alive.
+
+"""
+import weakref
+from collections import Counter
+
+from nnf import Var, Aux, And, Or, dsharp
+
+
+class CompiledTheory:
+    """A theory compiled to smooth d-DNNF for counting its models.
+
+    Models are counted over the variables of the theory and of the
+    literals they are counted under, as in count_solutions.
+
+    Attributes
+    ----------
+    dnnf : nnf.NNF
+        Smooth d-DNNF equivalent to theory, or None if theory is
+        unsatisfiable.
+    variables : frozenset
+        Names of the variables of dnnf.
+
+    """
+
+    def __init__(self, theory, dnnf=None):
+        """
+        Arguments
+        ---------
+        theory : nnf.NNF
+        dnnf : nnf.NNF
+            Optional; a smooth d-DNNF equivalent to theory, by default
+            compiled with dsharp.
+
+        """
+        if dnnf is None:
+            if any(isinstance(name, Aux) for name in theory.vars()):
+                raise ValueError("The theory has auxiliary variables, which would"
+                                 " be counted as if they were propositions;"
+                                 " count its models with backend='builtin'.")
+            if theory.satisfiable():
+                dnnf = dsharp.compile(theory.to_CNF(simplify=False), smooth=True)
+        self.dnnf = dnnf
+        # nodes of dnnf, each after its children
+        self._nodes = _postorder(dnnf) if dnnf is not None else []
+        self.variables = frozenset(node.name for node in self._nodes
+                                   if isinstance(node, Var))
+
+    def count(self, literals=()) -> int:
+        """Returns the number of models in which every literal is true.
+
+        Arguments
+        ---------
+        literals : iterable of nnf.Var
+
+        """
+        if self.dnnf is None:
+            return 0
+        assignment = dict()
+        for lit in literals:
+            if assignment.setdefault(lit.name, lit.true) != lit.true:
+                return 0
+        return self._upward(assignment)[id(self.dnnf)]
+
+    def marginals(self, names) -> dict:
+        """Returns the number of models in which each variable is true.
+
+        A variable that is not in the theory is true in every model,
+        since models are counted over the variables of the theory
+        and the literals.
+
+        Arguments
+        ---------
+        names : iterable
+            Names of variables.
+
+        Returns
+        -------
+        counts : dict
+            key: name, value: int
+
+        """
+        names = list(names)
+        if self.dnnf is None:
+            return dict.fromkeys(names, 0)
+        values = self._upward()
+        derivatives = {id(self.dnnf): 1}
+        true = dict()
+        for node in reversed(self._nodes):
+            derivative = derivatives.pop(id(node), 0)
+            if isinstance(node, Var):
+                if node.true:
+                    true[node.name] = true.get(node.name, 0) + derivative
+            elif not derivative:
+                continue
+            elif isinstance(node, Or):
+                for child in node.children:
+                    derivatives[id(child)] = derivatives.get(id(child), 0) + derivative
+            else:
+                # the product of the values of the other children
+                children = list(node.children)
+                suffix = [1] * (len(children) + 1)
+                for i in range(len(children) - 1, -1, -1):
+                    suffix[i] = suffix[i + 1] * values[id(children[i])]
+                prefix = derivative
+                for i, child in enumerate(children):
+                    derivatives[id(child)] = (derivatives.get(id(child), 0)
+                                              + prefix * suffix[i + 1])
+                    prefix *= values[id(child)]
+        total = values[id(self.dnnf)]
+        return {name: true.get(name, 0) if name in self.variables else total
+                for name in names}
+
+    def _upward(self, assignment=None) -> dict:
+        """Returns the number of models of each node, by id, under the
+        given assignment of names to bool."""
+        values = dict()
+        for node in self._nodes:
+            if isinstance(node, Var):
+                if assignment is None:
+                    values[id(node)] = 1
+                else:
+                    value = assignment.get(node.name, node.true)
+                    values[id(node)] = 1 if value == node.true else 0
+            elif isinstance(node, Or):
+                values[id(node)] = sum(values[id(child)] for child in node.children)
+            else:
+                value = 1
+                for child in node.children:
+                    value *= values[id(child)]
+                    if not value:
+                        break
+                values[id(node)] = value
+        return values
+
+
+def _postorder(root) -> list:
+    """Returns the distinct nodes of root, each after its children."""
+    order = []
+    seen = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        if isinstance(node, (And, Or)):
+            stack.extend((child, False) for child in node.children
+                         if id(child) not in seen)
+    return order
+
+
+class ModelCounter:
+    """Counts the models of a theory by a search over its clauses.
+
+    The counts of the components met during the search are cached
+    between calls, so counting the same theory under other literals
+    mostly reuses them. Models are counted over the variables of the
+    theory converted to CNF other than its auxiliary variables, which
+    are projected away.
+
+    Attributes
+    ----------
+    variables : frozenset
+        Names of the variables of the CNF.
+
+    """
+
+    # counts of components kept at most
+    CACHE_SIZE = 100000
+
+    def __init__(self, theory):
+        self._numbers = dict()
+        cnf = theory.to_CNF(simplify=False)
+        clauses = set()
+        for clause in cnf.children if isinstance(cnf, And) else [cnf]:
+            lits = set()
+            for var in clause.children if isinstance(clause, Or) else [clause]:
+                number = self._numbers.setdefault(var.name, len(self._numbers) + 1)
+                lits.add(number if var.true else -number)
+            if not any(-lit in lits for lit in lits):
+                clauses.add(frozenset(lits))
+        self.variables = frozenset(self._numbers)
+        self._auxiliary = frozenset(number for name, number in self._numbers.items()
+                                    if isinstance(name, Aux))
+        self._clauses = frozenset(clauses)
+        self._cache = dict()
+
+    def count(self, literals=()) -> int:
+        """Returns the number of models in which every literal is true.
+
+        Arguments
+        ---------
+        literals : iterable of nnf.Var
+
+        """
+        units = [self._numbers[lit.name] * (1 if lit.true else -1)
+                 for lit in literals if lit.name in self._numbers]
+        return self._count_reduced(self._clauses,
+                                   len(self._numbers) - len(self._auxiliary), units)
+
+    def marginals(self, names) -> dict:
+        """Returns the number of models in which each variable is true,
+        as CompiledTheory.marginals."""
+        total = self.count()
+        return {name: self.count([Var(name)]) if name in self.variables else total
+                for name in names}
+
+    def _count_reduced(self, clauses, size, units) -> int:
+        """Returns the number of models over size variables that are not
+        auxiliary, those of clauses and others that are free, in which
+        units are true."""
+        clauses, assigned = _propagate(clauses, units)
+        if clauses is None:
+            return 0
+        count = 2 ** (size - self._shown(abs(lit) for lit in assigned)
+                      - self._shown(_variables(clauses)))
+        for component in _components(clauses):
+            count *= self._count(component)
+            if not count:
+                break
+        return count
+
+    def _count(self, clauses) -> int:
+        """Returns the number of models of a component over its
+        variables."""
+        count = self._cache.get(clauses)
+        if count is not None:
+            return count
+        occurrences = Counter(abs(lit) for clause in clauses for lit in clause)
+        shown = [var for var in occurrences if var not in self._auxiliary]
+        if shown:
+            var = max(shown, key=occurrences.get)
+            count = (self._count_reduced(clauses, len(shown), [var])
+                     + self._count_reduced(clauses, len(shown), [-var]))
+        else:
+            # only auxiliary variables are left: one model if satisfiable
+            var = max(occurrences, key=occurrences.get)
+            count = (self._count_reduced(clauses, 0, [var])
+                     or self._count_reduced(clauses, 0, [-var]))
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[clauses] = count
+        return count
+
+    def _shown(self, numbers) -> int:
+        """Returns how many of numbers are not auxiliary."""
+        return sum(1 for number in numbers if number not in self._auxiliary)
+
+
+def _variables(clauses) -> set:
+    return {abs(lit) for clause in clauses for lit in clause}
+
+
+def _propagate(clauses, units) -> tuple:
+    """Sets the units and the unit clauses that follow true.
+
+    Returns
+    -------
+    (clauses, assigned) : tuple
+        The clauses not yet satisfied, without their false literals,
+        and the set of literals set true. (None, None) on a conflict.
+
+    """
+    pending = list(units)
+    pending.extend(next(iter(clause)) for clause in clauses if len(clause) == 1)
+    assigned = set()
+    while pending:
+        lit = pending.pop()
+        if lit in assigned:
+            continue
+        if -lit in assigned:
+            return None, None
+        assigned.add(lit)
+        reduced = set()
+        for clause in clauses:
+            if lit in clause:
+                continue
+            if -lit in clause:
+                clause = clause - {-lit}
+                if not clause:
+                    return None, None
+                if len(clause) == 1:
+                    pending.extend(clause)
+            reduced.add(clause)
+        clauses = reduced
+    return frozenset(clauses), assigned
+
+
+def _components(clauses) -> list:
+    """Splits clauses into groups that share no variables."""
+    parent = dict()
+
+    def find(var):
+        root = var
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while var != root:
+            parent[var], var = root, parent.get(var, var)
+        return root
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for lit in clause:
+            root = find(abs(lit))
+            if root != first:
+                parent[root] = first
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return [frozenset(group) for group in groups.values()]
+
+
+BACKENDS = ("dsharp", "builtin")
+
+# key: (id of a theory, backend), value: its compilation; an entry is
+# removed when its theory is collected
+_compiled = dict()
+
+
+def compile_theory(theory, backend="dsharp"):
+    """Returns theory compiled for counting, reusing its compilation
+    for as long as the same theory object is alive.
+
+    Arguments
+    ---------
+    theory : nnf.NNF
+    backend : str
+        "dsharp" for a CompiledTheory or "builtin" for a ModelCounter,
+        which does not need dsharp. A theory with auxiliary variables
+        is always counted by a ModelCounter, which projects them away.
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+    key = (id(theory), backend)
+    entry = _compiled.get(key)
+    if entry is not None and entry[0]() is theory:
+        return entry[1]
+    if backend == "dsharp" and not any(isinstance(name, Aux) for name in theory.vars()):
+        compiled = CompiledTheory(theory)
+    else:
+        compiled = ModelCounter(theory)
+    _compiled[key] = (weakref.ref(theory, _forget(key)), compiled)
+    return compiled
+
+
+def _forget(key):
+    """Returns a callback removing the entry of key once its theory
+    is collected."""
+    def forget(ref):
+        if key in _compiled and _compiled[key][0] is ref:
+            del _compiled[key]
+    return forget
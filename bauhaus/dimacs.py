@@ -0,0 +1,98 @@
+"""Streaming DIMACS CNF output for Encoding.write_dimacs.
+
+Clauses are written in chunks, one constraint at a time, so the theory is
+never held in memory as a whole. The header, which needs the number of
+clauses, is written last: a seekable uncompressed file gets a blank line
+of fixed width at its start that is overwritten at the end, and any other
+output is first spooled to a temporary file.
+
+"""
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+
+
+COMPRESSIONS = (None, "gzip", "xz")
+
+# wide enough for "p cnf" and two 64-bit counts
+HEADER_WIDTH = 48
+
+
+def compression(path) -> str:
+    """Returns the compression implied by the extension of a path."""
+    return {".gz": "gzip", ".xz": "xz"}.get(os.path.splitext(path)[1])
+
+
+def _lines(clauses) -> bytes:
+    return "".join([" ".join(map(str, clause)) + " 0\n"
+                    for clause in clauses]).encode()
+
+
+def write(chunks, table, out, compress=None) -> tuple:
+    """Writes clauses as DIMACS CNF to a binary file object.
+
+    Arguments
+    ---------
+    chunks : iterable of list[list[int]]
+        Clauses over the literals of table, in chunks.
+    table : bauhaus.variables.VariableTable
+        Checked for the number of variables once every chunk is
+        written.
+    out : binary file object
+    compress : str
+        One of COMPRESSIONS.
+
+    Returns
+    -------
+    (variables, clauses) : tuple[int, int]
+        The counts given in the header.
+
+    """
+    if compress not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compress}', expected"
+                         f" one of {COMPRESSIONS}.")
+
+    def header(count) -> bytes:
+        return f"p cnf {len(table)} {count}".ljust(HEADER_WIDTH).encode() + b"\n"
+
+    count = 0
+    if compress is None and out.seekable():
+        start = out.tell()
+        out.write(b" " * HEADER_WIDTH + b"\n")
+        for clauses in chunks:
+            out.write(_lines(clauses))
+            count += len(clauses)
+        end = out.tell()
+        out.seek(start)
+        out.write(header(count))
+        out.seek(end)
+        return len(table), count
+
+    with tempfile.TemporaryFile() as spool:
+        for clauses in chunks:
+            spool.write(_lines(clauses))
+            count += len(clauses)
+        spool.seek(0)
+        if compress == "gzip":
+            stream = gzip.GzipFile(fileobj=out, mode="wb")
+        elif compress == "xz":
+            stream = lzma.LZMAFile(out, "wb")
+        else:
+            stream = out
+        try:
+            stream.write(header(count))
+            shutil.copyfileobj(spool, stream)
+        finally:
+            if stream is not out:
+                stream.close()
+    return len(table), count
+
+
+def write_names(table, out):
+    """Writes the number and name of each named variable of table,
+    separated by a tab, one per line, to a text file object."""
+    for number in range(1, len(table) + 1):
+        if not table.is_auxiliary(number):
+            out.write(f"{number}\t{table.name(number)}\n")
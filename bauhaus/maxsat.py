@@ -0,0 +1,137 @@
+"""Weighted MaxSAT over the soft constraints of an Encoding.
+
+Soft constraints (Encoding.soft_constraints) may be violated at the cost of
+their weight. Encoding.optimize finds a solution of the hard constraints
+that minimizes the total weight of the soft constraints it violates.
+
+The problem is given to the solver as weighted CNF: the clauses of the hard
+constraints, and for each soft constraint one soft unit clause. A soft
+constraint of more than one clause is relaxed by a fresh variable, added to
+each of its clauses, and its soft unit asserts that the relaxation variable
+is false. Soft custom constraints are converted with the encoding of
+bauhaus/tseitin.py, but with gates of their own, since their definitions
+are relaxed with them.
+
+Two backends solve it:
+
+- "rc2", the core-guided RC2 solver of the pysat extra,
+- "builtin", a linear search without pysat: each solution found bounds the
+  cost of the next with a pseudo-Boolean constraint over the violated soft
+  clauses (bauhaus/pseudo_boolean.py), until no cheaper solution exists.
+  Every step solves the clauses again with nnf's native solver, so it suits
+  small problems.
+
+"""
+from nnf import Var
+
+from . import pseudo_boolean, tseitin as _tseitin
+from .solver import _BuiltinSolver
+
+
+BACKENDS = ("rc2", "builtin")
+
+
+def optimize(encoding, backend="rc2") -> tuple:
+    """Returns a solution of the encoding that minimizes the weight
+    of its violated soft constraints, and that weight.
+
+    Arguments
+    ---------
+    encoding : Encoding
+    backend : str
+        One of BACKENDS.
+
+    Returns
+    -------
+    (solution, cost) : tuple
+        solution is a dict, key: proposition or variable name, value:
+        bool, and cost an int. (None, None) if the hard constraints
+        are unsatisfiable.
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+    hard = encoding.compile(format="ints")
+    table = encoding.variables
+    allocated = table.allocated = []
+    try:
+        soft = _soft_units(encoding, hard)
+        if backend == "rc2":
+            model, cost = _rc2(hard, soft)
+        else:
+            model, cost = _linear_search(hard, soft, table.new_var)
+    finally:
+        table.allocated = None
+        table.release(allocated)
+    if model is None:
+        return None, None
+    return table.decode(model), cost
+
+
+def _soft_units(encoding, hard) -> list:
+    """Adds the relaxed clauses of the soft constraints to hard.
+
+    Returns
+    -------
+    soft : list
+        (literal, weight) pairs; the weight is paid when the literal
+        is false.
+
+    """
+    table = encoding.variables
+    soft = []
+    for constraint, weight in encoding.soft_constraints.items():
+        if constraint in encoding._builds:
+            clauses = list(encoding._builds[constraint].clauses)
+        elif isinstance(constraint, Var):
+            clauses = [[table.literal(constraint)]]
+        else:
+            clauses = _tseitin.to_clauses(constraint.compile(), table, dict())
+        if not clauses:
+            continue
+        if len(clauses) == 1 and len(clauses[0]) == 1:
+            soft.append((clauses[0][0], weight))
+            continue
+        relax = table.new_var()
+        hard.extend(clause + [relax] for clause in clauses)
+        soft.append((-relax, weight))
+    return soft
+
+
+def _rc2(hard, soft) -> tuple:
+    try:
+        from pysat.examples.rc2 import RC2
+        from pysat.formula import WCNF
+    except ImportError:
+        raise ImportError("The 'rc2' backend needs the pysat extra:"
+                          " pip install bauhaus[pysat]."
+                          " Use backend='builtin' to optimize without it.")
+    formula = WCNF()
+    formula.extend(hard)
+    for lit, weight in soft:
+        formula.append([lit], weight=weight)
+    with RC2(formula) as rc2:
+        model = rc2.compute()
+        return (None, None) if model is None else (model, rc2.cost)
+
+
+def _linear_search(hard, soft, new_var) -> tuple:
+    solver = _BuiltinSolver()
+    for clause in hard:
+        solver.add_clause(clause)
+    best = cost = None
+    while solver.solve():
+        model = solver.get_model()
+        assigned = {abs(lit) for lit in model}
+        # soft literals in no clause are free to be true
+        model.extend(lit for lit, _ in soft if abs(lit) not in assigned)
+        true = set(model)
+        best = model
+        cost = sum(weight for lit, weight in soft if lit not in true)
+        if not cost:
+            break
+        for clause in pseudo_boolean.weighted_at_most(
+                [-lit for lit, _ in soft], new_var,
+                [weight for _, weight in soft], cost - 1):
+            solver.add_clause(clause)
+    return best, cost
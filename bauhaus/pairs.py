@@ -0,0 +1,208 @@
+"""Finding the pairs of objects related by their keys.
+
+utils.compute_pairs calls a predicate on every ordered pair of its inputs,
+which takes quadratic time. The functions here join objects on the values
+of a key instead, by hashing or by sorting, in time linear in the number
+of objects and of pairs found:
+
+- ``equal``: pairs whose keys are equal,
+- ``between``: pairs whose keys differ by an amount within a range,
+- ``edges``: pairs given as a list of pairs of keys.
+
+Keys are an attribute name, a tuple of attribute names, or a function of
+an object. Their results are Pairs, which can be passed as the pairs
+argument of ``constraint.add_at_most_one`` and ``constraint.add_implies_all``
+to add a clause for each pair.
+
+``between`` sorts the keys with NumPy when it is installed and the keys
+are numbers.
+
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import combinations
+
+from .utils import groupby_key
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Pairs(tuple):
+    """Tuple of (left, right) pairs of objects.
+
+    Its hash is computed once, since a constraint made from the pairs
+    is hashed whenever it is looked up.
+    """
+
+    def __new__(cls, pairs):
+        pairs = super().__new__(cls, map(tuple, pairs))
+        for pair in pairs:
+            if len(pair) != 2:
+                raise ValueError(f"Expected pairs of objects, but got {pair}.")
+        return pairs
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = super().__hash__()
+            return self._hash
+
+
+def _key_function(key):
+    function = groupby_key(key)
+    if function is not None:
+        return function
+    if callable(key):
+        return key
+    raise TypeError(f"The key {key} is not an attribute name, a tuple"
+                    " of attribute names or a function.")
+
+
+def equal(objects, key, others=None, ordered=False) -> Pairs:
+    """Returns the pairs of objects whose keys are equal.
+
+    Arguments
+    ---------
+    objects : iterable
+    key : str, tuple of str or function
+    others : iterable
+        Optional; the objects to pair each of objects with. Default
+        is to pair objects with each other, never an object with
+        itself.
+    ordered : bool
+        Default is False. When objects are paired with each other,
+        each pair is returned once, as (first, second) in the order
+        of objects, unless ordered is True, when it is also returned
+        as (second, first).
+
+    Returns
+    -------
+    pairs : Pairs
+
+    Examples
+    --------
+
+    ``pairs.equal(cells, ("row", "value"))``
+
+    """
+    key = _key_function(key)
+    if others is None:
+        groups = defaultdict(list)
+        for obj in objects:
+            groups[key(obj)].append(obj)
+        pairs = []
+        for group in groups.values():
+            pairs.extend(combinations(group, 2))
+        if ordered:
+            pairs.extend([(b, a) for a, b in pairs])
+        return Pairs(pairs)
+
+    index = defaultdict(list)
+    for obj in others:
+        index[key(obj)].append(obj)
+    return Pairs((a, b) for a in objects
+                 for b in index.get(key(a), ())
+                 if a is not b)
+
+
+def between(objects, key, low, high, others=None) -> Pairs:
+    """Returns the pairs (a, b) with low <= key(b) - key(a) <= high.
+
+    Arguments
+    ---------
+    objects : iterable
+        The first object of each pair.
+    key : str, tuple of str or function
+        Its values must be numbers, or support subtraction and
+        comparison with them.
+    low : number
+    high : number
+    others : iterable
+        Optional; the second object of each pair. Default is
+        objects, and an object is never paired with itself.
+
+    Returns
+    -------
+    pairs : Pairs
+        Ordered by the first object, then by the key of the second.
+
+    Examples
+    --------
+
+    Cells of a row at most two columns to the right of each other:
+
+    ``pairs.between(row, "col", 1, 2)``
+
+    """
+    if low > high:
+        raise ValueError(f"The range [{low}, {high}] is empty.")
+    key = _key_function(key)
+    objects = list(objects)
+    others = objects if others is None else list(others)
+    keys = [key(obj) for obj in objects]
+    other_keys = [key(obj) for obj in others]
+
+    starts = stops = None
+    if numpy is not None and objects and others:
+        left = numpy.asarray(keys)
+        right = numpy.asarray(other_keys)
+        for values in (left, right):
+            if values.ndim != 1:
+                raise TypeError(f"The keys of pairs.between must be numbers,"
+                                f" not values of shape {values.shape[1:]}.")
+        if left.dtype.kind in "iuf" and right.dtype.kind in "iuf":
+            order = numpy.argsort(right, kind="stable")
+            sorted_keys = right[order]
+            starts = numpy.searchsorted(sorted_keys, left + low, "left").tolist()
+            stops = numpy.searchsorted(sorted_keys, left + high, "right").tolist()
+            order = order.tolist()
+    if starts is None:
+        order = sorted(range(len(others)), key=other_keys.__getitem__)
+        sorted_keys = [other_keys[i] for i in order]
+        starts = [bisect_left(sorted_keys, k + low) for k in keys]
+        stops = [bisect_right(sorted_keys, k + high) for k in keys]
+
+    ordered_others = [others[i] for i in order]
+    pairs = []
+    for a, start, stop in zip(objects, starts, stops):
+        pairs.extend((a, b) for b in ordered_others[start:stop] if a is not b)
+    return Pairs(pairs)
+
+
+def edges(objects, pairs, key) -> Pairs:
+    """Returns the pairs of objects whose keys are given in pairs.
+
+    Arguments
+    ---------
+    objects : iterable
+    pairs : iterable
+        (left key, right key) pairs, such as the edges of a graph
+        between the keys of objects. Every object with the key is
+        paired.
+    key : str, tuple of str or function
+
+    Returns
+    -------
+    pairs : Pairs
+
+    Examples
+    --------
+
+    ``pairs.edges(cities, roads, "name")``
+
+    """
+    key = _key_function(key)
+    index = defaultdict(list)
+    for obj in objects:
+        index[key(obj)].append(obj)
+    result = []
+    for left, right in pairs:
+        if left not in index or right not in index:
+            missing = right if left in index else left
+            raise ValueError(f"No object has the key {missing}.")
+        result.extend((a, b) for a in index[left] for b in index[right])
+    return Pairs(result)
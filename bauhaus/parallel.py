@@ -0,0 +1,214 @@
+"""Builds constraints in a pool of processes for Encoding.compile(workers=N).
+
+The parent gathers and groups the inputs of every constraint, see
+_ConstraintBuilder.groups, which numbers them all in the encoding's
+variable table, and reuses the groups of earlier builds. Each worker
+receives the constraints and a copy of the table, and each task only the
+groups it encodes: the groups of a constraint with a groupby are split
+between the workers, and the other constraints are encoded whole by one
+worker. The variables of the groups are sent as their numbers, so the
+propositions are not pickled with the tasks. Constraints over
+bauhaus.pairs.Pairs are built by the parent.
+
+Workers number the auxiliary variables they create above the size of the
+table they were given. The results are merged in task order and these
+numbers are replaced with numbers of the encoding's table, so the theory
+does not depend on how the work was scheduled.
+
+"""
+import io
+import multiprocessing
+import pickle
+import types
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from nnf import Var
+
+from .utils import find_global, Resolver
+
+
+# snapshot given to each worker: (constraints, table)
+_snapshot = None
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles the functions wrapped by decorators by reference.
+
+    The name of a decorated class or method refers to its outermost
+    wrapper, which the standard pickler requires to be the function.
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, types.FunctionType):
+            try:
+                target = find_global(obj.__module__, obj.__qualname__)
+            except Exception:
+                return NotImplemented
+            depth = 0
+            while target is not obj and hasattr(target, "__wrapped__"):
+                target = target.__wrapped__
+                depth += 1
+            if target is obj and depth:
+                return _unwrap, (obj.__module__, obj.__qualname__, depth)
+        return NotImplemented
+
+
+def _unwrap(module, qualname, depth):
+    obj = find_global(module, qualname)
+    for _ in range(depth):
+        obj = obj.__wrapped__
+    return obj
+
+
+def _dumps(obj) -> bytes:
+    buffer = io.BytesIO()
+    _Pickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+def _initialize_pickled(data):
+    _initialize(*pickle.loads(data))
+
+
+def _initialize(constraints, table):
+    global _snapshot
+    # every auxiliary variable of a worker gets a new number
+    table._free = []
+    _snapshot = (constraints, table)
+
+
+def _build(task):
+    """Encodes the groups of one constraint given to a worker.
+
+    Returns
+    -------
+    parts : list
+        The part of each group, see _ConstraintBuilder.build_group.
+
+    """
+    index, groups = task
+    constraints, table = _snapshot
+    constraint = constraints[index]
+    return [constraint.build_group(table, *_variables(group, table))
+            for group in groups]
+
+
+class _Literal(int):
+    """The number of a variable of a group sent to a worker."""
+
+
+def _literals(obj, table):
+    """Replaces the nnf.Var in the arguments of a group with their
+    numbers in table."""
+    if isinstance(obj, Var):
+        return _Literal(table.literal(obj))
+    if isinstance(obj, dict):
+        return {_literals(key, table): _literals(value, table)
+                for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return type(obj)(_literals(item, table) for item in obj)
+    return obj
+
+
+def _variables(obj, table):
+    """Inverse of _literals, in a worker."""
+    if isinstance(obj, _Literal):
+        return table.var(obj)
+    if isinstance(obj, dict):
+        return {_variables(key, table): _variables(value, table)
+                for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return type(obj)(_variables(item, table) for item in obj)
+    return obj
+
+
+def build(constraints, previous, propositions, table, workers, resolver=None) -> list:
+    """Builds constraints in a pool of processes.
+
+    Arguments
+    ---------
+    constraints : list[_ConstraintBuilder]
+    previous : list[dict]
+        The parts of an earlier build of each constraint, which are
+        reused for the groups that did not change.
+    propositions : defaultdict(weakref.WeakValueDictionary)
+    table : bauhaus.variables.VariableTable
+    workers : int
+        Number of processes.
+    resolver : bauhaus.utils.Resolver
+        Optional; see _ConstraintBuilder.build_parts.
+
+    Returns
+    -------
+    parts : list[dict]
+        The parts of each constraint, numbered in table. None if the
+        snapshot cannot be sent to the workers, which then warns.
+
+    """
+    if resolver is None:
+        resolver = Resolver(propositions)
+    merged = [dict() for _ in constraints]
+    tasks = []
+    for index, constraint in enumerate(constraints):
+        if constraint._pairs is not None:
+            merged[index] = constraint.build_parts(propositions, table, previous[index],
+                                                   resolver=resolver)
+            continue
+        keys, groups = [], []
+        for key, group in constraint.groups(propositions, table, resolver).items():
+            # kept in the order of the groups, as by build_parts
+            merged[index][key] = previous[index].get(key)
+            if merged[index][key] is None:
+                keys.append(key)
+                groups.append(_literals(group, table))
+        slots = workers if constraint._groupby else 1
+        for slot in range(min(slots, len(groups))):
+            tasks.append((index, keys[slot::slots], groups[slot::slots]))
+
+    if not tasks:
+        return merged
+    context = multiprocessing.get_context()
+    initializer = _initialize
+    initargs = (constraints, table)
+    if context.get_start_method() != "fork":
+        # workers that do not inherit the snapshot must unpickle it
+        try:
+            initargs = (_dumps(initargs),)
+        except Exception as e:
+            warnings.warn(f"Building the constraints in one process since"
+                          f" they cannot be sent to workers: {e}")
+            return None
+        initializer = _initialize_pickled
+
+    size = len(table)
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=context,
+                             initializer=initializer,
+                             initargs=initargs) as executor:
+        results = list(executor.map(_build, [(index, groups)
+                                             for index, _, groups in tasks]))
+
+    for (index, keys, _), parts in zip(tasks, results):
+        for key, part in zip(keys, parts):
+            merged[index][key] = _renumber(part, size, table)
+    return merged
+
+
+def _renumber(part, size, table) -> tuple:
+    """Replaces the worker's numbers above size in the part of a build."""
+    clauses, allocated, outputs = part
+    numbers = {number: table.new_var() for number in allocated}
+
+    def literal(lit):
+        if lit > 0:
+            return numbers[lit]
+        return -numbers[-lit]
+
+    clauses = [clause if all(-size <= lit <= size for lit in clause)
+               else [lit if -size <= lit <= size else literal(lit)
+                     for lit in clause]
+               for clause in clauses]
+    if outputs is not None:
+        outputs = [lit if -size <= lit <= size else literal(lit) for lit in outputs]
+    return clauses, [numbers[number] for number in allocated], outputs
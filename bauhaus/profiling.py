@@ -0,0 +1,127 @@
+"""Statistics of the constraints built by a compile.
+
+``Encoding.compile(stats=True)`` measures each constraint with a Profiler
+and leaves the results in ``Encoding.last_compile_stats``, keyed by the
+_ConstraintBuilder or custom constraint. The statistics of a builder are
+
+- ``built``: whether any group of its inputs was encoded by this compile
+  rather than cached,
+- ``build_seconds``: time spent building its clauses,
+- ``cnf_seconds``: time spent translating them to NNF, for format="nnf",
+- ``clauses``, ``literals``: the size of its clauses,
+- ``auxiliary``: the number of auxiliary variables of its clauses,
+- ``peak_bytes``: the peak memory allocated while building, traced with
+  tracemalloc,
+- ``partitions``: the number of inputs of each group of its groupby,
+
+and those of a custom constraint ``cnf_seconds`` and, when converted to
+clauses, ``clauses`` and ``literals``. Build times and peaks are None
+for builders built in other processes (``compile(workers=N)``).
+
+The callbacks ``Encoding.on_builder_start(builder)`` and
+``Encoding.on_builder_finish(builder, stats)`` are called around the
+build of each builder, with or without ``stats=True``.
+
+"""
+import time
+import tracemalloc
+
+from .clause_store import ClauseStore
+
+
+class Profiler:
+    """Collects the statistics of the constraints of one compile.
+
+    Attributes
+    ----------
+    stats : dict
+        key: _ConstraintBuilder or custom constraint, value: dict
+        of statistics.
+    memory : bool
+        Whether peak allocations are traced.
+
+    """
+
+    def __init__(self, encoding, memory=True):
+        self.encoding = encoding
+        self.memory = memory
+        self.stats = dict()
+        self._started = dict()
+        self._tracing = memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def close(self) -> dict:
+        """Stops tracing memory and returns the statistics."""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return self.stats
+
+    def start(self, constraint, timed=True):
+        """Called before building a _ConstraintBuilder."""
+        hook = self.encoding.on_builder_start
+        # a build in other processes that failed is started again
+        if hook is not None and constraint not in self._started:
+            hook(constraint)
+        if not timed:
+            self._started[constraint] = None
+            return
+        current = None
+        if self.memory:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+        self._started[constraint] = (time.perf_counter(), current)
+
+    def finish(self, constraint, parts, previous=None):
+        """Called with the parts of a _ConstraintBuilder once built,
+        and those of its previous build."""
+        started = self._started.pop(constraint)
+        seconds = peak = None
+        if started is not None:
+            start, current = started
+            seconds = time.perf_counter() - start
+            if current is not None:
+                peak = tracemalloc.get_traced_memory()[1] - current
+        built = previous is None or any(previous.get(key) is not part
+                                        for key, part in parts.items())
+        stats = self.record(constraint, parts, built=built)
+        stats["build_seconds"] = seconds
+        stats["peak_bytes"] = peak
+        hook = self.encoding.on_builder_finish
+        if hook is not None:
+            hook(constraint, stats)
+
+    def record(self, constraint, parts, built=False) -> dict:
+        """Records the size of the clauses of a _ConstraintBuilder."""
+        clauses = literals = 0
+        for part, _, _ in parts.values():
+            clauses += len(part)
+            literals += _literals(part)
+        stats = self.stats[constraint] = {
+            "built": built,
+            "build_seconds": 0.0,
+            "cnf_seconds": None,
+            "clauses": clauses,
+            "literals": literals,
+            "auxiliary": sum(len(allocated) for _, allocated, _ in parts.values()),
+            "peak_bytes": None,
+            "partitions": [len(key[0]) for key in parts
+                           if isinstance(key[0], frozenset)],
+        }
+        return stats
+
+    def converted(self, constraint, seconds, clauses=None):
+        """Records the time taken to convert a constraint for the
+        theory, and the clauses of a custom constraint."""
+        stats = self.stats.setdefault(constraint, dict())
+        stats["cnf_seconds"] = seconds
+        if clauses is not None:
+            stats["clauses"] = len(clauses)
+            stats["literals"] = _literals(clauses)
+
+
+def _literals(clauses) -> int:
+    if isinstance(clauses, ClauseStore):
+        return len(clauses.literals)
+    return sum(map(len, clauses))
@@ -0,0 +1,243 @@
+"""Pseudo-Boolean encodings for bauhaus constraints.
+
+Encodes weighted linear constraints sum(w_i * x_i) <= bound over integer
+literals, following the conventions of bauhaus/cardinality.py: clauses
+are lists of DIMACS-style integer literals and auxiliary variables come
+from a ``new_var`` callable.
+
+References
+----------
+Eén & Sörensson, Translating Pseudo-Boolean Constraints into SAT (2006)
+Abío et al., A New Look at BDDs for Pseudo-Boolean Constraints (2012)
+Joshi et al., Generalized Totalizer Encoding for Pseudo-Boolean Constraints (2015)
+
+"""
+from . import cardinality
+
+
+PB_ENCODINGS = (
+    "auto",
+    "bdd",
+    "adder",
+    "generalized_totalizer",
+)
+
+
+def weighted_at_most(lits, new_var, weights, bound, encoding_type="auto") -> list:
+    """The weighted sum of the true literals is at most bound.
+
+    Negative weights are handled by negating their literal, zero
+    weights are dropped and literals heavier than the bound are
+    forced false.
+
+    Arguments
+    ---------
+    lits : list[int]
+    new_var : function
+        Returns a fresh positive integer variable.
+    weights : list[int]
+        Weight of each literal.
+    bound : int
+    encoding_type : str
+        One of PB_ENCODINGS. "auto" uses an at most k encoding
+        when all weights are equal and the BDD encoding otherwise.
+
+    Returns
+    -------
+    clauses : list[list[int]]
+        Contains the empty clause if the constraint is unsatisfiable.
+
+    """
+    encoding_type = cardinality.validate_encoding(encoding_type, PB_ENCODINGS)
+    terms = []
+    for x, w in zip(lits, weights):
+        if not isinstance(w, int):
+            raise TypeError(f"The weight {w} is not an integer.")
+        if w < 0:
+            x, w, bound = -x, -w, bound - w
+        if w:
+            terms.append((x, w))
+    if bound < 0:
+        return [[]]
+
+    clauses = [[-x] for x, w in terms if w > bound]
+    terms = [(x, w) for x, w in terms if w <= bound]
+    if sum(w for _, w in terms) <= bound:
+        return clauses
+
+    if encoding_type == "auto":
+        if len({w for _, w in terms}) == 1:
+            w = terms[0][1]
+            clauses.extend(cardinality.at_most_k([x for x, _ in terms],
+                                                 new_var,
+                                                 bound // w,
+                                                 "auto"))
+            return clauses
+        encoding_type = "bdd"
+    # heaviest first, which keeps the BDD and totalizer small
+    terms.sort(key=lambda t: -t[1])
+    clauses.extend(_PB[encoding_type](terms, new_var, bound))
+    return clauses
+
+
+def _bdd(terms, new_var, bound) -> list:
+    """Reduced BDD over the terms, sharing nodes by bound intervals.
+
+    A node at level i stands for "the terms from i onwards sum to at
+    most K" and is valid for every K in its interval [lo, hi].
+
+    """
+    clauses = []
+    suffix = [0] * (len(terms) + 1)
+    for i in range(len(terms) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + terms[i][1]
+    levels = [[] for _ in terms]
+
+    def build(i, k):
+        # returns (node, lo, hi), node is True, False or a variable
+        if k < 0:
+            return False, float("-inf"), -1
+        if k >= suffix[i]:
+            return True, suffix[i], float("inf")
+        for node, lo, hi in levels[i]:
+            if lo <= k <= hi:
+                return node, lo, hi
+        x, w = terms[i]
+        high, high_lo, high_hi = build(i + 1, k - w)
+        low, low_lo, low_hi = build(i + 1, k)
+        lo, hi = max(high_lo + w, low_lo), min(high_hi + w, low_hi)
+        if high is low or (type(high) is type(low) and high == low):
+            node = low
+        else:
+            node = new_var()
+            # node -> (x -> high) and node -> low
+            if high is not True:
+                clauses.append([-node, -x] + ([high] if high else []))
+            if low is not True:
+                clauses.append([-node] + ([low] if low else []))
+        levels[i].append((node, lo, hi))
+        return node, lo, hi
+
+    root, _, _ = build(0, bound)
+    if root is False:
+        clauses.append([])
+    elif root is not True:
+        clauses.append([root])
+    return clauses
+
+
+def _adder(terms, new_var, bound) -> list:
+    """Network of binary adders compared against the bound.
+
+    The weight of each term is split into its binary digits, the
+    columns are reduced with full and half adders and the resulting
+    binary sum is compared with the bound digit by digit.
+
+    """
+    clauses = []
+    columns = []
+    for x, w in terms:
+        bit = 0
+        while w:
+            if w & 1:
+                while len(columns) <= bit:
+                    columns.append([])
+                columns[bit].append(x)
+            w >>= 1
+            bit += 1
+
+    def carry_into(position, lit):
+        while len(columns) <= position:
+            columns.append([])
+        columns[position].append(lit)
+
+    digits = []
+    position = 0
+    while position < len(columns):
+        column = columns[position]
+        while len(column) >= 3:
+            a, b, c = column.pop(), column.pop(), column.pop()
+            s, carry = new_var(), new_var()
+            # s <-> a xor b xor c
+            for signs in range(8):
+                la = a if signs & 1 else -a
+                lb = b if signs & 2 else -b
+                lc = c if signs & 4 else -c
+                odd = bin(signs).count("1") % 2
+                clauses.append([-la, -lb, -lc, s if odd else -s])
+            # carry <-> majority(a, b, c)
+            for p, q in ((a, b), (a, c), (b, c)):
+                clauses.append([-p, -q, carry])
+                clauses.append([p, q, -carry])
+            column.append(s)
+            carry_into(position + 1, carry)
+        if len(column) == 2:
+            a, b = column.pop(), column.pop()
+            s, carry = new_var(), new_var()
+            clauses.extend([[-a, -b, -s], [a, b, -s], [-a, b, s], [a, -b, s]])
+            clauses.extend([[-a, -b, carry], [a, -carry], [b, -carry]])
+            column.append(s)
+            carry_into(position + 1, carry)
+        digits.append(column[0] if column else None)
+        position += 1
+
+    # the sum is at most the bound unless, at some digit where the bound
+    # has a zero, the sum has a one and matches every higher one digit.
+    # A higher one digit the sum can never reach rules that case out.
+    for i, s in enumerate(digits):
+        if s is None or (bound >> i) & 1:
+            continue
+        clause = [-s]
+        for j in range(i + 1, max(len(digits), bound.bit_length())):
+            if (bound >> j) & 1:
+                if j >= len(digits) or digits[j] is None:
+                    break
+                clause.append(-digits[j])
+        else:
+            clauses.append(clause)
+    return clauses
+
+
+def _generalized_totalizer(terms, new_var, bound) -> list:
+    """Totalizer whose nodes count every attainable weighted sum.
+
+    Sums above the bound are merged into a single overflow output,
+    which is forced false at the root.
+
+    """
+    clauses = []
+
+    def build(terms):
+        if len(terms) == 1:
+            x, w = terms[0]
+            return {w: x}
+        mid = len(terms) // 2
+        left = build(terms[:mid])
+        right = build(terms[mid:])
+        outputs = {}
+        for a in [0] + list(left):
+            for b in [0] + list(right):
+                if not a + b:
+                    continue
+                total = min(a + b, bound + 1)
+                if total not in outputs:
+                    outputs[total] = new_var()
+                clause = [outputs[total]]
+                if a:
+                    clause.append(-left[a])
+                if b:
+                    clause.append(-right[b])
+                clauses.append(clause)
+        return outputs
+
+    outputs = build(terms)
+    if bound + 1 in outputs:
+        clauses.append([-outputs[bound + 1]])
+    return clauses
+
+
+_PB = {
+    "bdd": _bdd,
+    "adder": _adder,
+    "generalized_totalizer": _generalized_totalizer,
+}
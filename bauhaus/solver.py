@@ -0,0 +1,252 @@
+"""Persistent SAT solver sessions over an Encoding.
+
+A Session loads the integer clauses of an encoding into a solver once and
+keeps the solver between calls, so that repeated solves, such as what-if
+queries under different assumptions, reuse everything the solver learnt.
+Solvers come from the pysat extra (``pip install bauhaus[pysat]``), or
+from the "builtin" backend, which solves the clauses again with nnf's
+native solver on each call.
+
+The clauses of each _ConstraintBuilder are guarded by a selector variable
+that is assumed true on every solve. When a builder is built again, for
+example because instances of its class were created, its old clauses are
+retired by asserting the negation of their selector and the new clauses
+are added under a new selector. The bounds of IncrementalBound constraints
+are assumed too, so tightening one reloads nothing. The clauses of custom
+constraints do not change once converted, so they are added unguarded;
+when a custom constraint is removed or converted again, for example after
+the builds are cleared, the solver is loaded again.
+
+"""
+import nnf
+
+from .utils import _nnfify
+
+
+# friendly names of pysat solvers
+SOLVERS = {
+    "cadical": "cadical153",
+    "glucose": "glucose4",
+    "minisat": "minisat22",
+    "lingeling": "lingeling",
+    "maplesat": "maplechrono",
+}
+
+
+class _BuiltinSolver:
+    """The subset of the pysat Solver interface used by Session, with
+    nnf's native solver."""
+
+    def __init__(self):
+        self._clauses = []
+        self._model = None
+
+    def add_clause(self, clause):
+        self._clauses.append(list(clause))
+
+    def solve(self, assumptions=()) -> bool:
+        clauses = self._clauses + [[lit] for lit in assumptions]
+        theory = nnf.And([nnf.Or([nnf.Var(abs(lit), lit > 0) for lit in clause])
+                          for clause in clauses])
+        model = theory.solve() if clauses else dict()
+        self._model = None if model is None else [
+            number if value else -number for number, value in model.items()]
+        return model is not None
+
+    def get_model(self) -> list:
+        return self._model
+
+    def get_core(self):
+        return None
+
+    def delete(self):
+        self._clauses = []
+
+
+def _make_solver(backend):
+    if backend == "builtin":
+        return _BuiltinSolver()
+    try:
+        from pysat.solvers import Solver
+    except ImportError:
+        raise ImportError(f"The '{backend}' solver needs the pysat extra:"
+                          " pip install bauhaus[pysat]."
+                          " Use backend='builtin' to solve without it.")
+    return Solver(name=SOLVERS.get(backend, backend))
+
+
+class Session:
+    """A SAT solver loaded with the clauses of an Encoding.
+
+    Created by Encoding.solver. Constraints added to the encoding, and
+    propositions created, after the session was created are loaded by
+    the next solve.
+
+    Attributes
+    ----------
+    encoding : Encoding
+    backend : str
+        "builtin", a pysat solver name such as "glucose4", or one
+        of the names in SOLVERS.
+
+    """
+
+    def __init__(self, encoding, backend="cadical"):
+        self.encoding = encoding
+        self.backend = backend
+        self._solver = None
+        self._model = None
+        # clauses given to add_clause
+        self._added = []
+        self._reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Frees the solver."""
+        if self._solver is not None:
+            self._solver.delete()
+            self._solver = None
+
+    def _reset(self):
+        self.close()
+        self._solver = _make_solver(self.backend)
+        # builder -> (selector, clauses loaded under it)
+        self._builders = dict()
+        # custom constraint -> clauses loaded
+        self._custom = dict()
+        for clause in self._added:
+            self._solver.add_clause(clause)
+
+    def update(self):
+        """Loads the clauses of the constraints that were added or
+        built again since the last update."""
+        encoding = self.encoding
+        encoding._check_constraints()
+        encoding._update_builds()
+        custom = {constraint: encoding._custom_build(constraint, "ints")
+                  for constraint in encoding._custom_constraints or ()}
+        if any(custom.get(constraint) is not clauses
+               for constraint, clauses in self._custom.items()):
+            self._reset()
+
+        solver = self._solver
+        for constraint, clauses in custom.items():
+            if constraint not in self._custom:
+                for clause in clauses:
+                    solver.add_clause(clause)
+                self._custom[constraint] = clauses
+
+        for constraint in list(self._builders):
+            selector, clauses = self._builders[constraint]
+            build = encoding._builds.get(constraint)
+            if build is None or build.clauses is not clauses:
+                solver.add_clause([-selector])
+                del self._builders[constraint]
+        for constraint in encoding.constraints:
+            if constraint not in self._builders:
+                clauses = encoding._builds[constraint].clauses
+                selector = encoding.variables.reserve()
+                for clause in clauses:
+                    solver.add_clause([-selector] + clause)
+                self._builders[constraint] = (selector, clauses)
+
+    def solve(self, assumptions=()) -> bool:
+        """Returns whether the theory is satisfiable with every
+        assumption true.
+
+        Arguments
+        ---------
+        assumptions : iterable
+            Propositions, their negations or nnf.Var.
+
+        """
+        self.update()
+        return self._solve(assumptions)
+
+    def _solve(self, assumptions=()) -> bool:
+        """Solves the clauses loaded, without updating them."""
+        table = self.encoding.variables
+        self._assumptions = {table.literal(_nnfify(a)): a for a in assumptions}
+        selectors = [selector for selector, _ in self._builders.values()]
+        satisfiable = self._solver.solve(
+            assumptions=list(self._assumptions) + selectors
+            + self.encoding._bounds())
+        self._model = self._solver.get_model() if satisfiable else None
+        return satisfiable
+
+    def models(self, variables, limit=None):
+        """Yields the assignments of variables in the models of the
+        theory, each assignment once.
+
+        After each model, a clause that blocks its assignment of
+        variables is added to the session, so models that differ
+        only in other variables, such as auxiliary ones, are not
+        found again. The constraints are loaded once, before the
+        first model.
+
+        Arguments
+        ---------
+        variables : iterable of nnf.Var
+        limit : int
+            Optional; the most assignments to yield.
+
+        Yields
+        ------
+        assignment : dict
+            key: proposition or variable name, value: bool
+
+        """
+        table = self.encoding.variables
+        numbers = sorted({abs(table.literal(var)) for var in variables})
+        self.update()
+        found = 0
+        while limit is None or found < limit:
+            if not self._solve():
+                return
+            true = set(self._model)
+            # variables in no clause are missing from the model, and
+            # are false until a blocking clause mentions them
+            lits = [number if number in true else -number for number in numbers]
+            yield {table.name(lit): lit > 0 for lit in lits}
+            found += 1
+            if not lits:
+                return
+            self._add([-lit for lit in lits])
+
+    def model(self) -> dict:
+        """Returns the model found by the last solve, or None.
+
+        Returns
+        -------
+        solution : dict
+            key: proposition or variable name, value: bool. Auxiliary
+            variables are left out.
+
+        """
+        if self._model is None:
+            return None
+        return self.encoding.variables.decode(self._model)
+
+    def core(self) -> list:
+        """Returns assumptions of the last solve that are unsatisfiable
+        together, if it was unsatisfiable and the backend finds them,
+        else None."""
+        core = self._solver.get_core() if self._model is None else None
+        if core is None:
+            return None
+        return [self._assumptions[lit] for lit in core if lit in self._assumptions]
+
+    def add_clause(self, clause):
+        """Adds a clause of propositions, their negations or nnf.Var,
+        for the rest of the session."""
+        table = self.encoding.variables
+        self._add([table.literal(_nnfify(lit)) for lit in clause])
+
+    def _add(self, clause):
+        self._added.append(clause)
+        self._solver.add_clause(clause)
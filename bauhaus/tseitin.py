@@ -0,0 +1,138 @@
+"""Definitional CNF conversion for bauhaus theories.
+
+Converts NNF formulas to CNF by naming each nested connective with a gate
+variable, so the output is linear in the size of the formula. The
+conversion is polarity aware (Plaisted & Greenbaum, 1986): in negation
+normal form every connective occurs positively, so each gate only needs
+to imply its connective and never the converse, which halves the clauses
+compared with nnf's full equivalence Tseitin encoding.
+
+Gates are keyed by their connective, so structurally equal subformulas
+share one gate when the same ``gates`` dictionary and variable table are
+passed for every constraint of a theory. ``to_clauses`` works over the
+integer literals of a bauhaus.variables.VariableTable and ``to_CNF``
+translates its output to nnf clauses.
+
+"""
+from nnf import NNF, Var, And, Or
+from .variables import VariableTable
+
+
+def to_CNF(formula: NNF, gates=None, table=None) -> list:
+    """Returns the clauses of a definitional CNF of formula.
+
+    Arguments
+    ---------
+    formula : nnf.NNF
+        Formula in negation normal form, such as the output of
+        ``CustomNNF.compile()`` or ``_ConstraintBuilder.build()``.
+    gates : dict
+        Optional; maps connectives to their gate literals. Pass the
+        same dictionary and table for each formula to share gates
+        between them.
+    table : bauhaus.variables.VariableTable
+        Optional; numbers the variables.
+
+    Returns
+    -------
+    clauses : list[nnf.Or]
+        The clauses are satisfiable together exactly when the formula
+        is, and every model of them satisfies the formula.
+
+    """
+    if table is None:
+        table = VariableTable()
+    return [Or(map(table.var, clause))
+            for clause in to_clauses(formula, table, gates)]
+
+
+def to_clauses(formula: NNF, table, gates=None) -> list:
+    """Returns the integer clauses of a definitional CNF of formula.
+
+    Arguments
+    ---------
+    formula : nnf.NNF
+        Formula in negation normal form, such as the output of
+        ``CustomNNF.compile()`` or ``_ConstraintBuilder.build()``.
+    table : bauhaus.variables.VariableTable
+        Numbers the variables and allocates the gates.
+    gates : dict
+        Optional; maps connectives to their gate literals.
+
+    Returns
+    -------
+    clauses : list[list[int]]
+        The clauses are satisfiable together exactly when the formula
+        is, and every model of them satisfies the formula.
+
+    """
+    if gates is None:
+        gates = dict()
+    clauses = []
+
+    def children(node):
+        # inline nested connectives of the same type
+        for child in node.children:
+            if type(child) is type(node):
+                yield from children(child)
+            else:
+                yield child
+
+    def literal(node):
+        """Returns a literal implying node, or True/False for constants.
+
+        Constants are compared by identity, since 1 == True.
+        """
+        if isinstance(node, Var):
+            return table.literal(node)
+        if node in gates:
+            return gates[node]
+        if isinstance(node, And):
+            lits = [literal(child) for child in children(node)]
+            if any(lit is False for lit in lits):
+                gates[node] = False
+                return False
+            lits = [lit for lit in lits if lit is not True]
+            if not lits:
+                gates[node] = True
+                return True
+            if len(lits) == 1:
+                gates[node] = lits[0]
+                return lits[0]
+            gate = table.new_var()
+            clauses.extend([-gate, lit] for lit in lits)
+        elif isinstance(node, Or):
+            lits = [literal(child) for child in children(node)]
+            if any(lit is True for lit in lits):
+                gates[node] = True
+                return True
+            lits = [lit for lit in lits if lit is not False]
+            if not lits:
+                gates[node] = False
+                return False
+            if len(lits) == 1:
+                gates[node] = lits[0]
+                return lits[0]
+            gate = table.new_var()
+            clauses.append([-gate] + lits)
+        else:
+            raise TypeError(f"Can only convert an NNF object. Given {type(node)}")
+        gates[node] = gate
+        return gate
+
+    def require(node):
+        """Adds clauses that force node to be true."""
+        if isinstance(node, And):
+            for child in children(node):
+                require(child)
+        elif isinstance(node, Or):
+            lits = [literal(child) for child in children(node)]
+            if not any(lit is True for lit in lits):
+                clauses.append([lit for lit in lits if lit is not False])
+        elif isinstance(node, Var):
+            clauses.append([table.literal(node)])
+        else:
+            raise TypeError(f"Can only convert an NNF object. Given {type(node)}")
+
+    require(formula)
+    return clauses
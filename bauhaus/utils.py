@@ -1,7 +1,11 @@
 import sys
 import inspect
-from nnf import Var, And
-from nnf import dsharp
+import importlib
+import weakref
+from operator import attrgetter
+from nnf import Var
+
+from .counting import compile_theory
 
 import bauhaus.core as core
 import warnings
@@ -13,6 +17,8 @@ def compute_pairs(func) -> list:
     """Wraps a function that compares pairs of objects to return those matching.
 
     Useful for identifying the pairs of Var objects that match a condition.
+    The function is called on every ordered pair, so for many objects,
+    see bauhaus/pairs.py to find the pairs with equal or close keys.
 
     Returns
     -------
@@ -96,13 +102,272 @@ def classname(func) -> str:
         return None
 
 
-def unpack_variables(T, propositions) -> list:
+def find_global(module, qualname):
+    """Returns the object named qualname in the given module.
+
+    Arguments
+    ---------
+    module : str
+    qualname : str
+        Dotted name of a module-level object, or of an attribute
+        of one, such as a method. Objects wrapped by decorators are
+        unwrapped to find their attributes.
+
+    """
+    obj = importlib.import_module(module)
+    for name in qualname.split('.'):
+        while not hasattr(obj, name) and hasattr(obj, '__wrapped__'):
+            obj = obj.__wrapped__
+        obj = getattr(obj, name)
+    return obj
+
+
+def groupby_key(groupby):
+    """Returns a function giving the group of an instance for a groupby
+    given as an attribute name or a tuple of them, else None.
+
+    The group of a tuple of names is the tuple of the attributes.
+    """
+    if isinstance(groupby, str):
+        return attrgetter(groupby)
+    if (isinstance(groupby, tuple) and groupby
+            and all(isinstance(name, str) for name in groupby)):
+        return attrgetter(*groupby)
+    return None
+
+
+class PartitionIndex:
+    """Groups of the instances of one class by a groupby key, kept
+    between compiles and updated as instances are created, deleted or
+    change group.
+
+    The group of every instance is read again on each update, since
+    the attributes it uses can change, and only the instances whose
+    group changed are moved. Instances are held by weak references.
+
+    """
+
+    def __init__(self, key):
+        """
+        Arguments
+        ---------
+        key : function
+            Gives the group of an instance, see groupby_key.
+
+        """
+        self._value = key
+        # instance id -> (weak reference, group)
+        self._members = dict()
+        # group -> {instance id: weak reference}, in order of creation
+        self._groups = dict()
+
+    def update(self, instances) -> list:
+        """Returns the groups of instances, as lists of nnf.Var.
+
+        Arguments
+        ---------
+        instances : weakref.WeakValueDictionary
+            Instances of the class by id, from Encoding.propositions.
+
+        """
+        self._index(instances)
+        # equal propositions are one variable, as in unpack_variables
+        return [list(dict.fromkeys([ref()._var for ref in group.values()]))
+                for group in self._groups.values()]
+
+    def _index(self, instances):
+        members, groups = self._members, self._groups
+        for instance_id, obj in instances.items():
+            value = self._value(obj)
+            member = members.get(instance_id)
+            if member is not None:
+                if member[0]() is obj and member[1] == value:
+                    continue
+                self._remove(instance_id)
+            ref = weakref.ref(obj)
+            members[instance_id] = (ref, value)
+            groups.setdefault(value, dict())[instance_id] = ref
+        if len(members) > len(instances):
+            for instance_id in [i for i, (ref, _) in members.items()
+                                if ref() is None or i not in instances]:
+                self._remove(instance_id)
+
+    def _remove(self, instance_id):
+        _, value = self._members.pop(instance_id)
+        group = self._groups[value]
+        del group[instance_id]
+        if not group:
+            del self._groups[value]
+
+
+class Resolver:
+    """Resolves decorated classes and methods to their variables,
+    remembering the results for the duration of one compile.
+
+    unpack_variables and _ConstraintBuilder.get_implication_inputs
+    find the class of a decorated class or method by its qualified
+    name, list the instances of the class and call the method on
+    each of them. A Resolver does each of these once, however many
+    constraints refer to the same class or method, so it must not
+    outlive changes to the propositions or their attributes.
+    Functions are remembered by the function they wrap, so stacked
+    decorators share the results of the method they decorate.
+
+    The groups of the instances of a class by a groupby are likewise
+    shared by the constraints with the same groupby, and when the
+    Resolver is given partitions, kept in a PartitionIndex for the
+    next compile.
+
+    Attributes
+    ----------
+    propositions : defaultdict(weakref.WeakValueDictionary)
+    partitions : dict
+        (class name, groupby) -> PartitionIndex. Optional.
+
+    """
+
+    def __init__(self, propositions, partitions=None):
+        self.propositions = propositions
+        self.partitions = partitions
+        # (class name, groupby) -> groups, for this compile
+        self._groups = dict()
+        # keyed by the function wrapped by decorators, see _key
+        # class or function -> (class name, is a method)
+        self._classes = dict()
+        # class name -> instances
+        self._instances = dict()
+        # method -> (instance, variables of its return value) pairs
+        self._results = dict()
+        # class or function -> variables, as unpacked
+        self._unpacked = dict()
+
+    @staticmethod
+    def _key(func):
+        try:
+            return inspect.unwrap(func)
+        except ValueError:
+            return func
+
+    def resolve(self, func) -> tuple:
+        """Returns the name of the class of a decorated class or
+        method, or None, and whether func is a method."""
+        key = self._key(func)
+        try:
+            return self._classes[key]
+        except KeyError:
+            pass
+        qualname = getattr(func, '__qualname__', None)
+        if qualname is None:
+            resolved = (None, False)
+        elif qualname in self.propositions:
+            resolved = (qualname, False)
+        else:
+            name = classname(func)
+            resolved = (name, True) if name in self.propositions else (None, False)
+        self._classes[key] = resolved
+        return resolved
+
+    def instances(self, name) -> list:
+        """Returns the instances of the class with the given name."""
+        try:
+            return self._instances[name]
+        except KeyError:
+            instances = list(self.propositions[name].values())
+            self._instances[name] = instances
+            return instances
+
+    def results(self, func) -> list:
+        """Returns each instance of the class of method func with the
+        unpacked variables of the value func returns for it."""
+        key = self._key(func)
+        try:
+            return self._results[key]
+        except KeyError:
+            pass
+        name, _ = self.resolve(func)
+        results = []
+        for obj in self.instances(name):
+            ret = set(flatten([func(obj)]))
+            results.append((obj, unpack_variables(ret, self.propositions, self)))
+        self._results[key] = results
+        return results
+
+    def unpack(self, func) -> list:
+        """Returns the variables of a decorated class or method: the
+        instances of the class, and for a method the variables it
+        returns for each of them."""
+        key = self._key(func)
+        try:
+            return self._unpacked[key]
+        except KeyError:
+            pass
+        name, method = self.resolve(func)
+        if name is None:
+            unpacked = []
+        elif not method:
+            unpacked = [obj._var for obj in self.instances(name)]
+        else:
+            inputs = set()
+            for obj, variables in self.results(func):
+                inputs.update(variables)
+                inputs.add(obj._var)
+            unpacked = list(inputs)
+        self._unpacked[key] = unpacked
+        return unpacked
+
+    def groups(self, name, groupby, inputs) -> list:
+        """Returns the groups of the instances of a class by groupby.
+
+        Arguments
+        ---------
+        name : str
+            Name of the class, as given by resolve.
+        groupby : str, tuple of str or function
+        inputs : list[nnf.Var]
+            The variables of the instances of the class, as given by
+            unpack, passed to a groupby function.
+
+        """
+        key = (name, groupby)
+        try:
+            return self._groups[key]
+        except KeyError:
+            pass
+        value = groupby_key(groupby)
+        if value is None:
+            groups = list(groupby(inputs))
+        elif self.partitions is None:
+            groups = partition(inputs, value)
+        else:
+            index = self.partitions.get(key)
+            if index is None:
+                index = self.partitions[key] = PartitionIndex(value)
+            groups = index.update(self.propositions[name])
+        self._groups[key] = groups
+        return groups
+
+
+def partition(inputs, key) -> list:
+    """Groups the variables of inputs by the key of their names."""
+    groups = dict()
+    for var in inputs:
+        value = key(var.name)
+        if value not in groups:
+            groups[value] = []
+        groups[value].append(var)
+    return list(groups.values())
+
+
+def unpack_variables(T, propositions, resolver=None) -> list:
     """ Returns a list of all variable inputs for building a constraint
 
     Arguments
     ---------
     T : tuple
     propositions : defaultdict(weakref.WeakValueDictionary)
+    resolver : Resolver
+        Optional; shares the instances of classes and the results
+        of methods between calls. Default is a new Resolver.
 
     Returns
     -------
@@ -110,27 +375,16 @@ def unpack_variables(T, propositions) -> list:
         List of inputs with only unqiue variables returned.
 
     """
+    if resolver is None:
+        resolver = Resolver(propositions)
     inputs = set()
 
     for var in T:
 
+        # instances of a decorated class, or with the values
+        # returned by a decorated method
         if hasattr(var, '__qualname__'):
-            if var.__qualname__ in propositions:
-                cls = var.__qualname__
-                for instance_id in propositions[cls]:
-                    inputs.add(propositions[cls][instance_id]._var)
-
-            elif classname(var) in propositions:
-                cls = classname(var)
-                for instance_id in propositions[cls]:
-                    obj = propositions[cls][instance_id]
-                    # apply method to object to get return values
-                    ret = set(flatten([var(obj)]))
-                    # check return values are valid inputs
-                    res = unpack_variables(ret, propositions)
-                    # add nnf.Var attribute of object
-                    res.append(obj._var)
-                    inputs.update(res)
+            inputs.update(resolver.unpack(var))
 
         # if object, add its nnf.Var attribute
         elif hasattr(var, '_var'):
@@ -141,7 +395,7 @@ def unpack_variables(T, propositions) -> list:
             inputs.add(var)
 
         elif isinstance(var, (list, tuple, set)):
-            inputs.update(unpack_variables(var, propositions))
+            inputs.update(unpack_variables(var, propositions, resolver))
         else:
             if isinstance(var, core.CustomNNF):
                 warnings.warn(
@@ -156,24 +410,78 @@ def unpack_variables(T, propositions) -> list:
                                 f" yielded the following error message: {e}")
     return list(inputs)
 
-def count_solutions(base_formula, lits=[]):
-    """Counts the number of solutions to a given formula."""
+def _nnfify(lit):
+    """Returns the nnf.Var of a proposition, its negation or an nnf.Var."""
+    if isinstance(lit, Var):
+        return lit
+    if type(lit).__name__ == "CustomNNF":
+        assert lit.typ == 'not', "Literal must be a variable or negated variable."
+        return ~(lit.args[0].args[0])
+    else:
+        return lit._var
 
-    def _nnfify(lit):
-        if type(lit).__name__ == "CustomNNF":
-            assert lit.typ == 'not', "Literal must be a variable or negated variable."
-            return ~(lit.args[0].args[0])
-        else:
-            return lit._var
 
-    T = base_formula
-    if lits:
-        T = T & And([_nnfify(l) for l in lits])
+def count_solutions(base_formula, lits=[], backend="dsharp"):
+    """Counts the number of solutions to a given formula.
+
+    The formula is compiled to d-DNNF once, see bauhaus/counting.py,
+    and counted under the literals by conditioning it, so counting
+    the same formula under other literals does not compile it again.
+    Auxiliary variables are not counted: a formula that has them is
+    counted as with backend "builtin", which projects them away.
+
+    Arguments
+    ---------
+    base_formula : nnf.NNF
+    lits : list
+        Propositions, their negations or nnf.Var that must be true.
+    backend : str
+        Default is "dsharp". If "builtin", the solutions are counted
+        in Python without dsharp, which suits small to medium
+        formulas, see ModelCounter in bauhaus/counting.py.
+
+    """
+    compiled = compile_theory(base_formula, backend)
+    return compiled.count([_nnfify(l) for l in lits])
+
+
+def likelihood(base_formula, lit, backend="dsharp"):
+    return (count_solutions(base_formula, [lit], backend)
+            / count_solutions(base_formula, backend=backend))
+
+
+def likelihoods(encoding, props, backend="dsharp") -> dict:
+    """Returns the likelihood of each of props, from one compilation.
+
+    The counts of models in which each variable is true are found
+    together, see CompiledTheory.marginals in bauhaus/counting.py.
 
-    if not T.satisfiable():
-        return 0
+    Arguments
+    ---------
+    encoding : Encoding or nnf.NNF
+        An Encoding is compiled with compile().
+    props : iterable
+        Propositions, their negations or nnf.Var.
+    backend : str
+        See count_solutions.
 
-    return dsharp.compile(T.to_CNF(simplify=False), smooth=True).model_count()
+    Returns
+    -------
+    likelihoods : dict
+        key: prop, value: float, as given by likelihood.
 
-def likelihood(base_formula, lit):
-    return count_solutions(base_formula, [lit]) / count_solutions(base_formula)
+    """
+    if isinstance(encoding, core.Encoding):
+        encoding = encoding.compile()
+    compiled = compile_theory(encoding, backend)
+    props = list(props)
+    lits = [_nnfify(prop) for prop in props]
+    total = compiled.count()
+    counts = compiled.marginals({lit.name for lit in lits})
+    result = dict()
+    for prop, lit in zip(props, lits):
+        count = counts[lit.name]
+        if not lit.true and lit.name in compiled.variables:
+            count = total - count
+        result[prop] = count / total
+    return result
@@ -0,0 +1,327 @@
+"""Dense integer numbering of the variables of a bauhaus theory.
+
+Constraints are built as clauses over DIMACS-style integer literals: the
+variable numbered i appears as i when true and -i when negated. A
+VariableTable assigns those numbers and translates them back to nnf
+variables when an NNF theory is wanted.
+
+Propositions are numbered when they are created, in order of creation, so
+their numbers are stable. Equal propositions share a number. Looking up the
+number of the object the number was assigned to only hashes its id().
+The table only holds weak references to propositions, keyed by their names,
+so it does not keep alive instances that the Encoding no longer has; a
+proposition created again with the same name gets its number back.
+
+Auxiliary variables introduced by the encodings get numbers too. Numbers
+given back with ``release``, or all of them with ``reset_auxiliary``, are
+handed out again, so compiling the same encoding repeatedly does not grow
+the table. A number handed out again is translated to a new nnf.Aux, since
+NNF theories translated before may still use the old one with its old
+meaning.
+
+"""
+import weakref
+from array import array
+
+from nnf import Var
+
+
+class _Name(weakref.ref):
+    """Weak reference to a proposition numbered by a VariableTable."""
+
+    __slots__ = ("number", "key", "name")
+
+
+def _forgetter(names, by_object):
+    """Returns the callback of the _Name references of a table, which
+    forgets the id() of a proposition when it is collected and names
+    its number by the name of the proposition instead."""
+    def forget(ref):
+        by_object.pop(ref.key, None)
+        if names[ref.number] is ref:
+            names[ref.number] = ref.name
+    return forget
+
+
+class VariableTable:
+    """Bidirectional map between variable names and positive integers."""
+
+    def __init__(self):
+        # number -> name, positive nnf.Var and auxiliary flag
+        # index 0 is unused so numbers double as indices. Propositions
+        # are named by a _Name reference, and have no cached nnf.Var
+        self._names = [None]
+        self._vars = [None]
+        self._auxiliary = bytearray(1)
+        # name -> number, and id(name) -> number for the named objects
+        # propositions are keyed by their name string, which they equal
+        self._ids = dict()
+        self._by_object = dict()
+        self._forget = _forgetter(self._names, self._by_object)
+        # numbers of the auxiliary variables, in order of allocation,
+        # and those free to be handed out again, last first
+        self._aux = []
+        self._free = []
+        # collects the auxiliary numbers handed out, when not None
+        self.allocated = None
+
+    def __getstate__(self) -> dict:
+        # the maps by name are rebuilt, since ids change when pickled,
+        # and live propositions are pickled in place of their references
+        state = self.__dict__.copy()
+        del state["_ids"], state["_by_object"], state["_forget"]
+        state["_names"] = [self.name(number) if number else None
+                           for number in range(len(self._names))]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        names = self._names
+        self._names = [None]
+        self._ids = dict()
+        self._by_object = dict()
+        self._forget = _forgetter(self._names, self._by_object)
+        for number, name in enumerate(names[1:], 1):
+            self._names.append(name)
+            if name is not None:
+                self._ids[_key(name)] = number
+                self._by_object[id(name)] = number
+                if hasattr(name, "_var_name"):
+                    self._names[number] = self._ref(name, number)
+
+    def __len__(self) -> int:
+        return len(self._names) - 1
+
+    def __contains__(self, name) -> bool:
+        return name in self._ids
+
+    def _append(self, name, var, auxiliary=False) -> int:
+        self._names.append(name)
+        self._vars.append(var)
+        self._auxiliary.append(auxiliary)
+        return len(self._names) - 1
+
+    def _add(self, name, var=None) -> int:
+        if hasattr(name, "_var_name"):
+            number = self._append(None, None)
+            self._names[number] = self._ref(name, number)
+        else:
+            number = self._append(name, var)
+        self._ids[_key(name)] = number
+        # _names keeps the object alive, or its reference forgets its
+        # id() when it is collected, so the id() is not reused
+        self._by_object[id(name)] = number
+        return number
+
+    def _ref(self, name, number) -> _Name:
+        ref = _Name(name, self._forget)
+        ref.number = number
+        ref.key = id(name)
+        ref.name = name._var_name
+        return ref
+
+    def _adopt(self, name, number):
+        """Names number by the proposition name again, if the
+        proposition it was named by was collected."""
+        if (hasattr(name, "_var_name")
+                and not isinstance(self._names[number], weakref.ref)):
+            self._names[number] = self._ref(name, number)
+            self._by_object[id(name)] = number
+
+    def id(self, name) -> int:
+        """Returns the number of the variable name, adding it if needed."""
+        number = self._by_object.get(id(name))
+        if number is None:
+            number = self._ids.get(name)
+            if number is None:
+                number = self._add(name)
+            else:
+                self._adopt(name, number)
+        return number
+
+    def literal(self, var: Var) -> int:
+        """Returns the integer literal of an nnf.Var."""
+        name = var.name
+        number = self._by_object.get(id(name))
+        if number is None:
+            number = self._ids.get(name)
+            if number is None:
+                number = self._add(name, var if var.true else ~var)
+            else:
+                self._adopt(name, number)
+        return number if var.true else -number
+
+    def extend(self, variables):
+        """Returns the numbers of many positive nnf.Var at once.
+
+        Variables not yet in the table are numbered in order, so
+        the numbers of new, distinct variables are contiguous.
+
+        Arguments
+        ---------
+        variables : iterable of nnf.Var
+
+        Returns
+        -------
+        numbers : range or array.array
+            A range when every variable was new.
+
+        """
+        names, vars, ids = self._names, self._vars, self._ids
+        by_object = self._by_object
+        start = len(names)
+        numbers = array("l")
+        for var in variables:
+            name = var.name
+            number = by_object.get(id(name))
+            if number is None:
+                number = ids.get(name)
+                if number is None:
+                    number = len(names)
+                    if hasattr(name, "_var_name"):
+                        names.append(self._ref(name, number))
+                        vars.append(None)
+                        ids[name._var_name] = number
+                    else:
+                        names.append(name)
+                        vars.append(var)
+                        ids[name] = number
+                    by_object[id(name)] = number
+                else:
+                    self._adopt(name, number)
+            numbers.append(number)
+        self._auxiliary.extend(bytes(len(names) - start))
+        if len(names) - start == len(numbers):
+            return range(start, len(names))
+        return numbers
+
+    def rename(self, name, update):
+        """Re-keys the variable name after update() changes its hash.
+
+        The variable keeps its number, unless it now equals another
+        variable of the table and takes that variable's number.
+
+        Arguments
+        ---------
+        name : object
+            A name in the table, as given to id or literal.
+        update : function
+            Changes the hash of name when called with no arguments.
+
+        """
+        number = self._by_object.get(id(name))
+        if number is not None and self._ids.get(name) == number:
+            del self._ids[name]
+        update()
+        if number is None:
+            return
+        ref = self._names[number]
+        if isinstance(ref, _Name) and ref() is name:
+            ref.name = name._var_name
+        existing = self._ids.get(name)
+        if existing is None:
+            self._ids[_key(name)] = number
+        elif existing != number:
+            self._by_object[id(name)] = existing
+
+    def new_var(self) -> int:
+        """Returns the number of an unused auxiliary variable."""
+        if self._free:
+            number = self._free.pop()
+            var = self._vars[number]
+            if var is not None:
+                # named again by var, so theories translated before
+                # do not share the name with a different meaning
+                self._ids.pop(var.name, None)
+                self._by_object.pop(id(var.name), None)
+                self._names[number] = self._vars[number] = None
+        else:
+            number = self._append(None, None, auxiliary=True)
+            self._aux.append(number)
+        if self.allocated is not None:
+            self.allocated.append(number)
+        return number
+
+    def reserve(self) -> int:
+        """Returns the number of a new auxiliary variable that is never
+        handed out again, even by reset_auxiliary."""
+        return self._append(None, None, auxiliary=True)
+
+    def release(self, numbers):
+        """Allows the given auxiliary variables to be handed out again."""
+        self._free.extend(reversed(numbers))
+
+    def reset_auxiliary(self):
+        """Allows every auxiliary variable to be handed out again.
+
+        Call this before building a new theory; the auxiliary
+        variables of a previous theory must not be mixed with it.
+
+        """
+        self._free = self._aux[::-1]
+
+    def is_auxiliary(self, lit: int) -> bool:
+        return bool(self._auxiliary[abs(lit)])
+
+    def name(self, lit: int):
+        """Returns the name of the variable of lit.
+
+        Auxiliary variables are named when first translated with
+        ``var`` and are None before that, or after their number is
+        handed out again. A proposition that was
+        collected is named by its name string.
+
+        """
+        name = self._names[abs(lit)]
+        if isinstance(name, _Name):
+            obj = name()
+            return name.name if obj is None else obj
+        return name
+
+    def var(self, lit: int) -> Var:
+        """Returns the nnf.Var of an integer literal."""
+        number = abs(lit)
+        var = self._vars[number]
+        if var is None:
+            if self._auxiliary[number]:
+                var = Var.aux()
+                self._names[number] = var.name
+                self._ids[var.name] = number
+                self._by_object[id(var.name)] = number
+            elif isinstance(self._names[number], _Name):
+                # not cached, which would keep the proposition alive
+                name = self.name(number)
+                var = getattr(name, "_var", None) or Var(name)
+                return var if lit > 0 else ~var
+            else:
+                var = Var(self._names[number])
+            self._vars[number] = var
+        return var if lit > 0 else ~var
+
+    def decode(self, model) -> dict:
+        """Returns the assignment of an integer model, such as one
+        found by a SAT solver, keyed by variable name.
+
+        Auxiliary variables are left out.
+
+        Arguments
+        ---------
+        model : iterable of int
+            Literals true in the model.
+
+        Returns
+        -------
+        solution : dict
+            key: name, value: bool
+
+        """
+        auxiliary = self._auxiliary
+        name = self.name
+        return {name(lit): lit > 0
+                for lit in model if not auxiliary[abs(lit)]}
+
+
+def _key(name):
+    """The key of a name in the map by name: the name string of a
+    proposition, which is equal to it, or the name itself."""
+    return getattr(name, "_var_name", name)
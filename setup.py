@@ -23,11 +23,10 @@ CLASSIFIERS = [
     'Development Status :: 4 - Beta',
     'Programming Language :: Python',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.4',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
-    'Programming Language :: Python :: 3.7',
-    'Programming Language :: Python :: 3.8',
+    'Programming Language :: Python :: 3.9',
+    'Programming Language :: Python :: 3.10',
+    'Programming Language :: Python :: 3.11',
+    'Programming Language :: Python :: 3.12',
     'Programming Language :: Python :: 3 :: Only',
 ]
 
@@ -51,7 +50,7 @@ setup(
         'Documentation': "https://bauhaus.readthedocs.io/",
         'Source': "https://github.com/QuMuLab/bauhaus",
     },
-    python_requires='>=3.4',
+    python_requires='>=3.9',
     install_requires=DEPENDENCIES,
     extras_require=EXTRAS,
     packages=find_packages(exclude=['tests', 'tests.*']),
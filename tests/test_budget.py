@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from bauhaus import Encoding, proposition, constraint
+from bauhaus.budget import CompileBudgetExceeded
+
+
+def cells(e):
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    return Cell, [Cell(r, c) for r in range(4) for c in range(5 + r)]
+
+
+def test_estimate():
+    e = Encoding()
+    Cell, props = cells(e)
+    constraint.at_most_k(e, 2, groupby="row")(Cell)
+    constraint.exactly_one(e, groupby="col", encoding_type="bimander")(Cell)
+    constraint.add_between(e, 2, 5, props, encoding_type="sequential")
+    constraint.add_at_least_k(e, 3, props[:9], encoding_type="sorting_network")
+    constraint.add_at_most_k(e, 4, props, incremental=True)
+    constraint.add_implies_all(e, left=props[:3], right=props[3:7])
+    constraint.add_none_of(e, props[-2:])
+    constraint.add_weighted_at_most(e, [(p, 2) for p in props[:6]], 5)
+
+    estimates = e.estimate()
+    e.compile(format="ints", stats=True)
+    for builder, estimate in estimates.items():
+        stats = e.last_compile_stats[builder]
+        assert sorted(estimate["partitions"]) == sorted(stats["partitions"])
+        if builder._constraint.__name__ == "weighted_at_most":
+            assert estimate["clauses"] is None
+        else:
+            assert estimate["clauses"] == stats["clauses"], builder
+            assert estimate["auxiliary"] == stats["auxiliary"], builder
+
+
+def test_max_clauses():
+    e = Encoding()
+    Cell, props = cells(e)
+    small = constraint.add_at_most_one(e, props[:3])
+    big = constraint.add_at_most_k(e, 3, props, encoding_type="naive")
+    aux = len(e.variables)
+
+    with pytest.raises(CompileBudgetExceeded) as info:
+        e.compile(format="ints", max_clauses=1000)
+    error = info.value
+    assert error.constraint in e.constraints and error.clauses > 1000
+    assert error.constraint._constraint.__name__ == "at_most_k"
+    assert str(error.constraint) in str(error)
+    # nothing was built
+    assert not e._builds and len(e.variables) == aux
+
+    budget = sum(estimate["clauses"] for estimate in e.estimate().values())
+    assert len(e.compile(format="ints", max_clauses=budget)) == budget
+
+
+def test_max_seconds():
+    e = Encoding()
+    Cell, props = cells(e)
+    constraint.add_at_most_one(e, props)
+    e.on_builder_start = lambda builder: time.sleep(0.05)
+    with pytest.raises(CompileBudgetExceeded, match="max_seconds"):
+        e.compile(max_seconds=0.01)
+    assert not e._builds
+    e.on_builder_start = None
+    assert e.compile(max_seconds=60)
+    with pytest.raises(ValueError):
+        e.compile(max_seconds=0)
+
+
+def test_max_seconds_refuses_huge_group():
+    e = Encoding()
+    Cell, props = cells(e)
+    more = [Cell(9, c) for c in range(60)]
+    # about 10^13 clauses in a single group
+    constraint.add_at_most_k(e, 12, props + more, encoding_type="naive")
+    big, = e.constraints
+    start = time.perf_counter()
+    with pytest.raises(CompileBudgetExceeded, match="predicted") as info:
+        e.compile(format="ints", max_seconds=5)
+    assert time.perf_counter() - start < 5
+    assert info.value.constraint is big and not e._builds
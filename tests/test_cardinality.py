@@ -0,0 +1,319 @@
+from itertools import product
+import pytest
+from nnf import Aux, And
+
+from bauhaus import cardinality, pseudo_boolean
+from bauhaus import Encoding, constraint, proposition
+from bauhaus.utils import count_solutions
+from bauhaus.constraint_builder import _ConstraintBuilder as cbuilder
+
+
+def fresh(start):
+    counter = [start]
+
+    def new_var():
+        counter[0] += 1
+        return counter[0]
+    return new_var
+
+
+def extends(clauses, fixed):
+    """True if the assignment to the inputs extends to a model."""
+    clauses = [list(c) for c in clauses] + [[v if b else -v] for v, b in fixed.items()]
+
+    def solve(clauses):
+        while True:
+            units = [c[0] for c in clauses if len(c) == 1]
+            if not units:
+                break
+            lit = units[0]
+            clauses = [[l for l in c if l != -lit] for c in clauses if lit not in c]
+            if any(not c for c in clauses):
+                return False
+        if not clauses:
+            return True
+        lit = clauses[0][0]
+        return solve(clauses + [[lit]]) or solve(clauses + [[-lit]])
+
+    return solve(clauses)
+
+
+def check(clauses, n, accepts):
+    for values in product([False, True], repeat=n):
+        fixed = dict(zip(range(1, n + 1), values))
+        assert extends(clauses, fixed) == accepts(sum(values)), values
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMO_ENCODINGS)
+def test_at_most_one(encoding_type):
+    for n in range(1, 9):
+        clauses = cardinality.at_most_one(range(1, n + 1), fresh(n), encoding_type)
+        check(clauses, n, lambda count: count <= 1)
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMO_ENCODINGS)
+def test_exactly_one(encoding_type):
+    for n in range(1, 8):
+        clauses = cardinality.exactly_one(range(1, n + 1), fresh(n), encoding_type)
+        check(clauses, n, lambda count: count == 1)
+
+
+def test_pairwise_no_duplicates():
+    clauses = cardinality.at_most_one(range(1, 2001), fresh(2000), "pairwise")
+    assert len(clauses) == 2000 * 1999 // 2
+    linear = cardinality.at_most_one(range(1, 2001), fresh(2000), "auto")
+    assert len(linear) < 3 * 2000
+
+
+def test_default_encoding_has_no_auxiliary():
+    e = Encoding()
+
+    @constraint.at_most_one(e)
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(12)]
+    T = e.compile()
+    assert not any(isinstance(v, Aux) for v in T.vars())
+    assert count_solutions(T, backend="builtin") == 13
+    assert set(T.solve()) <= set(props)
+
+
+def test_default_counter_has_no_auxiliary():
+    e = Encoding()
+
+    @proposition(e)
+    class Q:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"Q.{self.val}"
+
+    props = [Q(i) for i in range(6)]
+    constraint.add_at_most_k(e, 2, props)
+    constraint.add_at_least_k(e, 1, props[:4])
+    T = e.compile()
+    assert not any(isinstance(v, Aux) for v in T.vars())
+    # subsets of at most 2 of the 6 that meet the first 4
+    assert count_solutions(T, backend="builtin") == 4 + (15 - 1)
+
+
+def test_invalid_encoding():
+    e = Encoding()
+    with pytest.raises(ValueError):
+        constraint.at_most_one(e, encoding_type="unknown")
+    with pytest.raises(ValueError):
+        constraint.add_exactly_one(e, "a", encoding_type="unknown")
+
+
+def test_encoding_type_in_theory():
+    e = Encoding()
+
+    @constraint.exactly_one(e, encoding_type="sequential")
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(10)]
+    T = e.compile()
+    assert T.satisfiable()
+    for c in e.constraints:
+        assert c._encoding_type == "sequential"
+        assert c._constraint is cbuilder.exactly_one
+    aux = {v for v in T.vars() if isinstance(v, Aux)}
+    assert len(aux) == 9
+    assert not (T & props[0]._var & props[1]._var).satisfiable()
+    assert (T & props[3]._var).satisfiable()
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMK_ENCODINGS)
+def test_at_most_k(encoding_type):
+    for n in range(1, 8):
+        for k in range(0, n + 1):
+            clauses = cardinality.at_most_k(range(1, n + 1), fresh(n), k, encoding_type)
+            check(clauses, n, lambda count: count <= k)
+
+
+def test_at_most_k_polynomial():
+    # n = 60, k = 5 has C(60, 6) = 50 million naive clauses
+    for encoding_type in cardinality.AMK_ENCODINGS[2:]:
+        clauses = cardinality.at_most_k(range(1, 61), fresh(60), 5, encoding_type)
+        assert len(clauses) < 10000
+
+
+def test_at_most_k_theory():
+    e = Encoding()
+
+    @constraint.at_most_k(e, 3, encoding_type="totalizer")
+    @proposition(e)
+    class Q:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"Q.{self.val}"
+
+    props = [Q(i) for i in range(8)]
+    T = e.compile()
+    assert (T & And([p._var for p in props[:3]])).satisfiable()
+    assert not (T & And([p._var for p in props[:4]])).satisfiable()
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMK_ENCODINGS)
+def test_between(encoding_type):
+    for n in range(1, 7):
+        for lo in range(0, n + 2):
+            for hi in range(lo, n + 1):
+                clauses = cardinality.between(range(1, n + 1), fresh(n), lo, hi, encoding_type)
+                check(clauses, n, lambda count: lo <= count <= hi)
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMK_ENCODINGS)
+def test_size(encoding_type):
+    for n in range(1, 12):
+        for lo in range(0, n + 2):
+            for hi in range(lo, n + 1):
+                new_var = fresh(n)
+                clauses = cardinality.between(range(1, n + 1), new_var, lo, hi, encoding_type)
+                auxiliary = new_var() - n - 1
+                assert cardinality.size(n, lo, hi, encoding_type) == (len(clauses), auxiliary)
+
+
+@pytest.mark.parametrize("encoding_type", cardinality.AMO_ENCODINGS)
+def test_at_most_one_size(encoding_type):
+    for n in range(1, 40):
+        new_var = fresh(n)
+        clauses = cardinality.at_most_one(range(1, n + 1), new_var, encoding_type)
+        auxiliary = new_var() - n - 1
+        assert cardinality.at_most_one_size(n, encoding_type) == (len(clauses), auxiliary)
+
+
+def test_cardinality_constraints():
+    e = Encoding()
+
+    @constraint.exactly_k(e, 2, groupby="row")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [[Cell(r, c) for c in range(4)] for r in range(3)]
+    constraint.add_between(e, 1, 2, [row[0] for row in cells])
+    constraint.add_at_least_k(e, 1, *[row[3] for row in cells], groupby="row")
+    T = e.compile()
+
+    row = cells[0]
+    assert (T & row[0]._var & row[3]._var).satisfiable()
+    assert not (T & row[0]._var & row[1]._var & row[3]._var).satisfiable()
+    assert not (T & And([r[0]._var for r in cells])).satisfiable()
+    assert not (T & ~cells[1][3]._var).satisfiable()
+
+    with pytest.raises(ValueError):
+        constraint.add_between(e, 3, 2, cells[0])
+    with pytest.raises(ValueError):
+        constraint.add_exactly_k(e, 2, cells[0], groupby=3)
+
+
+def test_weighted_at_most():
+    e = Encoding()
+
+    @constraint.weighted_at_most(e, "cost", 10)
+    @proposition(e)
+    class Item:
+        def __init__(self, name, cost):
+            self.name = name
+            self.cost = cost
+
+        def _prop_name(self):
+            return f"Item.{self.name}"
+
+    a, b, c, d = Item("a", 6), Item("b", 4), Item("c", 3), Item("d", 5)
+    constraint.add_weighted_at_most(e, {a: 2, b: 2, c: -1}, 3, encoding_type="adder")
+    T = e.compile()
+    assert (T & a._var & b._var & c._var).satisfiable() is False
+    assert (T & a._var & b._var).satisfiable() is False
+    assert (T & a._var & c._var).satisfiable()
+    assert (T & b._var & c._var & ~d._var).satisfiable()
+    assert not (T & a._var & d._var).satisfiable()
+
+    with pytest.raises(TypeError):
+        constraint.add_weighted_at_most(e, {a: 1.5}, 3)
+    with pytest.raises(ValueError):
+        constraint.add_weighted_at_most(e, {a: 1}, 3, encoding_type="naive")
+
+
+@pytest.mark.parametrize("encoding_type", pseudo_boolean.PB_ENCODINGS)
+def test_pseudo_boolean(encoding_type):
+    cases = [([3, 2, 2, 1], 4), ([5, -3, 2, 7, 1], 6), ([4, 4, 4], 8),
+             ([9, 1, 1, 1, 1], 2), ([6, 5, 3], 0), ([2, 3], -1)]
+    for weights, bound in cases:
+        n = len(weights)
+        clauses = pseudo_boolean.weighted_at_most(range(1, n + 1), fresh(n), weights,
+                                                  bound, encoding_type)
+        for values in product([False, True], repeat=n):
+            fixed = dict(zip(range(1, n + 1), values))
+            total = sum(w for w, v in zip(weights, values) if v)
+            assert extends(clauses, fixed) == (total <= bound)
+
+
+def test_incremental_bound():
+    e = Encoding()
+
+    @proposition(e)
+    class Shift:
+        def __init__(self, day):
+            self.day = day
+
+        def _prop_name(self):
+            return f"Shift.{self.day}"
+
+    shifts = [Shift(day) for day in range(6)]
+    bound = constraint.add_at_most_k(e, 4, Shift, incremental=True)
+    constraint.add_at_least_k(e, 2, Shift)
+
+    with e.solver(backend="builtin") as session:
+        counts = []
+        while session.solve():
+            counts.append(sum(session.model()[s] for s in shifts))
+            assert counts[-1] <= bound.k
+            clauses = e._builds[bound.builder].clauses
+            bound.tighten(counts[-1] - 1)
+        assert counts[-1] == 2 and bound.k == 1
+        # the counter was built once
+        assert e._builds[bound.builder].clauses is clauses
+
+    for k in range(len(shifts)):
+        bound.k = k
+        T = e.compile()
+        assert T.satisfiable() == (k >= 2)
+        assert all(sum(model[s._var.name] for s in shifts) <= k
+                   for model in T.models())
+    assert len(e.compile(format="ints")) == len(e.compile(format="store"))
+
+    # the outputs are kept with the counter, also when built by workers
+    assert len(bound.outputs()) == len(shifts)
+    e._clear_builds()
+    e.compile(workers=2)
+    assert len(bound.outputs()) == len(shifts)
+    for k in (1, 3):
+        bound.k = k
+        assert e.compile().satisfiable() == (k >= 2)
+
+    with pytest.raises(ValueError):
+        bound.tighten(6)
+    with pytest.raises(ValueError):
+        constraint.add_at_most_k(e, 2, Shift, incremental=True, weight=1)
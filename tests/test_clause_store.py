@@ -0,0 +1,82 @@
+import pytest
+from nnf import Var
+
+from bauhaus import Encoding, proposition, constraint
+from bauhaus.clause_store import ClauseChain, ClauseStore
+from bauhaus.variables import VariableTable
+
+
+def test_clause_store():
+    store = ClauseStore([[1, -2], [3]])
+    store.append([-1, 2, 4])
+    assert len(store) == 3 and list(store) == [[1, -2], [3], [-1, 2, 4]]
+    assert store[-1] == [-1, 2, 4] and store.offsets.tolist() == [0, 2, 3, 6]
+    assert list(store[1:]) == [[3], [-1, 2, 4]]
+    assert memoryview(store.literals).tolist() == [1, -2, 3, -1, 2, 4]
+    assert memoryview(store.offsets).tolist() == [0, 2, 3, 6]
+
+    store.add_section("more", ClauseStore([[5], [-5, 1]]))
+    assert store.sections["more"] == (3, 5)
+    assert store.section("more") == ClauseStore([[5], [-5, 1]])
+    with pytest.raises(IndexError):
+        store[5]
+
+    table = VariableTable()
+    a, b = Var("a"), Var("b")
+    table.literal(a), table.literal(b)
+    assert ClauseStore([[1, -2]]).to_nnf(table).satisfied_by({"a": False, "b": False})
+
+
+def test_clause_chain():
+    first, second = ClauseStore([[1, -2]]), ClauseStore([[3], [-1, 2, 4]])
+    chain = ClauseChain([first, ClauseStore(), second])
+    assert len(chain) == 3 and list(chain) == [[1, -2], [3], [-1, 2, 4]]
+    assert chain[1] == [3] and chain[-1] == [-1, 2, 4]
+    assert chain.stores[0] is first and chain.stores[2] is second
+    assert ClauseStore(chain) == ClauseStore([[1, -2], [3], [-1, 2, 4]])
+    with pytest.raises(IndexError):
+        chain[3]
+
+
+def test_build_keeps_clauses_once():
+    e = Encoding()
+
+    @constraint.at_most_one(e, groupby="row")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [Cell(r, c) for r in range(3) for c in range(3)]
+    e.compile()
+    build, = e._builds.values()
+    assert [clauses for clauses, _, _ in build.parts.values()] == build.clauses.stores
+    assert all(store is part[0] for store, part
+               in zip(build.clauses.stores, build.parts.values()))
+
+
+def test_compile_store():
+    e = Encoding()
+
+    @constraint.at_most_one(e, groupby="row")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [Cell(r, c) for r in range(3) for c in range(3)]
+    constraint.add_at_least_one(e, *cells)
+    store = e.compile(format="store")
+    assert isinstance(store, ClauseStore)
+    assert sorted(store) == sorted(e.compile(format="ints"))
+    assert len(store.sections) == 2
+    for builder in e.constraints:
+        assert list(store.section(builder)) == list(e._builds[builder].clauses)
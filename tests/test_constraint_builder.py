@@ -1,3 +1,5 @@
+import pytest
+
 from bauhaus import core, constraint_builder
 from bauhaus.constraint_builder import _ConstraintBuilder
 
@@ -23,3 +25,76 @@ def test_at_most_k():
 
 def test_implies_all():
     pass
+
+e = core.Encoding()
+calls = []
+
+
+@core.proposition(e)
+class A:
+    def __init__(self, val):
+        self.val = val
+
+    def _prop_name(self):
+        return f"A.{self.val}"
+
+    @core.constraint.implies_all(e)
+    @core.constraint.at_most_one(e)
+    def next(self):
+        calls.append(self)
+        return [B(self.val)]
+
+
+@core.proposition(e)
+class B:
+    def __init__(self, val):
+        self.val = val
+
+    def _prop_name(self):
+        return f"B.{self.val}"
+
+
+def test_method_results_shared():
+    objects = [A(i) for i in range(3)]
+    e.compile(format="ints")
+    # once per instance, although two constraints use the method
+    assert len(calls) == 3
+
+    builder = next(c for c in e.constraints
+                   if c._constraint is _ConstraintBuilder.implies_all)
+    inputs = builder.get_implication_inputs(e.propositions)
+    assert inputs == {a._var: [B(i)._var] for i, a in enumerate(objects)}
+
+
+def test_partition_index():
+    e = core.Encoding()
+
+    @core.constraint.at_most_one(e, groupby=("row", "col"))
+    @core.constraint.at_least_one(e, groupby="row")
+    @core.constraint.at_most_one(e, groupby="row")
+    @core.proposition(e)
+    class Cell:
+        def __init__(self, row, col, val):
+            self.row = row
+            self.col = col
+            self.val = val
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}.{self.val}"
+
+    cells = [Cell(r, c, v) for r in range(2) for c in range(2) for v in range(2)]
+    e.compile(format="ints")
+    name = Cell.__qualname__
+    assert set(e._partitions) == {(name, "row"), (name, ("row", "col"))}
+    index = e._partitions[(name, ("row", "col"))]
+    assert sorted(map(len, index.update(e.propositions[name]))) == [2] * 4
+
+    cells.append(Cell(2, 0, 0))
+    T = e.compile()
+    assert e._partitions[(name, ("row", "col"))] is index
+    assert sorted(map(len, index.update(e.propositions[name]))) == [1, 2, 2, 2, 2]
+    assert not (T & cells[0]._var & cells[2]._var).satisfiable()
+    assert (T & cells[-1]._var).satisfiable()
+
+    with pytest.raises(ValueError):
+        core.constraint.add_at_least_k(e, 1, cells, groupby=("row", 1))
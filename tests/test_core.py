@@ -46,6 +46,21 @@ def test_proposition():
     assert len(e.propositions['E']) == 3
 
 
+def test_cached_names():
+    """ Names and hashes are computed once, until refreshed """
+    x, y, z = E(10), E(11), E(10)
+    x.val = 12
+    assert repr(x) == "E.10" and x == z and x != y
+    assert hash(x) == hash("E.10") and x == "E.10"
+    number = e.variables.literal(x._var)
+    e.refresh_propositions(x)
+    assert repr(x) == "E.12" and x != z
+    assert e.variables.literal(x._var) == number
+    assert e.variables.literal(z._var) != number
+    y.val = 12
+    e.refresh_propositions()
+    assert x == y and e.variables.literal(y._var) == number
+
 # Test multiple constraints on a class
 # and decorator constraints
 a = Encoding()
@@ -227,3 +242,71 @@ def test_duplicates():
     with pytest.warns(UserWarning):
         constraint.add_none_of(g, h1, h2, h3 & h4);
         g.compile()
+
+
+def test_provenance():
+    for provenance in (False, True):
+        p = Encoding(provenance=provenance)
+
+        @constraint.at_most_k(p, 2, encoding_type="sequential")
+        @proposition(p)
+        class Q:
+            def __init__(self, val):
+                self.val = val
+
+            def _prop_name(self):
+                return f"Q.{self.val}"
+
+        qs = [Q(i) for i in range(5)]
+        p.add_constraint(qs[0] | qs[1])
+        p.compile()
+        builder, = p.constraints
+        assert not builder.instance_constraints
+        if not provenance:
+            assert not p.debug_constraints
+            with pytest.warns(UserWarning):
+                p.introspect()
+            with pytest.raises(ValueError):
+                p.instance_constraints(builder)
+            continue
+
+        assert len(p.debug_constraints) == 2
+        build = p._builds[builder]
+        table = p.variables
+        instance_constraints = p.instance_constraints(builder)
+        for q in qs:
+            expected = [clause for clause in build.theory
+                        if any(var.name == q for var in clause)]
+            assert sorted(map(str, instance_constraints[str(q._var)])) == sorted(map(str, expected))
+        assert sum(len(spans) for spans in build.ranges.values()) < len(build.clauses) * 2
+        p.introspect()
+
+
+@pytest.mark.parametrize("add", [
+    lambda e, k: constraint.at_most_k(e, k),
+    lambda e, k: constraint.at_least_k(e, k),
+    lambda e, k: constraint.exactly_k(e, k),
+    lambda e, k: constraint.between(e, k, 2),
+    lambda e, k: constraint.add_at_most_k(e, k, [Var("a")]),
+    lambda e, k: constraint.add_at_least_k(e, k, [Var("a")]),
+    lambda e, k: constraint.add_exactly_k(e, k, [Var("a")]),
+    lambda e, k: constraint.add_between(e, 0, k, [Var("a")]),
+])
+def test_invalid_bounds(add):
+    with pytest.raises(ValueError):
+        add(Encoding(), -1)
+    with pytest.raises(TypeError):
+        add(Encoding(), 1.5)
+
+
+def test_invalid_bounds_optimized():
+    import subprocess
+    import sys
+    code = ("from bauhaus import Encoding, constraint\n"
+            "try:\n"
+            "    constraint.add_at_least_k(Encoding(), 0, [])\n"
+            "except ValueError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise SystemExit(1)\n")
+    assert subprocess.run([sys.executable, "-O", "-c", code]).returncode == 0
@@ -0,0 +1,121 @@
+import gc
+
+import pytest
+from nnf import Var, Aux, And
+
+from bauhaus import Encoding, proposition, constraint
+from bauhaus.counting import CompiledTheory, compile_theory, _compiled
+from bauhaus.utils import count_solutions, likelihood, likelihoods, _nnfify
+
+
+def brute(theory, lits=()):
+    # models that differ only on auxiliary variables count once
+    lits = list(lits)
+    return len({frozenset((name, value) for name, value in model.items()
+                          if not isinstance(name, Aux))
+                for model in theory.models()
+                if all(model[lit.name] == lit.true for lit in lits)})
+
+
+def test_compiled_theory():
+    a, b, c, d = map(Var, "abcd")
+    T = ((a | b) & (~a | c) & (b | ~c | d)).to_CNF()
+    compiled = CompiledTheory(T, dnnf=T.to_MODS())
+    assert compiled.count() == brute(T)
+    for lits in [[a], [~a, b], [c, ~d], [a, ~a]]:
+        assert compiled.count(lits) == brute(T, lits)
+    # variables not in the theory do not change the count
+    assert compiled.count([Var("e")]) == compiled.count()
+
+    marginals = compiled.marginals("abcde")
+    assert marginals == {name: brute(T, [Var(name)]) for name in "abcd"} | {"e": compiled.count()}
+
+    unsat = CompiledTheory(And([a, ~a]))
+    assert unsat.count() == 0 and unsat.marginals(["a"]) == {"a": 0}
+
+
+def test_builtin_counter():
+    e = Encoding()
+
+    @constraint.at_most_k(e, 2, encoding_type="totalizer")
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(5)]
+    e.add_constraint(props[0] | props[1])
+    T = e.compile()
+    assert count_solutions(T, backend="builtin") == brute(T)
+    for lits in [[props[0]], [props[0], ~props[1], props[4]], [props[2], ~props[2]]]:
+        assert count_solutions(T, lits, backend="builtin") == brute(T, map(_nnfify, lits))
+    negated = ~props[2]
+    assert likelihoods(T, [props[0], negated], backend="builtin") == {
+        props[0]: likelihood(T, props[0], backend="builtin"),
+        negated: likelihood(T, negated, backend="builtin")}
+
+    with pytest.raises(ValueError):
+        count_solutions(T, backend="sharpsat")
+
+
+def test_auxiliary_variables_are_projected():
+    e = Encoding()
+
+    @constraint.at_most_one(e, encoding_type="product")
+    @proposition(e)
+    class Q:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"Q.{self.val}"
+
+    props = [Q(i) for i in range(9)]
+    T = e.compile()
+    assert any(isinstance(name, Aux) for name in T.vars())
+    # no proposition or one of them
+    assert count_solutions(T, backend="builtin") == 10
+    assert count_solutions(T, [props[0]], backend="builtin") == 1
+    assert likelihoods(T, props[:1], backend="builtin") == {props[0]: 0.1}
+    # without dsharp, as the theory is counted by projection
+    assert count_solutions(T) == 10
+    with pytest.raises(ValueError):
+        CompiledTheory(T)
+
+
+def test_compilations_follow_theories():
+    a, b = Var("a"), Var("b")
+    T = (a | b) & (~a | ~b)
+    compiled = compile_theory(T, "builtin")
+    assert compile_theory(T, "builtin") is compiled
+    assert compile_theory((a | b) & (~a | ~b), "builtin") is not compiled
+    key = (id(T), "builtin")
+    assert key in _compiled
+    del T
+    gc.collect()
+    assert key not in _compiled
+
+
+def test_count_custom_constraints():
+    e = Encoding()
+
+    @proposition(e)
+    class S:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"S.{self.val}"
+
+    a, b, c, d = [S(i) for i in range(4)]
+    e.add_constraint((a & b) | (c & d))
+    assert count_solutions(e.compile(), backend="builtin") == 7
+    # the Tseitin gates are projected away
+    T = e.compile(tseitin=True)
+    assert any(isinstance(name, Aux) for name in T.vars())
+    assert count_solutions(T) == 7
+    assert count_solutions(T, [a, b]) == 4
+    assert likelihood(T, a) == 5 / 7
@@ -0,0 +1,52 @@
+import gzip
+import io
+
+from bauhaus import Encoding, proposition, constraint
+
+
+def read(lines):
+    header, *clauses = [line.split() for line in lines if line.strip()]
+    assert header[:2] == ["p", "cnf"] and all(c[-1] == "0" for c in clauses)
+    return (int(header[2]), int(header[3])), [list(map(int, c[:-1])) for c in clauses]
+
+
+def encoding():
+    e = Encoding()
+
+    @constraint.at_most_k(e, 2, groupby="row", encoding_type="totalizer")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [Cell(r, c) for r in range(3) for c in range(4)]
+    constraint.add_at_least_one(e, *cells)
+    e.add_constraint(cells[0] | (cells[1] & cells[2]))
+    return e, cells
+
+
+def test_write_dimacs(tmp_path):
+    e, cells = encoding()
+    path = tmp_path / "theory.cnf"
+    counts = e.write_dimacs(path)
+    size = len(e.variables)
+    counts_read, clauses = read(path.read_text().splitlines())
+    assert counts == counts_read == (size, len(clauses))
+    assert sorted(map(sorted, clauses)) == sorted(map(sorted, e.compile(format="ints")))
+    assert len(e.variables) == size
+
+    names = (tmp_path / "theory.cnf.names").read_text().splitlines()
+    assert names[0] == "1\tCell.0.0" and len(names) == len(cells)
+
+    # the cached build is written after a compile, and compressed
+    e.write_dimacs(tmp_path / "theory.cnf.gz")
+    with gzip.open(tmp_path / "theory.cnf.gz", "rt") as f:
+        assert read(f.read().splitlines()) == (counts, clauses)
+
+    buffer = io.BytesIO()
+    e.write_dimacs(buffer, compress="xz")
+    assert buffer.getvalue().startswith(b"\xfd7zXZ")
@@ -0,0 +1,105 @@
+from itertools import product
+
+import pytest
+
+from bauhaus import Encoding, proposition, constraint, maxsat
+
+
+def brute_cost(props, hard, soft):
+    costs = []
+    for values in product([False, True], repeat=len(props)):
+        model = dict(zip(props, values))
+        if all(check(model) for check in hard):
+            costs.append(sum(weight for check, weight in soft if not check(model)))
+    return min(costs) if costs else None
+
+
+def test_optimize():
+    e = Encoding()
+
+    @constraint.at_least_one(e)
+    @constraint.at_most_one(e, weight=5)
+    @proposition(e)
+    class Shift:
+        def __init__(self, day):
+            self.day = day
+
+        def _prop_name(self):
+            return f"Shift.{self.day}"
+
+    a, b, c = Shift("a"), Shift("b"), Shift("c")
+    constraint.add_implies_all(e, left=a, right=b, weight=2)
+    e.add_soft(a, 2)
+    e.add_soft(a, 1)
+    assert e.soft_constraints[a._var] == 3
+    avoid = ~b & ~c
+    e.add_soft(avoid, 1)
+    e.add_soft(avoid, 1)
+    assert e.soft_constraints[avoid] == 2
+
+    solution, cost = e.optimize(backend="builtin")
+    props = [a, b, c]
+    hard = [lambda m: m[a] or m[b] or m[c]]
+    soft = [(lambda m: m[a] + m[b] + m[c] <= 1, 5),
+            (lambda m: not m[a] or m[b], 2),
+            (lambda m: m[a], 3),
+            (lambda m: not m[b] and not m[c], 2)]
+    assert cost == brute_cost(props, hard, soft) == 2
+    assert sum(weight for check, weight in soft if not check(solution)) == cost
+    assert all(check(solution) for check in hard)
+
+    # soft constraints are left out of the hard theory
+    clauses = e.compile(format="ints")
+    assert len(clauses) == 1 and sorted(clauses[0]) == sorted(e.variables.id(p) for p in props)
+
+    constraint.add_none_of(e, Shift)
+    assert e.optimize(backend="builtin") == (None, None)
+
+    with pytest.raises(ValueError):
+        e.optimize(backend="unknown")
+    with pytest.raises(ValueError):
+        e.add_soft(a, 0)
+    with pytest.raises(TypeError):
+        constraint.add_at_most_one(e, a, b, weight=1.5)
+
+
+def test_soft_proposition_added_twice():
+    e = Encoding()
+
+    @proposition(e)
+    class Task:
+        def __init__(self, name):
+            self.name = name
+
+        def _prop_name(self):
+            return f"Task.{self.name}"
+
+    a, b = Task("a"), Task("b")
+    constraint.add_at_most_one(e, a, b)
+    e.add_soft(a, 2)
+    e.add_soft(b, 4)
+    e.add_soft(a, 3)
+    assert len(e.soft_constraints) == 2
+    assert maxsat._soft_units(e, []) == [(e.variables.id(a), 5), (e.variables.id(b), 4)]
+    solution, cost = e.optimize(backend="builtin")
+    assert cost == 4 and solution[a] and not solution[b]
+
+
+def test_rc2():
+    pytest.importorskip("pysat")
+    e = Encoding()
+
+    @constraint.exactly_one(e)
+    @proposition(e)
+    class Option:
+        def __init__(self, cost):
+            self.cost = cost
+
+        def _prop_name(self):
+            return f"Option.{self.cost}"
+
+    options = [Option(cost) for cost in (4, 1, 3)]
+    for option in options:
+        e.add_soft(~option, option.cost)
+    solution, cost = e.optimize()
+    assert cost == 1 and solution[options[1]]
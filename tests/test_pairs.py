@@ -0,0 +1,79 @@
+import pytest
+
+from bauhaus import Encoding, proposition, constraint, pairs
+
+
+e = Encoding()
+
+
+@proposition(e)
+class Node:
+    def __init__(self, id, row, col):
+        self.id = id
+        self.row = row
+        self.col = col
+
+    def _prop_name(self):
+        return f"Node.{self.id}"
+
+
+nodes = [Node(i, i // 4, i % 4) for i in range(12)]
+
+
+def brute(objects, predicate):
+    return {(a, b) for a in objects for b in objects
+            if a is not b and predicate(a, b)}
+
+
+def test_equal():
+    found = pairs.equal(nodes, "row")
+    assert len(found) == 3 * 6
+    assert {frozenset(p) for p in found} == {frozenset(p) for p in
+                                             brute(nodes, lambda a, b: a.row == b.row)}
+    assert set(pairs.equal(nodes, "row", ordered=True)) == brute(nodes, lambda a, b: a.row == b.row)
+    assert set(pairs.equal(nodes[:4], ("row", "col"), others=nodes)) == set()
+    assert set(pairs.equal(nodes[:2], lambda n: n.col, others=nodes)) == {
+        (a, b) for a in nodes[:2] for b in nodes if a.col == b.col and a is not b}
+
+
+def test_between():
+    found = pairs.between(nodes, "id", 1, 2)
+    assert set(found) == brute(nodes, lambda a, b: 1 <= b.id - a.id <= 2)
+    assert len(found) == len(set(found))
+    assert set(pairs.between(nodes, "col", -1, 0)) == brute(nodes, lambda a, b: -1 <= b.col - a.col <= 0)
+    with pytest.raises(ValueError):
+        pairs.between(nodes, "id", 2, 1)
+
+
+def test_between_numpy_keys():
+    pytest.importorskip("numpy")
+    with pytest.raises(TypeError):
+        pairs.between(nodes, ("row", "col"), 0, 1)
+    with pytest.raises(TypeError):
+        pairs.between(nodes, lambda node: [node.id], 0, 1)
+
+
+def test_edges():
+    found = pairs.edges(nodes, [(0, 1), (1, 5)], "id")
+    assert list(found) == [(nodes[0], nodes[1]), (nodes[1], nodes[5])]
+    with pytest.raises(ValueError):
+        pairs.edges(nodes, [(0, 99)], "id")
+    with pytest.raises(TypeError):
+        pairs.edges(nodes, [(0, 1)], 3)
+
+
+def test_pairwise_constraints():
+    constraint.add_at_most_one(e, pairs=pairs.equal(nodes, "row"))
+    constraint.add_implies_all(e, pairs=pairs.edges(nodes, [(0, 4), (4, 8)], "id"))
+    constraint.add_at_least_one(e, nodes[0])
+    T = e.compile()
+    assert (T & nodes[8]._var).satisfiable()
+    assert not (T & ~nodes[8]._var).satisfiable()
+    assert not (T & nodes[2]._var).satisfiable()
+    assert not (T & nodes[5]._var).satisfiable()
+    assert len(e.compile(format="ints")) == 3 * 6 + 2 + 1
+
+    with pytest.raises(ValueError):
+        constraint.add_at_most_one(e, nodes, pairs=[(nodes[0], nodes[1])])
+    with pytest.raises(ValueError):
+        constraint.add_implies_all(e, left=nodes[0], pairs=[(nodes[0], nodes[1])])
@@ -0,0 +1,89 @@
+import os
+import pickle
+
+from nnf import Var
+
+from bauhaus import Encoding, proposition, constraint
+from bauhaus.parallel import _dumps
+
+e = Encoding(provenance=True)
+
+
+@constraint.at_most_k(e, 2, groupby="row", encoding_type="totalizer")
+@proposition(e)
+class Cell:
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+
+    def _prop_name(self):
+        return f"Cell.{self.row}.{self.col}"
+
+    @constraint.implies_all(e, right=["flag"])
+    def neighbour(self):
+        return []
+
+
+def named(theory, table):
+    return sorted(sorted(clause) for clause in theory
+                  if not any(table.is_auxiliary(lit) for lit in clause))
+
+
+def test_pickle_propositions():
+    cell = Cell(1, 2)
+    copy = pickle.loads(pickle.dumps(cell))
+    assert copy == cell and copy is not cell and copy.col == 2
+    builders = pickle.loads(_dumps(list(e.constraints)))
+    assert set(builders) == e.constraints
+
+
+def test_parallel_compile():
+    cells = [Cell(r, c) for r in range(5) for c in range(6)]
+    parallel = e.compile(format="ints", workers=2)
+    assert e.compile(format="ints", workers=2) == parallel
+
+    e._clear_builds()
+    serial = e.compile(format="ints")
+    assert len(parallel) == len(serial)
+    assert named(parallel, e.variables) == named(serial, e.variables)
+
+    cells += [Cell(5, c) for c in range(6)]
+    e.compile(workers=2)
+    T = e.compile()
+    provenance = set()
+    for builder in e.constraints:
+        provenance.update(e.instance_constraints(builder))
+    assert str(cells[-1]._var) in provenance
+    assert not (T & cells[-1]._var & cells[-2]._var & cells[-3]._var).satisfiable()
+
+
+def test_parallel_groups_from_parent():
+    f = Encoding()
+    parent = os.getpid()
+
+    def by_parity(inputs):
+        # the workers only encode the groups
+        assert os.getpid() == parent
+        return [[var for var in inputs if var.name.val % 2 == i] for i in range(2)]
+
+    @constraint.at_most_k(f, 2, groupby=by_parity, encoding_type="totalizer")
+    @proposition(f)
+    class Item:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"Item.{self.val}"
+
+    items = [Item(i) for i in range(8)]
+    xs = [Var(f"x{i}") for i in range(5)]
+    constraint.add_at_most_k(f, 2, xs, encoding_type="totalizer")
+    parallel = f.compile(format="ints", workers=2)
+    numbers = [f.variables.literal(x) for x in xs]
+    assert max(numbers) <= len(f.variables)
+
+    f._clear_builds()
+    serial = f.compile(format="ints")
+    assert [f.variables.literal(x) for x in xs] == numbers
+    assert named(parallel, f.variables) == named(serial, f.variables)
+    assert len(parallel) == len(serial)
@@ -0,0 +1,46 @@
+from bauhaus import Encoding, proposition, constraint
+
+
+def test_compile_stats():
+    e = Encoding()
+
+    @constraint.at_most_k(e, 2, groupby="row", encoding_type="sequential")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [Cell(r, c) for r in range(3) for c in range(4 + r)]
+    custom = cells[0] | cells[1]
+    e.add_constraint(custom)
+    started, finished = [], []
+    e.on_builder_start = started.append
+    e.on_builder_finish = lambda builder, stats: finished.append((builder, stats))
+
+    clauses = e.compile(format="ints", stats=True)
+    builder, = e.constraints
+    stats = e.last_compile_stats[builder]
+    assert stats["built"] and stats["build_seconds"] >= 0 and stats["peak_bytes"] > 0
+    assert sorted(stats["partitions"]) == [4, 5, 6]
+    assert stats["clauses"] + e.last_compile_stats[custom]["clauses"] == len(clauses)
+    assert stats["literals"] == sum(map(len, e._builds[builder].clauses))
+    assert stats["auxiliary"] > 0
+    assert started == [builder] and finished == [(builder, stats)]
+
+    # a groupby is grouped again on every compile, but groups that did
+    # not change are reused, so nothing is built
+    e.compile(stats=True)
+    stats = e.last_compile_stats[builder]
+    assert not stats["built"] and stats["cnf_seconds"] >= 0
+    assert e.last_compile_stats[custom]["cnf_seconds"] >= 0
+    assert len(started) == 2
+
+    # hooks are called without stats
+    Cell(3, 0), Cell(3, 1), Cell(3, 2)
+    e.compile()
+    assert started == [builder] * 3 and len(finished) == 3
+    assert finished[-1][1]["peak_bytes"] is None
@@ -0,0 +1,118 @@
+import importlib.util
+from itertools import product
+
+import pytest
+
+from bauhaus import Encoding, proposition, constraint
+
+
+e = Encoding()
+
+
+@constraint.at_most_one(e)
+@proposition(e)
+class Colour:
+    def __init__(self, name):
+        self.name = name
+
+    def _prop_name(self):
+        return f"Colour.{self.name}"
+
+
+@constraint.at_least_one(e)
+@proposition(e)
+class Size:
+    def __init__(self, value):
+        self.value = value
+
+    def _prop_name(self):
+        return f"Size.{self.value}"
+
+
+red, green = Colour("red"), Colour("green")
+small = Size(1)
+
+
+def test_session():
+    with e.solver(backend="builtin") as session:
+        assert session.solve()
+        model = session.model()
+        assert model[small] and not (model[red] and model[green])
+
+        assert session.solve(assumptions=[red])
+        assert session.model()[red] and not session.model()[green]
+        assert not session.solve(assumptions=[red, green])
+        assert session.model() is None
+        medium = Size(2)
+        assert session.solve(assumptions=[~small, medium])
+
+        # new instances build the builder again, retiring its clauses
+        blue = Colour("blue")
+        assert session.solve(assumptions=[blue])
+        assert not session.solve(assumptions=[blue, red])
+
+        # added builders and custom constraints are loaded on solve
+        constraint.add_implies_all(e, left=red, right=small)
+        large = Size(3)
+        e.add_constraint(~small | large)
+        assert not session.solve(assumptions=[red, ~large])
+        assert session.solve(assumptions=[green, ~large, ~small])
+
+        session.add_clause([~green])
+        assert not session.solve(assumptions=[green])
+        # clauses added to the session survive custom constraints being removed
+        e._custom_constraints.clear()
+        assert session.solve(assumptions=[red, ~large])
+        assert not session.solve(assumptions=[green])
+
+        assert session.solve()
+        assert set(session.model()) == {red, green, blue, small, medium, large}
+
+    if importlib.util.find_spec("pysat") is None:
+        with pytest.raises(ImportError):
+            e.solver(backend="glucose")
+
+
+def test_pysat_session():
+    pytest.importorskip("pysat")
+    with e.solver(backend="glucose") as session:
+        assert session.solve(assumptions=[red])
+        assert not session.solve(assumptions=[red, green])
+        assert set(session.core()) <= {red, green}
+
+
+def test_iter_models():
+    f = Encoding()
+
+    @constraint.at_most_k(f, 2, encoding_type="sequential")
+    @proposition(f)
+    class Shift:
+        def __init__(self, day):
+            self.day = day
+
+        def _prop_name(self):
+            return f"Shift.{self.day}"
+
+    @proposition(f)
+    class Note:
+        def __init__(self, text):
+            self.text = text
+
+        def _prop_name(self):
+            return f"Note.{self.text}"
+
+    shifts = [Shift(day) for day in range(4)]
+    note = Note("x")
+    constraint.add_at_least_one(f, shifts[0], note)
+
+    models = list(f.iter_models(project=[Shift], backend="builtin"))
+    # at most two of four shifts, the empty set included since note may be true
+    assert len(models) == 1 + 4 + 6
+    assert len({tuple(sorted(m.items(), key=str)) for m in models}) == len(models)
+    assert all(set(m) == set(shifts) for m in models)
+
+    everything = list(f.iter_models(backend="builtin"))
+    expected = [m for m in product([False, True], repeat=5)
+                if sum(m[:4]) <= 2 and (m[0] or m[4])]
+    assert sorted(tuple(m[p] for p in shifts + [note]) for m in everything) == expected
+    assert len(list(f.iter_models(project=[note], limit=1, backend="builtin"))) == 1
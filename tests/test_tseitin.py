@@ -0,0 +1,92 @@
+from itertools import product
+
+import nnf
+from nnf import Var
+from bauhaus import Encoding, proposition, constraint, Or
+from bauhaus import tseitin
+
+
+def projected_models(theory, names):
+    """Assignments to names that extend to a model of theory."""
+    models = set()
+    for values in product([False, True], repeat=len(names)):
+        lits = [Var(name, value) for name, value in zip(names, values)]
+        if (theory & nnf.And(lits)).satisfiable():
+            models.add(values)
+    return models
+
+
+def test_to_CNF_equivalent():
+    a, b, c, d = Var("a"), Var("b"), Var("c"), Var("d")
+    formulas = [
+        (~a | (b | (c & d))) & (a | ~d),
+        (a & b) | (c & ~d) | (a & c),
+        ((a | b) & (c | d)) | (~a & ~c),
+        a,
+    ]
+    for formula in formulas:
+        cnf = nnf.And(tseitin.to_CNF(formula))
+        names = ["a", "b", "c", "d"]
+        expected = set()
+        for values in product([False, True], repeat=4):
+            model = dict(zip(names, values))
+            if formula.satisfied_by(model):
+                expected.add(values)
+        assert projected_models(cnf, names) == expected
+
+
+def test_compile_tseitin():
+    e = Encoding()
+
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    xs = [P(i) for i in range(20)]
+    ys = [P(i + 20) for i in range(20)]
+    # distributing this disjunction of conjunctions gives 2^20 clauses
+    e.add_constraint(Or([x & y for x, y in zip(xs, ys)]))
+    e.add_constraint(xs[0] >> (xs[1] | (xs[2] & xs[3])))
+    constraint.add_exactly_one(e, xs, encoding_type="auto")
+
+    T = e.compile(tseitin=True)
+    assert all(clause.is_CNF() for clause in T.children)
+    assert sum(len(clause.children) for clause in T.children) < 200
+    assert T.satisfiable()
+    assert (T & ~xs[0]._var & ~xs[1]._var).satisfiable()
+    assert not (T & xs[0]._var & ~xs[1]._var & ~xs[2]._var).satisfiable()
+
+
+def test_gates_within_each_constraint():
+    e = Encoding()
+
+    @proposition(e)
+    class Q:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"Q.{self.val}"
+
+    a, b, c, d = [Q(i) for i in range(4)]
+    first = (a & b) | c
+    e.add_constraint(first)
+    e.add_constraint((a & b) | d)
+
+    # the default theory has no gates
+    T = e.compile()
+    assert not any(isinstance(name, nnf.Aux) for name in T.vars())
+
+    # both constraints name a & b, each with its own gate
+    e.compile(format="ints")
+    e._custom_constraints.discard(first)
+    clauses = e.compile(format="ints")
+    theory = nnf.And([nnf.Or(map(e.variables.var, clause)) for clause in clauses])
+    names = [q._var.name for q in (a, b, c, d)]
+    expected = {values for values in product([False, True], repeat=4)
+                if (values[0] and values[1]) or values[3]}
+    assert projected_models(theory, names) == expected
@@ -0,0 +1,254 @@
+import gc
+import weakref
+
+import nnf
+import pytest
+from nnf import Var
+
+from bauhaus import Encoding, proposition, constraint
+from bauhaus.variables import VariableTable
+
+
+def test_variable_table():
+    table = VariableTable()
+    a, b = Var("a"), Var("b")
+    assert table.literal(a) == 1
+    assert table.literal(~b) == -2
+    assert table.literal(~a) == -1
+    aux = table.new_var()
+    assert table.is_auxiliary(aux) and not table.is_auxiliary(-1)
+    assert table.var(-1) == ~a and table.var(2) == b
+    assert table.name(aux) is None
+    name = table.var(aux).name
+    assert isinstance(name, nnf.Aux) and table.id(name) == aux
+
+    table.reset_auxiliary()
+    assert table.new_var() == aux
+    assert table.new_var() == 4
+    assert len(table) == 4
+    # a number handed out again is a new nnf.Aux
+    assert table.name(aux) is None
+    assert table.var(aux).name != name and name not in table
+
+
+def test_compile_ints():
+    e = Encoding()
+
+    @constraint.exactly_one(e)
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(6)]
+    constraint.add_at_most_k(e, 2, *props, encoding_type="totalizer")
+    constraint.add_implies_all(e, left=props[0], right=props[1])
+    e.add_constraint(props[2] | (props[3] & props[4]))
+
+    clauses = e.compile(format="ints")
+    assert not e.debug_constraints
+    assert all(isinstance(lit, int) for clause in clauses for lit in clause)
+    size = len(e.variables)
+    # recompiling reuses the auxiliary variables
+    assert e.compile(format="ints") == clauses
+    assert len(e.variables) == size
+
+    T = nnf.And([nnf.Or(map(e.variables.var, clause)) for clause in clauses])
+    for i, p in enumerate(props):
+        model = (T & p._var).solve()
+        assert (model is not None) == (i == 2)
+    assert not (T & props[0]._var).satisfiable()
+
+    with pytest.raises(ValueError):
+        e.compile(format="dimacs")
+
+
+def test_propositions_numbered_at_creation():
+    e = Encoding()
+
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(5)]
+    duplicate = P(3)
+    assert [e.variables.literal(p._var) for p in props] == [1, 2, 3, 4, 5]
+    assert e.variables.literal(~duplicate._var) == -4
+    assert e.variables.name(-2) is props[1]
+
+    constraint.add_exactly_one(e, *props)
+    e.compile(format="ints")
+    solution = e.variables.decode(range(-1, -len(e.variables) - 1, -1))
+    assert solution == {p: False for p in props}
+
+
+def test_deleted_propositions_are_collected():
+    e = Encoding()
+
+    @constraint.at_least_one(e)
+    @proposition(e)
+    class P:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"P.{self.val}"
+
+    props = [P(i) for i in range(6)]
+    assert len(e.compile().vars()) == 6
+    dropped = weakref.ref(props.pop())
+    gc.collect()
+    assert dropped() is None
+    assert sum(map(len, e.propositions.values())) == 5
+    assert e.variables.name(6) == "P.5"
+    T = e.compile()
+    assert T.vars() == {p for p in props}
+
+    # created again, it takes its number back
+    again = P(5)
+    assert e.variables.literal(again._var) == 6
+    assert e.variables.name(6) is again
+    assert e.compile().vars() == set(props) | {again}
+
+
+def test_create_many():
+    e = Encoding()
+
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    first = Cell(0, 0)
+    cells = e.create_many(Cell, [(r, c) for r in range(3) for c in range(1, 3)])
+    assert isinstance(cells, tuple) and len(cells) == 6
+    assert cells.ids == range(2, 8)
+    assert len(e.propositions[Cell.__qualname__]) == 7
+    assert repr(cells[0]) == "Cell.0.1"
+
+    again = Cell.bulk([(0, 0), (5, 5)])
+    assert list(again.ids) == [1, 8] and again[0] == first
+
+    constraint.add_exactly_one(e, cells)
+    clauses = e.compile(format="ints")
+    assert sorted(cells.ids) in [sorted(clause) for clause in clauses]
+
+    with pytest.raises(ValueError):
+        Encoding().create_many(Cell, [(1, 1)])
+
+
+def test_incremental_compile():
+    e = Encoding()
+
+    @constraint.exactly_one(e, groupby="row")
+    @proposition(e)
+    class Cell:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+        def _prop_name(self):
+            return f"Cell.{self.row}.{self.col}"
+
+    cells = [Cell(r, c) for r in range(3) for c in range(8)]
+    constraint.add_at_most_k(e, 2, cells[0], cells[8], cells[16])
+    first = e.compile(format="ints")
+    builder = next(c for c in e.constraints if c._func)
+    parts = dict(e._builds[builder].parts)
+    assert e.compile(format="ints") == first
+
+    cells += [Cell(3, c) for c in range(8)]
+    T = e.compile()
+    reused = [key for key in parts if e._builds[builder].parts[key] is parts[key]]
+    assert len(reused) == 3 and len(e._builds[builder].parts) == 4
+    assert not (T & cells[24]._var & cells[25]._var).satisfiable()
+
+    e._clear_builds()
+    full = e.compile()
+    for lits in [[0, 8, 16], [1, 9, 24], [0, 24, 31]]:
+        assignment = nnf.And([cells[i]._var for i in lits])
+        assert (T & assignment).satisfiable() == (full & assignment).satisfiable()
+
+
+cell_encoding = Encoding()
+
+
+@constraint.at_most_one(cell_encoding, groupby="row")
+@proposition(cell_encoding)
+class Cell:
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+        self.weight = 1
+        self.link = None
+
+    def _prop_name(self):
+        return f"Cell.{self.col}"
+
+    @constraint.implies_all(cell_encoding)
+    def linked(self):
+        return [self.link] if self.link else []
+
+
+def test_incremental_compile_follows_attributes():
+    e = cell_encoding
+    cells = [Cell(c % 2, c) for c in range(6)]
+    cells[0].link = cells[1]
+    constraint.weighted_at_most(e, "weight", 2)(Cell)
+    T = e.compile()
+    assert (T & cells[0]._var & cells[1]._var).satisfiable()
+
+    # no instance is created or deleted
+    cells[1].row = 0
+    cells[4].weight = 3
+    cells[0].link = cells[5]
+    T = e.compile()
+    assert not (T & cells[0]._var & cells[1]._var).satisfiable()
+    assert not (T & cells[4]._var).satisfiable()
+    assert not (T & cells[0]._var & cells[3]._var).satisfiable()
+    e._clear_builds()
+    full = e.compile()
+    for lits in [[0, 1], [1, 3], [3, 5], [4], [0], [0, 3], [2, 3]]:
+        assignment = nnf.And([cells[i]._var for i in lits])
+        assert (T & assignment).satisfiable() == (full & assignment).satisfiable()
+
+    # builds that did not change are kept
+    builds = dict(e._builds)
+    e.compile()
+    assert all(e._builds[c] is build for c, build in builds.items())
+
+
+def test_recycled_auxiliary_names():
+    e = Encoding()
+
+    @constraint.at_most_one(e, encoding_type="product")
+    @proposition(e)
+    class R:
+        def __init__(self, val):
+            self.val = val
+
+        def _prop_name(self):
+            return f"R.{self.val}"
+
+    props = [R(i) for i in range(9)]
+    T1 = e.compile()
+    props.append(R(9))
+    e.compile()
+    props.append(R(10))
+    T3 = e.compile()
+    # T3 is built over the numbers released by the second compile
+    aux1 = {name for name in T1.vars() if isinstance(name, nnf.Aux)}
+    aux3 = {name for name in T3.vars() if isinstance(name, nnf.Aux)}
+    assert aux1 and aux3 and not aux1 & aux3
+    assert (T1 & T3 & props[10]._var).satisfiable()